@@ -0,0 +1,63 @@
+'''
+Benchmark of the time the autosave holds the command lock.
+
+Saves address books of random contacts with SerializedObject.save_in_background and compares
+the time the lock is held (taking the pickle states) with the time of pickling the whole book,
+which is how long commands would wait if the book were pickled under the lock.
+
+Run:
+    python benchmarks/bench_autosave_lock.py [N ...]   # N defaults to 10 000 100 000 1 000 000
+'''
+import os
+import pickle
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from addressbook import AddressBook
+from file_serializer import SerializedObject
+from bench_snapshot_codecs import add_contacts
+
+
+class TimedLock:
+    '''
+    Lock measuring the time it is held.
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.held = 0.0
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args):
+        self.held += time.perf_counter() - self.start
+        self.lock.release()
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    rng = random.Random(42)
+    book = AddressBook()
+    print(f"{'contacts':>10} {'pickle ms':>10} {'lock ms':>10} {'save ms':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        storage = SerializedObject(os.path.join(directory, "addressbook.pkl"), book, "none")
+        for count in sorted(counts):
+            add_contacts(book, rng, count)
+            start = time.perf_counter()
+            pickle.dumps(book)
+            pickle_time = time.perf_counter() - start
+            lock = TimedLock()
+            start = time.perf_counter()
+            storage.save_in_background(lock)
+            save_time = time.perf_counter() - start
+            print(f"{len(book):>10} {pickle_time * 1000:10.1f} {lock.held * 1000:10.1f} {save_time * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+'''
+Benchmark of the typo-tolerant name search.
+
+Builds a TrigramIndex over N synthetic "First Last" names and measures the latency
+of fuzzy queries with one and two typos, compared with a plain scan that computes
+the bounded edit distance against every name. The trigram counting is vectorized
+when numpy is installed.
+
+Run:
+    python benchmarks/bench_fuzzy_names.py [N]   # N defaults to 1 000 000
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import fuzzy_index
+from fuzzy_index import TrigramIndex, default_distance, edit_distance
+
+FIRST_NAMES = ["oleksandr", "olena", "andriy", "iryna", "mykola", "natalia", "serhiy", "tetiana",
+               "volodymyr", "yulia", "dmytro", "kateryna", "taras", "oksana", "bohdan", "halyna",
+               "john", "mary", "robert", "patricia", "michael", "jennifer", "william", "linda"]
+CONSONANTS = "bcdfghklmnprstvz"
+VOWELS = "aeiouy"
+SUFFIXES = ["enko", "uk", "chuk", "sky", "ska", "ych", "son", "er", "ova", "ov", ""]
+
+
+def make_surname(rng: random.Random) -> str:
+    '''
+    Build a pronounceable surname of consonant-vowel syllables with a common suffix.
+    '''
+    syllables = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.randint(1, 3)))
+    return syllables + rng.choice(SUFFIXES)
+
+
+def make_names(count: int, seed: int = 42) -> list[str]:
+    '''
+    Build distinct lowercased "first last" names.
+    '''
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(FIRST_NAMES)} {make_surname(rng)}")
+    return list(names)
+
+
+def make_typo(name: str, typos: int, rng: random.Random) -> str:
+    '''
+    Apply random substitutions, insertions and deletions to a name.
+    '''
+    for _ in range(typos):
+        position = rng.randrange(len(name))
+        match rng.randrange(3):
+            case 0:
+                name = name[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[position + 1:]
+            case 1:
+                name = name[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[position:]
+            case _:
+                name = name[:position] + name[position + 1:]
+    return name
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    names = make_names(count)
+    start = time.perf_counter()
+    index = TrigramIndex(names)
+    print(f"{count} names indexed in {time.perf_counter() - start:.1f} s, "
+          f"numpy {'enabled' if fuzzy_index.numpy is not None else 'not installed'}")
+
+    rng = random.Random(7)
+    for typos in (1, 2):
+        queries = [make_typo(rng.choice(names), typos, rng) for _ in range(200)]
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        elapsed = (time.perf_counter() - start) / len(queries)
+        print(f"{typos} typo(s): {elapsed * 1000:7.2f} ms per query (top 10)")
+
+    query = queries[0]
+    start = time.perf_counter()
+    max_distance = default_distance(query)
+    scanned = [name for name in names if edit_distance(query, name, max_distance) <= max_distance]
+    elapsed = time.perf_counter() - start
+    print(f"full scan: {elapsed * 1000:7.0f} ms per query ({len(scanned)} matches)")
+
+
+if __name__ == "__main__":
+    main()
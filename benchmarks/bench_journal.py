@@ -0,0 +1,77 @@
+'''
+Benchmark of the journaled storage.
+
+Stores an address book of N random contacts and measures the cost of saving one changed phone:
+rewriting the whole pickle (SerializedObject.save_data) against appending it to the journal
+(JournaledObject.commit, including fsync). Then measures the load time: the snapshot alone and
+the snapshot with a journal of the default compaction size replayed over it.
+
+Run:
+    python benchmarks/bench_journal.py [N]   # N defaults to 100 000
+'''
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import config
+from addressbook import AddressBook, Record
+from file_serializer import SerializedObject
+from journal import JournaledObject
+
+
+def random_name(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(10)).capitalize()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    book = AddressBook()
+    for _ in range(count):
+        record = Record(random_name(rng))
+        record.add_phone(f"+38093{rng.randrange(10**7):07d}")
+        book.add_record(record)
+    records = book.get_all_contacts()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "addressbook.pkl")
+        storage = SerializedObject(filename, book)
+        start = time.perf_counter()
+        storage.save_data()
+        elapsed = time.perf_counter() - start
+        print(f"{len(book)} contacts, snapshot {os.path.getsize(filename) / 2**20:.1f} MiB")
+        print(f"{'full pickle save':>22}: {elapsed * 1000:8.2f} ms per change")
+
+        journaled = JournaledObject(filename, AddressBook(), max_journal_bytes=2**40)
+        records = journaled.object.get_all_contacts()
+        changes = 200
+        start = time.perf_counter()
+        for _ in range(changes):
+            record = rng.choice(records)
+            record.change_phone(record.phone_values[0], f"+38093{rng.randrange(10**7):07d}")
+            journaled.commit()
+        elapsed = (time.perf_counter() - start) / changes
+        print(f"{'journal commit':>22}: {elapsed * 1000:8.2f} ms per change")
+
+        while journaled.journal_size < config.JOURNAL_MAX_BYTES:
+            record = rng.choice(records)
+            record.change_phone(record.phone_values[0], f"+38093{rng.randrange(10**7):07d}")
+            journaled.commit()
+
+        start = time.perf_counter()
+        SerializedObject(filename, AddressBook())
+        snapshot_load = time.perf_counter() - start
+        start = time.perf_counter()
+        replayed = JournaledObject(filename, AddressBook(), max_journal_bytes=2**40).replayed
+        elapsed = time.perf_counter() - start
+        print(f"{'snapshot load':>22}: {snapshot_load * 1000:8.1f} ms")
+        print(f"{'snapshot + replay':>22}: {elapsed * 1000:8.1f} ms "
+              f"({replayed} operations, {config.JOURNAL_MAX_BYTES / 2**20:.1f} MiB journal)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+'''
+Benchmark of the full-text search of notes.
+
+Builds a Notebook of N notes with random titles and texts over a Zipf-distributed vocabulary
+and measures the latency of BM25-ranked searches for one, two and three words, compared with
+the '%word%' text match of find_note, which checks every note. Phrase and NEAR/5 queries are
+compared with a regex scan of every note, and the size of the compressed positional postings
+must stay below the size of the indexed text. The query cache is bypassed by changing a note
+before every query.
+
+Run:
+    python benchmarks/bench_note_search.py [N]   # N defaults to 100 000
+'''
+from itertools import accumulate
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from notebook import Note, Notebook
+
+WORDS = [f"word{i}" for i in range(5000)]
+# Zipf-like weights: a few words are in many notes, most words are rare
+CUM_WEIGHTS = list(accumulate(1 / (rank + 1) for rank in range(len(WORDS))))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    notebook = Notebook()
+    notes = []
+    for _ in range(count):
+        title = " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=rng.randint(1, 5)))
+        text = " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=rng.randint(10, 60)))
+        notes.append(Note(title, text))
+    start = time.perf_counter()
+    for note in notes:
+        notebook.add_note(note)
+    print(f"{count} notes indexed in {time.perf_counter() - start:.1f} s")
+
+    note = notebook.data[0]
+    for words in (1, 2, 3):
+        queries = [" ".join(rng.sample(WORDS[10:1000], words)) for _ in range(50)]
+        start = time.perf_counter()
+        for query in queries:
+            note.change_title(note.title)
+            notebook.search_notes(query)
+        elapsed = (time.perf_counter() - start) / len(queries)
+        print(f"{words} word(s): {elapsed * 1000:7.2f} ms per query (top 10)")
+
+    start = time.perf_counter()
+    found = notebook.find_note(f"%{queries[0].split()[0]}%", "text")
+    elapsed = time.perf_counter() - start
+    print(f"text scan: {elapsed * 1000:7.2f} ms per query ({len(found)} notes, unranked)")
+
+    # Phrases and NEAR clauses taken from random notes, so every query has matches
+    phrases, proximities = [], []
+    for sample in rng.sample(notes, 50):
+        words = sample.text.lower().split()
+        position = rng.randrange(len(words) - 3)
+        phrases.append(words[position:position + 2])
+        proximities.append((words[position], words[position + 3]))
+    for title, queries, pattern in (
+            ("phrase", [f'"{first} {second}"' for first, second in phrases],
+             lambda first, second: rf"\b{first} {second}\b"),
+            ("NEAR/5", [f"{first} NEAR/5 {second}" for first, second in proximities],
+             lambda first, second: rf"\b{first}\b(?:\W+\w+){{0,4}}\W+{second}\b|\b{second}\b(?:\W+\w+){{0,4}}\W+{first}\b")):
+        start = time.perf_counter()
+        for query in queries:
+            note.change_title(note.title)
+            notebook.search_notes(query)
+        indexed = (time.perf_counter() - start) / len(queries)
+        regex = re.compile(pattern(*(phrases if title == "phrase" else proximities)[0]), re.IGNORECASE)
+        start = time.perf_counter()
+        scanned = [note for note in notes if regex.search(note.text)]
+        elapsed = time.perf_counter() - start
+        print(f"{title:>6}: index {indexed * 1000:7.2f} ms, regex scan {elapsed * 1000:7.2f} ms per query")
+
+    usage = notebook.text_index_stats()
+    print(f"index {usage['index bytes'] / 2**20:.1f} MiB (encoded blocks {usage['encoded block bytes'] / 2**20:.1f} MiB) "
+          f"for {usage['text bytes'] / 2**20:.1f} MiB of text, {usage['terms']} terms")
+    assert usage['index bytes'] < usage['text bytes'], "the index takes more memory than the indexed text"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+'''
+Benchmark of the tag queries of the notebook.
+
+Builds a Notebook of N notes with a few tags each, drawn from a skewed tag distribution,
+and measures the latency of OR, AND and NOT tag queries answered from the tag postings,
+compared with checking the tags of every note. The query cache is bypassed by
+changing a note before every query.
+
+Run:
+    python benchmarks/bench_note_tags.py [N]   # N defaults to 300 000
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from notebook import Note, Notebook
+
+TAGS = [f"tag{i}" for i in range(200)]
+# Zipf-like weights: a few tags are on many notes, most tags are rare
+WEIGHTS = [1 / (rank + 1) for rank in range(len(TAGS))]
+
+QUERIES = [
+    ("rare OR rare", "tag150,tag180", lambda tags: "tag150" in tags or "tag180" in tags),
+    ("popular AND rare", "tag0+tag120", lambda tags: "tag0" in tags and "tag120" in tags),
+    ("popular AND popular", "tag0+tag1", lambda tags: "tag0" in tags and "tag1" in tags),
+    ("rare NOT popular", "tag120,-tag0", lambda tags: "tag120" in tags and "tag0" not in tags),
+]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    rng = random.Random(42)
+    start = time.perf_counter()
+    notebook = Notebook()
+    for i in range(count):
+        notebook.add_note(Note(f"note {i}", "text", set(rng.choices(TAGS, WEIGHTS, k=rng.randint(1, 4)))))
+    print(f"{count} notes indexed in {time.perf_counter() - start:.1f} s")
+
+    note = notebook.data[0]
+    for title, query, matches in QUERIES:
+        repeats = 50
+        start = time.perf_counter()
+        for _ in range(repeats):
+            note.add_tag("bench")
+            found = notebook.find_note_by_tag_query(query)
+            note.remove_tag("bench")
+        indexed = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        scanned = [note for note in notebook.data if matches(note.tags)]
+        elapsed = time.perf_counter() - start
+        assert len(scanned) == len(found)
+        print(f"{title:>20}: index {indexed * 1000:8.3f} ms, scan {elapsed * 1000:8.3f} ms, {len(found)} notes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+'''
+Benchmark of the partial phone search.
+
+Builds a PhoneSuffixIndex over N random phones and measures the latency of queries by
+the last 4-7 digits ('%4477') and by digits anywhere in the number ('%447%'), compared
+with matching the pattern against every phone. The index is built with numpy when it is installed.
+
+Run:
+    python benchmarks/bench_phone_suffix.py [N]   # N defaults to 1 000 000
+'''
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import indexes
+from indexes import PhoneSuffixIndex
+from wildcard import compile_pattern
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(42)
+    phones = list({f"+380{rng.randrange(10**9):09d}" for _ in range(count)})
+    start = time.perf_counter()
+    index = PhoneSuffixIndex(phones)
+    print(f"{len(phones)} phones indexed in {time.perf_counter() - start:.1f} s, "
+          f"numpy {'enabled' if indexes.numpy is not None else 'not installed'}")
+
+    for title, make_pattern in (("last 4 digits", lambda phone: "%" + phone[-4:]),
+                                ("last 7 digits", lambda phone: "%" + phone[-7:]),
+                                ("4 digits inside", lambda phone: "%" + phone[6:10] + "%")):
+        patterns = [make_pattern(rng.choice(phones)) for _ in range(200)]
+        start = time.perf_counter()
+        found = sum(len(index.search(pattern)) for pattern in patterns)
+        elapsed = (time.perf_counter() - start) / len(patterns)
+        print(f"{title:>16}: {elapsed * 1000:7.3f} ms per query, {found / len(patterns):.0f} phones found")
+
+    matches = compile_pattern(patterns[0])
+    start = time.perf_counter()
+    scanned = [phone for phone in phones if matches(phone)]
+    elapsed = time.perf_counter() - start
+    print(f"{'full scan':>16}: {elapsed * 1000:7.3f} ms per query, {len(scanned)} phones found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+'''
+Memory benchmark of the contact record representation.
+
+Measures the memory allocated by N records with two phones, an email and a birthday
+using tracemalloc, for the compact __slots__ layout of Record and for a replica
+of the previous layout with a per-instance __dict__ and a list of Phone objects.
+
+Run:
+    python benchmarks/bench_record_memory.py [N]   # N defaults to 1 000 000
+'''
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from addressbook import Birthday, Email, Name, Phone, Record
+
+
+class LegacyField:
+    '''
+    Replica of the previous Field layout with a per-instance __dict__.
+    '''
+    def __init__(self, value):
+        self.value = value
+
+
+class LegacyRecord:
+    '''
+    Replica of the previous Record layout: a __dict__ and a list of Phone objects.
+    '''
+    def __init__(self, name, phones, email, birthday):
+        self.name = LegacyField(name)
+        self.phones = [LegacyField(phone) for phone in phones]
+        self.address = None
+        self.email = LegacyField(email)
+        self.birthday = LegacyField(birthday)
+
+
+def make_values(index: int) -> tuple:
+    '''
+    Build the field values of the record with the given index.
+    '''
+    name = "Contact" + "".join(chr(ord("a") + int(digit)) for digit in str(index))
+    phones = (f"+380{index:09d}", f"+380{(index * 7) % 10**9:09d}")
+    email = f"contact{index}@example.com"
+    birthday = datetime(1950 + index % 50, 1 + index % 12, 1 + index % 28)
+    return name, phones, email, birthday
+
+
+def build_compact(count: int) -> list:
+    '''
+    Build records in the compact layout without repeating the field validation.
+    '''
+    records = []
+    for index in range(count):
+        name, phones, email, birthday = make_values(index)
+        records.append(Record.restore({"name": name, "phones": phones, "address": None,
+                                       "email": email, "birthday": birthday.toordinal()}))
+    return records
+
+
+def build_legacy(count: int) -> list:
+    '''
+    Build records in the previous layout.
+    '''
+    return [LegacyRecord(*make_values(index)) for index in range(count)]
+
+
+def measure(build, count: int) -> tuple[float, float]:
+    '''
+    Measure the memory held by the built records and the build time.
+
+    Returns:
+        tuple: Allocated megabytes and elapsed seconds.
+    '''
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build(count)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current / 2**20, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{count} records with 2 phones, email and birthday")
+    for title, build in (("legacy __dict__ layout", build_legacy), ("compact __slots__ layout", build_compact)):
+        megabytes, elapsed = measure(build, count)
+        print(f"{title:>26}: {megabytes:9.1f} MB, {megabytes * 2**20 / count:6.0f} B/record, built in {elapsed:.1f} s")
+
+    # Fields are still materialized on access
+    record = build_compact(1)[0]
+    assert isinstance(record.phones[0], Phone) and isinstance(record.birthday, Birthday)
+    assert isinstance(record.name, Name) and isinstance(record.email, Email)
+
+
+if __name__ == "__main__":
+    main()
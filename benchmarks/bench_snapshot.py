@@ -0,0 +1,76 @@
+'''
+Benchmark of the memory-mapped binary snapshot.
+
+Writes an address book of N random contacts as a pickle and as a binary snapshot and measures
+the time to open each one, then the latency of the snapshot view for a lookup by name,
+an exact phone search, a search by email domain and the upcoming birthdays.
+
+Run:
+    python benchmarks/bench_snapshot.py [N]   # N defaults to 200 000
+'''
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import snapshot
+from addressbook import AddressBook, Record
+from snapshot import SnapshotAddressBook, write_snapshot
+
+
+def random_name(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(10)).capitalize()
+
+
+def timed(title, function, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{title:>28}: {elapsed * 1000:9.3f} ms")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(42)
+    book = AddressBook()
+    for _ in range(count):
+        name = random_name(rng)
+        record = Record(name)
+        record.add_phone(f"+38093{rng.randrange(10**7):07d}")
+        record.change_email(f"{name.lower()}@domain{rng.randrange(100)}.com")
+        record.change_birthday(f"{rng.randrange(1, 29):02d}.{rng.randrange(1, 13):02d}.{rng.randrange(1950, 2010)}")
+        book.add_record(record)
+    sample = rng.choice(book.get_all_contacts())
+
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, "addressbook.pkl")
+        snapshot_path = os.path.join(directory, "addressbook.snap")
+        with open(pickle_path, "wb") as f:
+            pickle.dump(book, f)
+        write_snapshot(snapshot_path, book.get_all_contacts())
+        print(f"{len(book)} contacts, pickle {os.path.getsize(pickle_path) / 2**20:.1f} MiB, "
+              f"snapshot {os.path.getsize(snapshot_path) / 2**20:.1f} MiB, "
+              f"numpy {'enabled' if snapshot.numpy is not None else 'not installed'}")
+        del book
+
+        def load_pickle():
+            with open(pickle_path, "rb") as f:
+                return pickle.load(f)
+
+        timed("pickle load", load_pickle)
+        view = timed("snapshot open", lambda: SnapshotAddressBook(snapshot_path))
+        timed("find by name", lambda: view.find(sample.name.value), 1000)
+        timed("complete names", lambda: view.complete_names(sample.name.value[:3]), 1000)
+        timed("exact phone search", lambda: view.find_records(sample.phone_values[0], "phone"))
+        timed("email domain search", lambda: view.find_records("%@domain7.com", "email"))
+        timed("upcoming birthdays (7 days)", lambda: view.get_upcoming_birthdays(7))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+'''
+Benchmark of the compression codecs of the pickle snapshot.
+
+Saves address books of random contacts with SerializedObject using every codec of
+file_serializer.CODECS and without compression, and measures the save time (pickling, compression,
+fsync and rename), the load time and the file size.
+
+Run:
+    python benchmarks/bench_snapshot_codecs.py [N ...]   # N defaults to 10 000 100 000 1 000 000
+'''
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from addressbook import AddressBook, Record
+from file_serializer import CODECS, SerializedObject
+
+
+def random_name(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(10)).capitalize()
+
+
+def add_contacts(book, rng, count):
+    first_birthday = date(1950, 1, 1)
+    while len(book) < count:
+        name = random_name(rng)
+        record = Record(name)
+        record.add_phone(f"+38093{rng.randrange(10**7):07d}")
+        record.change_email(f"{name.lower()}@{rng.choice(('gmail.com', 'ukr.net', 'example.com'))}")
+        record.change_address(f"Kyiv, {rng.choice(('Main', 'Shevchenka', 'Franka'))} street {rng.randrange(1, 200)}")
+        birthday = first_birthday + timedelta(days=rng.randrange(20000))
+        record.change_birthday(birthday.strftime("%d.%m.%Y"))
+        book.add_record(record)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    rng = random.Random(42)
+    book = AddressBook()
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sorted(counts):
+            add_contacts(book, rng, count)
+            print(f"{len(book)} contacts")
+            print(f"{'codec':>8} {'save ms':>10} {'load ms':>10} {'size MiB':>10} {'ratio':>7}")
+            plain_size = None
+            for codec in ("none", *CODECS):
+                filename = os.path.join(directory, f"addressbook-{codec}.pkl")
+                storage = SerializedObject(filename, book, codec)
+                start = time.perf_counter()
+                storage.save_data()
+                save_time = time.perf_counter() - start
+                size = os.path.getsize(filename)
+                plain_size = plain_size or size
+                start = time.perf_counter()
+                loaded = SerializedObject(filename, AddressBook()).object
+                load_time = time.perf_counter() - start
+                assert len(loaded) == len(book)
+                del loaded
+                os.remove(filename)
+                print(f"{codec:>8} {save_time * 1000:10.1f} {load_time * 1000:10.1f} "
+                      f"{size / 2**20:10.2f} {plain_size / size:7.2f}")
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+'''
+Benchmark of the SQLite storage backend.
+
+Stores an address book of N random contacts as a pickle and as a SQLite database and measures,
+for both, the time to open the storage and answer the first lookups (find by name, name completion,
+exact phone search), and the Python memory allocated by then, measured with tracemalloc.
+
+Run:
+    python benchmarks/bench_sqlite_storage.py [N]   # N defaults to 100 000
+'''
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from addressbook import AddressBook, Record
+from file_serializer import SerializedObject
+from sqlite_storage import SqliteObject
+
+
+def random_name(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(10)).capitalize()
+
+
+def measure(title, open_storage, name, phone):
+    tracemalloc.start()
+    start = time.perf_counter()
+    book = open_storage().object
+    opened = time.perf_counter() - start
+    record = book.find(name)
+    book.complete_names(name[:3])
+    book.find_records({"phone": phone})
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert record is not None
+    print(f"{title:>8}: open {opened * 1000:8.1f} ms, first lookups done after {elapsed * 1000:8.1f} ms, "
+          f"peak memory {memory / 2**20:7.1f} MiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    book = AddressBook()
+    for _ in range(count):
+        record = Record(random_name(rng))
+        record.add_phone(f"+38093{rng.randrange(10**7):07d}")
+        book.add_record(record)
+    sample = rng.choice(book.get_all_contacts())
+    name, phone = sample.name.value, sample.phone_values[0]
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "addressbook.pkl")
+        SerializedObject(filename, book).save_data()
+        start = time.perf_counter()
+        SqliteObject(filename, AddressBook())
+        print(f"{len(book)} contacts, pickle {os.path.getsize(filename) / 2**20:.1f} MiB, "
+              f"database {os.path.getsize(filename[:-4] + '.db') / 2**20:.1f} MiB "
+              f"(migrated in {time.perf_counter() - start:.1f} s)")
+        del book, sample
+        measure("pickle", lambda: SerializedObject(filename, AddressBook()), name, phone)
+        measure("sqlite", lambda: SqliteObject(filename, AddressBook()), name, phone)
+
+
+if __name__ == "__main__":
+    main()
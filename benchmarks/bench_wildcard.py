@@ -0,0 +1,66 @@
+'''
+Benchmark of the wildcard matcher on pathological patterns.
+
+A pattern like '%a%a%a%a%a%b' becomes the regular expression '^.*a.*a.*a.*a.*a.*b$',
+which backtracks polynomially on a text of 'a' characters without a final 'b'.
+The benchmark measures the regex approach on small texts and the linear matcher
+used by AddressBook.find_records and Notebook.find_note on note bodies up to 100 KB.
+
+Run:
+    python benchmarks/bench_wildcard.py
+'''
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from notebook import Notebook, Note
+from wildcard import compile_pattern
+
+# (pattern, text builder) pairs; none of the texts match, so every matcher has to give up
+CASES = [
+    ("%a%a%a%a%a%b", lambda size: "a" * size),
+    ("%a%a_a%a%b%c", lambda size: "a" * (size - 1) + "c"),
+]
+
+
+def regex_like(pattern: str, text: str) -> bool:
+    '''
+    The regex-based LIKE matching used before the linear matcher.
+    '''
+    regex = '^' + re.escape(pattern).replace('%', '.*').replace('_', '.') + '$'
+    return re.match(regex, text) is not None
+
+
+def measure(func, *args) -> float:
+    '''
+    Measure the execution time of a function call in milliseconds.
+    '''
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    for pattern, build_text in CASES:
+        print(f"pattern: {pattern!r}")
+        print(f"{'size':>8} {'regex, ms':>12} {'linear, ms':>12}")
+        for size in (20, 40, 60, 80):
+            text = build_text(size)
+            print(f"{size:>8} {measure(regex_like, pattern, text):>12.2f} "
+                  f"{measure(compile_pattern(pattern), text):>12.3f}")
+        for size in (1_000, 10_000, 100_000):
+            text = build_text(size)
+            print(f"{size:>8} {'(skipped)':>12} {measure(compile_pattern(pattern), text):>12.3f}")
+
+        notebook = Notebook()
+        for _ in range(100):
+            notebook.add_note(Note("Pathological note", build_text(100_000)))
+        elapsed = measure(notebook.find_note, pattern, "text")
+        print(f"find_note over 100 notes of 100 KB: {elapsed:.2f} ms\n")
+
+
+if __name__ == "__main__":
+    main()
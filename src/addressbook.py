@@ -1,16 +1,129 @@
 from collections import UserDict
+from collections.abc import Iterator
+import calendar
 import re
+import sys
 from datetime import datetime, timedelta
 import exceptions
+from indexes import HashIndex, PhoneSuffixIndex, SortedIndex
+from fuzzy_index import FUZZY_LIMIT, TrigramIndex
+from wildcard import compile_pattern, has_wildcards, literal_prefix
+from query_planner import PlanStep, QueryPlan
+from query_cache import QueryCache
+from listeners import ListenerRegistry
+
+# Fields that can be searched with find_records
+SEARCH_FIELDS = ('name', 'name~', 'phone', 'email', 'address', 'birthday')
+
+# Validation patterns are compiled once at import
+PHONE_PATTERN = re.compile(r"^\+380\d{9}$")
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+
+def email_domain(email: str) -> str:
+    '''
+    Get the lowercased domain of an email address.
+
+    Args:
+        email (str): The email address.
+    Returns:
+        str: The part after the '@'.
+    '''
+    return email.rpartition('@')[2].lower()
+
+
+def name_error(name) -> str | None:
+    '''
+    Check a name: a string of at least 2 characters made of letters, spaces and hyphens.
+
+    Args:
+        name (str): The name to check.
+    Returns:
+        str | None: The validation error message, None if the name is valid.
+    '''
+    if not isinstance(name, str):
+        return f"Validation of name '{name}' failed. Expected type str."
+    if len(name.strip()) < 2:
+        return f"Validation of name '{name}' failed. Name must be at least 2 characters long."
+    if not all(char.isalpha() or char.isspace() or char == '-' for char in name):
+        return f"Validation of name '{name}' failed. Name can only contain letters, spaces, and hyphens."
+    return None
+
+
+def phone_error(phone) -> str | None:
+    '''
+    Check a phone number: a Ukrainian mobile number in the +380XXXXXXXXX format.
+
+    Args:
+        phone (str): The phone number to check.
+    Returns:
+        str | None: The validation error message, None if the phone number is valid.
+    '''
+    if not isinstance(phone, str):
+        return f"Validation of phone '{phone}' failed. Expected type str"
+    if not PHONE_PATTERN.match(phone):
+        return f"Validation of phone '{phone}' failed. Ukrainian mobile number must be in +380XXXXXXXXX"
+    return None
+
+
+def email_error(email) -> str | None:
+    '''
+    Check an email address against EMAIL_PATTERN.
+
+    Args:
+        email (str): The email address to check.
+    Returns:
+        str | None: The validation error message, None if the email address is valid.
+    '''
+    if not isinstance(email, str):
+        return f"Validation of email '{email}' failed. Expected type str"
+    if not EMAIL_PATTERN.match(email):
+        return f"Validation of email '{email}' failed. Invalid email format"
+    return None
+
+
+def address_error(address) -> str | None:
+    '''
+    Check an address: a string of 5 to 100 characters.
+
+    Args:
+        address (str): The address to check.
+    Returns:
+        str | None: The validation error message, None if the address is valid.
+    '''
+    if not isinstance(address, str):
+        return f"Validation of address '{address}' failed. Expected type str."
+    if len(address.strip()) < 5 or len(address.strip()) > 100:
+        return f"Validation of address '{address}' failed. Address must be between 5 and 100 characters long."
+    return None
+
 
 class Field:
     '''
     Base class for all fields in the address book.
+    Fields use __slots__, so an instance holds only its value and no per-instance __dict__.
     '''
+    __slots__ = ('__value',)
+
     def __init__(self, value):
         self.__value = None
         self.value = value
 
+    @classmethod
+    def restore(cls, value):
+        '''
+        Create a field from a value that has already been validated.
+        This method is used to materialize fields from the compact record storage and from pickles.
+
+        Args:
+            value: The validated value of the field.
+        Returns:
+            Field: The field with the given value.
+        '''
+        field = cls.__new__(cls)
+        Field.__init__(field, value)
+        return field
+
     @property
     def value(self):
         return self.__value
@@ -19,6 +132,18 @@ class Field:
     def value(self, value):
         self.__value = value
 
+    def __reduce__(self):
+        return (self.__class__.restore, (self.value,))
+
+    def __setstate__(self, state):
+        '''
+        Restore the value of a field pickled before fields used __slots__.
+
+        Args:
+            state (dict): The __dict__ of the pickled field.
+        '''
+        self.__value = state["_Field__value"]
+
     def __str__(self):
         return str(self.value)
 
@@ -29,6 +154,8 @@ class Name(Field):
     '''
     Class for names with validation.
     '''
+    __slots__ = ()
+
     def __init__(self, value):
         self.__validate_item(value)
         super().__init__(value.title())
@@ -45,20 +172,16 @@ class Name(Field):
         Raises:
             exceptions.ValidationError: If the name does not meet the validation criteria.      
         ''' 
-        # check if name is a string
-        if not isinstance(name, str):
-            raise exceptions.ValidationError(f"Validation of name '{name}' failed. Expected type str.")
-        # check if name is not empty and has at least 2 characters
-        if len(name.strip())< 2:
-            raise exceptions.ValidationError(f"Validation of name '{name}' failed. Name must be at least 2 characters long." )
-        # check if name contains only letters, spaces, and hyphens
-        if not all(char.isalpha() or char.isspace() or char == '-' for char in name):
-             raise exceptions.ValidationError(f"Validation of name '{name}' failed. Name can only contain letters, spaces, and hyphens.")
+        error = name_error(name)
+        if error:
+            raise exceptions.ValidationError(error)
 
 class Phone(Field):
     '''
     Class for phone numbers with validation.
     '''
+    __slots__ = ()
+
     def __init__(self, value):
         self.__validate_item(value)
         super().__init__(value)
@@ -75,22 +198,20 @@ class Phone(Field):
         Raises:
             exceptions.ValidationError: If the phone number does not meet the validation criteria.
         '''
-        if not isinstance(phone, str):
-            raise exceptions.ValidationError(f"Validation of phone '{phone}' failed. Expected type str")
-        # check phone format
-        match = re.match(r"^\+380\d{9}$", phone) 
-        if not match:
-            raise exceptions.ValidationError(f"Validation of phone '{phone}' failed. Ukrainian mobile number must be in +380XXXXXXXXX")
+        error = phone_error(phone)
+        if error:
+            raise exceptions.ValidationError(error)
 
 class Birthday(Field):
     '''
     Class for birthdays with validation and save as a date object.
     '''
+    __slots__ = ()
+
     def __init__(self, value):
-        self.__validate_item(value)
-        super().__init__(datetime.strptime(value, "%d.%m.%Y"))
+        super().__init__(self.__validate_item(value))
 
-    def __validate_item(self, birthday: str):
+    def __validate_item(self, birthday: str) -> datetime:
         '''
         Validate the birthday field.
         This method checks if the birthday is a string in the format DD.MM.YYYY,
@@ -99,6 +220,8 @@ class Birthday(Field):
 
         Args:
             value (str): The birthday to validate.
+        Returns:
+            datetime: The parsed birthday, so the date is parsed only once.
         Raises:
             exceptions.ValidationError: If the birthday does not meet the validation criteria.
         '''
@@ -110,6 +233,7 @@ class Birthday(Field):
             raise exceptions.ValidationError("Invalid date format. Use DD.MM.YYYY")
         if parse_date > datetime.now():
             raise exceptions.ValidationError("Birthday cannot be in the future.")
+        return parse_date
 
     def __str__(self):
         return self.value.strftime("%d.%m.%Y")
@@ -121,6 +245,8 @@ class Email(Field):
     '''
     Class for email addresses with validation.
     '''
+    __slots__ = ()
+
     def __init__(self, value: str):
         self.__validate_item(value)
         super().__init__(value)
@@ -136,17 +262,17 @@ class Email(Field):
         Raises:
             exceptions.ValidationError: If the email address does not meet the validation criteria.
         '''
-        if not isinstance(email, str):
-            raise exceptions.ValidationError(f"Validation of email '{email}' failed. Expected type str")
-        match = re.match(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$", email)
-        if not match:
-            raise exceptions.ValidationError(f"Validation of email '{email}' failed. Invalid email format")
+        error = email_error(email)
+        if error:
+            raise exceptions.ValidationError(error)
 
 class Address(Field):
     '''
     Class for addresses with validation.
     This class validates the address format and ensures it is a string of appropriate length.
     '''
+    __slots__ = ()
+
     def __init__(self, value: str):
         self.__validate_item(value)
         super().__init__(value.title())
@@ -161,22 +287,140 @@ class Address(Field):
         Raises:
             exceptions.ValidationError: If the address does not meet the validation criteria.
         '''
-        if not isinstance(address, str):
-            raise exceptions.ValidationError(f"Validation of address '{address}' failed. Expected type str.")
-        if len(address.strip()) < 5 or len(address.strip()) > 100:
-            raise exceptions.ValidationError(f"Validation of address '{address}' failed. Address must be between 5 and 100 characters long.")
+        error = address_error(address)
+        if error:
+            raise exceptions.ValidationError(error)
 
 class Record:
     '''
     Class for a contact record in the address book.
+    The record uses __slots__ and a compact storage: phones are kept as a tuple of interned strings
+    and the birthday as a date ordinal. The phones and birthday properties materialize
+    Phone and Birthday fields on access.
+    The mutable fields are properties: every assignment that changes a value notifies the owning
+    address book with the field name and the old and new values, so the book and its listeners
+    update only what the change touches.
     '''
+    __slots__ = ('name', '__address', '__email', '__phones', '__birthday', '__book')
+
     def __init__(self, name: str):
+        self.__book = None
         self.name = Name(name)
-        self.phones = []
-        self.address = None
-        self.email = None
-        self.birthday = None
-    
+        self.__phones = ()
+        self.__address = None
+        self.__email = None
+        self.__birthday = None
+
+    @classmethod
+    def restore(cls, state: dict) -> "Record":
+        '''
+        Create a record from field values that have already been validated.
+        This method is used to materialize records from compact storages.
+
+        Args:
+            state (dict): The values of the fields: 'name', 'phones', 'address', 'email'
+                          and 'birthday' as a date ordinal.
+        Returns:
+            Record: The record with the given values.
+        '''
+        record = cls.__new__(cls)
+        record.__setstate__(state)
+        return record
+
+    @property
+    def phones(self) -> list[Phone]:
+        '''
+        The phone numbers of the contact as a list of Phone fields.
+        '''
+        return [Phone.restore(phone) for phone in self.__phones]
+
+    @phones.setter
+    def phones(self, phones) -> None:
+        old_phones = self.__phones
+        self.__phones = tuple(sys.intern(str(phone)) for phone in phones)
+        for phone in old_phones:
+            if phone not in self.__phones:
+                self.__notify("phone", phone, None)
+        for phone in self.__phones:
+            if phone not in old_phones:
+                self.__notify("phone", None, phone)
+
+    @property
+    def phone_values(self) -> tuple[str, ...]:
+        '''
+        The phone numbers of the contact as a tuple of strings.
+        '''
+        return self.__phones
+
+    @property
+    def birthday(self) -> Birthday | None:
+        '''
+        The birthday of the contact as a Birthday field, None if it is not set.
+        '''
+        if self.__birthday is None:
+            return None
+        return Birthday.restore(datetime.fromordinal(self.__birthday))
+
+    @birthday.setter
+    def birthday(self, birthday: Birthday | None) -> None:
+        old_value = self.birthday.value if self.__birthday is not None else None
+        self.__birthday = birthday.value.toordinal() if birthday is not None else None
+        new_value = self.birthday.value if self.__birthday is not None else None
+        if old_value != new_value:
+            self.__notify("birthday", old_value, new_value)
+
+    @property
+    def address(self) -> Address | None:
+        '''
+        The address of the contact, None if it is not set.
+        '''
+        return self.__address
+
+    @address.setter
+    def address(self, address: Address | None) -> None:
+        old_value = self.__address.value if self.__address is not None else None
+        self.__address = address
+        new_value = address.value if address is not None else None
+        if old_value != new_value:
+            self.__notify("address", old_value, new_value)
+
+    @property
+    def email(self) -> Email | None:
+        '''
+        The email of the contact, None if it is not set.
+        '''
+        return self.__email
+
+    @email.setter
+    def email(self, email: Email | None) -> None:
+        old_value = self.__email.value if self.__email is not None else None
+        self.__email = email
+        new_value = email.value if email is not None else None
+        if old_value != new_value:
+            self.__notify("email", old_value, new_value)
+
+    def attach(self, book) -> None:
+        '''
+        Attach the record to the address book that owns it.
+        The address book is notified about every change of the record's indexed fields.
+
+        Args:
+            book (AddressBook | None): The owning address book, None to detach the record.
+        '''
+        self.__book = book
+
+    def __notify(self, field: str, old_value, new_value) -> None:
+        '''
+        Notify the owning address book that a field of the record has changed.
+
+        Args:
+            field (str): The name of the changed field.
+            old_value: The previous value, None if the value was added.
+            new_value: The new value, None if the value was removed.
+        '''
+        if self.__book is not None:
+            self.__book.on_record_changed(self, field, old_value, new_value)
+
     def add_phone(self, phone: str) -> bool:
         '''
         Add a phone number to the contact.
@@ -188,7 +432,8 @@ class Record:
             bool: True if the phone number was added, False if it was already present.
         '''
         if not self.__is_phone_added(phone):
-            self.phones.append(Phone(phone))
+            self.__phones += (sys.intern(Phone(phone).value),)
+            self.__notify("phone", None, phone)
             return True
         return False
 
@@ -208,7 +453,11 @@ class Record:
 
         index = self.__find_idx_by_phone(old_phone)
         if index is not None:
-            self.phones[index] = Phone(new_phone)
+            old_value = self.__phones[index]
+            phones = list(self.__phones)
+            phones[index] = sys.intern(Phone(new_phone).value)
+            self.__phones = tuple(phones)
+            self.__notify("phone", old_value, new_phone)
             return True
         return False
     
@@ -222,9 +471,11 @@ class Record:
         Returns:
             bool: True if the phone number was removed, False if it was not found.
         '''
-        phone_remove = self.find_phone(phone)
-        if phone_remove:
-            self.phones.remove(phone_remove)
+        index = self.__find_idx_by_phone(phone)
+        if index is not None:
+            old_value = self.__phones[index]
+            self.__phones = self.__phones[:index] + self.__phones[index + 1:]
+            self.__notify("phone", old_value, None)
             return True
         return False
         
@@ -240,7 +491,7 @@ class Record:
         '''
         index = self.__find_idx_by_phone(phone)
         if index is not None:
-            return self.phones[index]   
+            return Phone.restore(self.__phones[index])
         return None
 
     def change_address(self, address: str) -> None:
@@ -307,7 +558,7 @@ class Record:
         Returns:
             bool: True if the birthday was removed, False if it was not found.
         '''
-        if self.birthday is not None:
+        if self.__birthday is not None:
             self.birthday = None
             return True
         return False
@@ -315,36 +566,68 @@ class Record:
     def __is_phone_added(self, phone: str)-> bool:
         '''
         Check if a phone number is already added to the contact.
-        This method iterates through the contact's phone list to see if the phone number exists.
+        This method checks the contact's phone tuple to see if the phone number exists.
 
         Args:
             phone (str): The phone number to check.
         Returns:
             bool: True if the phone number is found, False otherwise.
         '''
-        for phone_item in self.phones:
-            if phone_item.value == phone:
-                return True
-        return False
+        return phone in self.__phones
 
     def __find_idx_by_phone(self, phone: str) -> int | None:
         '''
         Find the index of a phone number in the contact's phone list.
-        This method uses a regular expression to match the phone number against the contact's phone list.
+        This method matches the phone number pattern against the contact's phone list.
 
         Args:
-            phone (str): The phone number to find.
+            phone (str): The phone number to find, may contain '%' and '_' wildcards.
         Returns:
             int | None: The index of the phone number if found, None if not found.
         '''
-        for index, phone_item in enumerate(self.phones):
-            regex = '^' + re.escape(phone).replace('%', '.*').replace('_', '.') + '$'
-            if bool(re.match(regex, phone_item.value)):
+        matches = compile_pattern(phone)
+        for index, phone_item in enumerate(self.__phones):
+            if matches(phone_item):
                 return index
         return None
 
+    def to_dict(self) -> dict:
+        '''
+        Get the fields of the contact for display.
+
+        Returns:
+            dict: The fields of the contact keyed by their names.
+        '''
+        return {"name": self.name, "phones": self.phones, "address": self.address,
+                "email": self.email, "birthday": self.birthday}
+
+    def __getstate__(self):
+        '''
+        Get the state of the record for pickling.
+        Fields are stored as plain values. The reference to the owning address book is not stored,
+        it is restored when the book is loaded.
+        '''
+        return {"name": self.name.value,
+                "phones": self.__phones,
+                "address": self.__address.value if self.__address else None,
+                "email": self.__email.value if self.__email else None,
+                "birthday": self.__birthday}
+
+    def __setstate__(self, state):
+        '''
+        Restore the state of the record from a pickle.
+        Records pickled before the compact layout store Field objects, which are converted on load.
+        '''
+        name, address, email, birthday = (state.get(key) for key in ("name", "address", "email", "birthday"))
+        self.__book = None
+        self.name = name if isinstance(name, Name) else Name.restore(name)
+        self.__phones = tuple(sys.intern(str(phone)) for phone in state.get("phones", ()))
+        self.__address = Address.restore(address) if isinstance(address, str) else address
+        self.__email = Email.restore(email) if isinstance(email, str) else email
+        self.__birthday = birthday.value.toordinal() if isinstance(birthday, Birthday) else birthday
+
     def __str__(self):
-        ph = ", ".join(p.value for p in self.phones) or "N/A"
+        ph = ", ".join(self.__phones) or "N/A"
         em = self.email or "N/A"
         ad = self.address or "N/A"
         bd = self.birthday or "N/A"
@@ -358,22 +641,89 @@ class AddressBook(UserDict):
     Address Book to store and manage contacts.
     This class inherits from UserDict and provides methods to add, find, remove contacts,
     retrieve all contacts, and get upcoming birthdays.
-    It also includes a method to search for records based on various fields using a pattern matching approach
+    It also includes a method to search for records based on various fields using a pattern matching approach.
+    Phones and lowercased emails are indexed, so exact-match lookups by these fields do not scan the book.
+    Emails are also grouped by their domain, so domain queries and per-domain counts do not scan the book.
+    Birthdays are bucketed by (month, day), so birthday queries only visit the days they ask about.
+    Names are kept in a sorted index that answers prefix queries and name completion.
+    A trigram index of the names answers typo-tolerant queries; it is built on the first fuzzy search.
+    A suffix array of the phone digits answers partial phone queries such as '%4477';
+    it is built on the first such query.
+    Every change of the book or of its records increments the generation counter; search results
+    are cached together with the generation and served only while it is unchanged.
+    Listeners registered with add_listener are notified about every added, removed or changed record
+    after the book has updated its own indexes, see listeners.ListenerRegistry.
+    The dictionary methods that add or remove records (item assignment, del, pop, popitem, setdefault,
+    update, |=, clear) go through add_record and remove; copy copies the records into a new book.
     '''
     def __init__(self,):
         super().__init__()
+        self.__name_index = SortedIndex()
+        self.__fuzzy_index = None
+        self.__phone_index = HashIndex()
+        self.__phone_suffix_index = None
+        self.__email_index = HashIndex()
+        self.__domain_index = HashIndex()
+        self.__birthday_index = HashIndex()
+        self.__generation = 0
+        self.__query_cache = QueryCache()
+        self.__listeners = ListenerRegistry()
+
+    @property
+    def generation(self) -> int:
+        '''
+        The number of changes made to the address book and its records.
+        '''
+        return self.__generation
+
+    def add_listener(self, listener) -> None:
+        '''
+        Register a function notified about every added, removed or changed record.
+
+        Args:
+            listener (callable): The function called as listener(record, field, old_value, new_value);
+                field is None when a whole record is added or removed.
+        '''
+        self.__listeners.add(listener)
+
+    def remove_listener(self, listener) -> None:
+        '''
+        Unregister a function registered with add_listener.
+
+        Args:
+            listener (callable): The registered function.
+        '''
+        self.__listeners.discard(listener)
 
     def get_all_contacts(self) -> list[Record]:
         '''
         Get all contacts in the address book.
-        This method retrieves all contacts stored in the address book.
+        This method retrieves all contacts stored in the address book sorted by name.
+        The order is taken from the name index, so the contacts are not sorted on every call.
 
         Args:
             self: AddressBook instance.
         Returns:
             list: A list of all contacts in the address book.
         '''
-        return [contact for _, contact in sorted(self.data.items(), key=lambda x: x[0].lower())]
+        return [self.data[name_key] for name_key in self.__name_index]
+
+    def iter_contacts(self, offset: int = 0, limit: int | None = None) -> Iterator[Record]:
+        '''
+        Iterate over the contacts sorted by name, one page at a time.
+        Only the requested page is read from the name index, so listing a large book
+        does not build the whole list of contacts.
+
+        Args:
+            self: AddressBook instance.
+            offset (int): The number of contacts to skip. Defaults to 0.
+            limit (int | None): The maximum number of contacts to return, all remaining if None.
+        Returns:
+            Iterator: The contacts of the requested page.
+        '''
+        end = None if limit is None else offset + limit
+        for name_key in self.__name_index[offset:end]:
+            yield self.data[name_key]
 
     def add_record(self, record: Record) -> None:
         '''
@@ -387,7 +737,43 @@ class AddressBook(UserDict):
         Returns:
             None
         '''
-        self.data.update({record.name.value.lower(): record})
+        name_key = record.name.value.lower()
+        previous = self.data.get(name_key)
+        if previous is not None and previous is not record:
+            self.__unindex_record(previous)
+        self.data.update({name_key: record})
+        self.__generation += 1
+        self.__name_index.add(name_key)
+        if self.__fuzzy_index is not None:
+            self.__fuzzy_index.add(name_key)
+        self.__index_record(record)
+
+    def import_records(self, records) -> int:
+        '''
+        Add a batch of records to the address book.
+        The name index is updated once for the whole batch instead of once per record.
+        If a record already exists (based on the name), it is replaced by the imported one.
+
+        Args:
+            self: AddressBook instance.
+            records (Iterable[Record]): The records to add.
+        Returns:
+            int: The number of added records.
+        '''
+        name_keys = []
+        for record in records:
+            name_key = record.name.value.lower()
+            previous = self.data.get(name_key)
+            if previous is not None and previous is not record:
+                self.__unindex_record(previous)
+            self.data[name_key] = record
+            self.__index_record(record)
+            name_keys.append(name_key)
+        self.__generation += 1
+        self.__name_index.update(name_keys)
+        if self.__fuzzy_index is not None:
+            self.__fuzzy_index.update(name_keys)
+        return len(name_keys)
 
     def find(self, name: str) -> Record | None:
         ''' 
@@ -415,13 +801,277 @@ class AddressBook(UserDict):
         Returns:
             bool: True if the record was removed, False if it was not found.
         '''
-        return self.data.pop(name.lower(), None) is not None
+        record = self.data.pop(name.lower(), None)
+        if record is None:
+            return False
+        self.__generation += 1
+        self.__name_index.discard(name.lower())
+        if self.__fuzzy_index is not None:
+            self.__fuzzy_index.discard(name.lower())
+        self.__unindex_record(record)
+        return True
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        '''
+        Add a record under its name, see add_record.
+
+        Raises:
+            KeyError: If the name is not the name of the record.
+        '''
+        if name.lower() != record.name.value.lower():
+            raise KeyError(f"Record {record.name.value} cannot be stored under the name {name}")
+        self.add_record(record)
+
+    def __delitem__(self, name: str) -> None:
+        '''
+        Remove the record with the name, see remove.
+
+        Raises:
+            KeyError: If the address book has no record with the name.
+        '''
+        if not self.remove(name):
+            raise KeyError(name)
+
+    def __ior__(self, records):
+        self.update(records)
+        return self
+
+    def __or__(self, other):
+        '''
+        Not supported, a record belongs to one address book; use copy and update.
+
+        Raises:
+            TypeError: Always.
+        '''
+        raise TypeError("Address books cannot be merged into a new one, a record belongs to one address book; "
+                        "use copy and update")
+
+    __ror__ = __or__
+
+    def clear(self) -> None:
+        '''
+        Remove all records from the address book, see remove.
+        '''
+        for name_key in list(self.data):
+            self.remove(name_key)
+
+    def copy(self) -> "AddressBook":
+        '''
+        Get a copy of the address book, see __copy__.
+        '''
+        return self.__copy__()
+
+    def __copy__(self) -> "AddressBook":
+        '''
+        Get a copy of the address book with copies of its records.
+        A record is attached to the one address book that indexes it, so the records are copied
+        and the copy builds its own indexes; changes of either book do not affect the other.
+        '''
+        book = AddressBook()
+        book.import_records(Record.restore(record.__getstate__()) for record in self.data.values())
+        return book
+
+    def complete_names(self, prefix: str, limit: int = 20) -> list[str]:
+        '''
+        Get the names of the contacts that start with the prefix.
+        This method uses the sorted name index and does not scan the address book.
+
+        Args:
+            self: AddressBook instance.
+            prefix (str): The beginning of the name, case insensitive.
+            limit (int): The maximum number of names to return. Defaults to 20.
+        Returns:
+            list: The names of the matching contacts in alphabetical order.
+        '''
+        return [self.data[key].name.value for key in self.__name_index.with_prefix(prefix.lower(), limit)]
+
+    def find_fuzzy(self, name: str, limit: int = FUZZY_LIMIT, max_distance: int | None = None) -> list[Record]:
+        '''
+        Find the contacts whose names are closest to the given name by edit distance.
+        This method tolerates typos ("Olexandr" finds "Oleksandr") and uses the trigram index of the names,
+        so the distance is only computed for the names sharing enough trigrams with the query.
+
+        Args:
+            self: AddressBook instance.
+            name (str): The name with possible typos, case insensitive.
+            limit (int): The maximum number of contacts to return. Defaults to 10.
+            max_distance (int | None): The largest tolerated number of typos, depends on the name length if None.
+        Returns:
+            list: The closest contacts, closest first.
+        '''
+        if self.__fuzzy_index is None:
+            self.__fuzzy_index = TrigramIndex(self.__name_index)
+        return [self.data[name_key] for name_key, _ in self.__fuzzy_index.search(name.lower(), limit, max_distance)]
+
+    def find_by_domain(self, domain: str) -> list[Record]:
+        '''
+        Find the contacts with an email at the given domain.
+
+        Args:
+            self: AddressBook instance.
+            domain (str): The email domain, e.g. 'company.ua', case insensitive.
+        Returns:
+            list: The contacts with an email at the domain.
+        '''
+        return self.__domain_index.get(domain.lower().lstrip('@'))
+
+    def get_domain_counts(self) -> dict[str, int]:
+        '''
+        Count the contacts per email domain.
+        The counts are taken from the domain index, so the time depends on the number of domains only.
+
+        Args:
+            self: AddressBook instance.
+        Returns:
+            dict: The number of contacts keyed by domain, the largest domains first.
+        '''
+        counts = self.__domain_index.counts()
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def find_phone_matches(self, pattern: str) -> list[tuple[Record, str]]:
+        '''
+        Find the contacts with a phone matching a partial phone pattern.
+        This method is meant for queries by a part of the number, such as '%4477' (the last digits)
+        or '%447%' (digits anywhere in the number). The candidates are taken from the suffix array
+        of the phone digits, so the phones of the whole book are not scanned.
+
+        Args:
+            self: AddressBook instance.
+            pattern (str): The phone pattern, may contain '%' and '_' wildcards.
+        Returns:
+            list: (record, phone) tuples with the phone that matched the pattern.
+        '''
+        phones = self.__phone_suffixes().search(pattern)
+        if phones is None:
+            # The pattern has no digits to search by
+            matches = compile_pattern(pattern)
+            phones = [phone for phone in self.__phone_index if matches(phone)]
+        return [(record, phone) for phone in phones for record in self.__phone_index.get(phone)]
+
+    def __phone_suffixes(self) -> PhoneSuffixIndex:
+        '''
+        Get the suffix array of the phones, building it on the first use.
+        '''
+        if self.__phone_suffix_index is None:
+            self.__phone_suffix_index = PhoneSuffixIndex(self.__phone_index)
+        return self.__phone_suffix_index
+
+    def on_record_changed(self, record: Record, field: str, old_value, new_value) -> None:
+        '''
+        Keep the secondary indexes in sync with a changed record and notify the listeners.
+        This method is called by records attached to the address book.
+
+        Args:
+            self: AddressBook instance.
+            record (Record): The changed record.
+            field (str): The name of the changed field ('phone', 'email', 'address' or 'birthday').
+            old_value (str | datetime | None): The previous value, None if the value was added.
+            new_value (str | datetime | None): The new value, None if the value was removed.
+        '''
+        self.__generation += 1
+        self.__reindex_field(record, field, old_value, new_value)
+        self.__listeners.notify(record, field, old_value, new_value)
+
+    def __reindex_field(self, record: Record, field: str, old_value, new_value) -> None:
+        '''
+        Move a changed record between the buckets of the index of the changed field.
+
+        Args:
+            self: AddressBook instance.
+            record (Record): The changed record.
+            field (str): The name of the changed field.
+            old_value (str | datetime | None): The previous value, None if the value was added.
+            new_value (str | datetime | None): The new value, None if the value was removed.
+        '''
+        name_key = record.name.value.lower()
+        match field:
+            case "phone":
+                if old_value is not None:
+                    self.__discard_phone(old_value, name_key)
+                if new_value is not None:
+                    self.__add_phone(new_value, name_key, record)
+                return
+            case "email":
+                if old_value is not None:
+                    self.__domain_index.discard(email_domain(old_value), name_key)
+                if new_value is not None:
+                    self.__domain_index.add(email_domain(new_value), name_key, record)
+                index = self.__email_index
+                old_value = old_value.lower() if old_value else None
+                new_value = new_value.lower() if new_value else None
+            case "birthday":
+                index = self.__birthday_index
+                old_value = (old_value.month, old_value.day) if old_value else None
+                new_value = (new_value.month, new_value.day) if new_value else None
+            case _:
+                return
+        if old_value is not None:
+            index.discard(old_value, name_key)
+        if new_value is not None:
+            index.add(new_value, name_key, record)
+
+    def __index_record(self, record: Record) -> None:
+        '''
+        Add the record to the secondary indexes, attach it to the address book and notify the listeners.
+
+        Args:
+            self: AddressBook instance.
+            record (Record): The record to index.
+        '''
+        name_key = record.name.value.lower()
+        for phone in record.phone_values:
+            self.__add_phone(phone, name_key, record)
+        if record.email:
+            self.__email_index.add(record.email.value.lower(), name_key, record)
+            self.__domain_index.add(email_domain(record.email.value), name_key, record)
+        if record.birthday:
+            birthday = record.birthday.value
+            self.__birthday_index.add((birthday.month, birthday.day), name_key, record)
+        record.attach(self)
+        self.__listeners.notify(record, None, None, record)
+
+    def __unindex_record(self, record: Record) -> None:
+        '''
+        Remove the record from the secondary indexes, detach it from the address book and notify the listeners.
+
+        Args:
+            self: AddressBook instance.
+            record (Record): The record to remove from the indexes.
+        '''
+        name_key = record.name.value.lower()
+        for phone in record.phone_values:
+            self.__discard_phone(phone, name_key)
+        if record.email:
+            self.__email_index.discard(record.email.value.lower(), name_key)
+            self.__domain_index.discard(email_domain(record.email.value), name_key)
+        if record.birthday:
+            birthday = record.birthday.value
+            self.__birthday_index.discard((birthday.month, birthday.day), name_key)
+        record.attach(None)
+        self.__listeners.notify(record, None, record, None)
+
+    def __add_phone(self, phone: str, name_key: str, record: Record) -> None:
+        '''
+        Add a phone of the record to the phone indexes.
+        '''
+        self.__phone_index.add(phone, name_key, record)
+        if self.__phone_suffix_index is not None:
+            self.__phone_suffix_index.add(phone)
+
+    def __discard_phone(self, phone: str, name_key: str) -> None:
+        '''
+        Remove a phone of the record from the phone indexes.
+        The suffix array keeps the phone while other records share it.
+        '''
+        self.__phone_index.discard(phone, name_key)
+        if self.__phone_suffix_index is not None and phone not in self.__phone_index:
+            self.__phone_suffix_index.discard(phone)
 
     def get_upcoming_birthdays(self, days: int = 7) -> dict[str, str]:
         '''
         Get a list of upcoming birthdays within a certain number of days.
-        This method checks each record's birthday and calculates the next occurrence of the birthday.
-        If the birthday is today or within the specified number of days, it adds it to the congratulation dictionary.
+        This method walks the days of the period and takes the records born on each day from the birthday index,
+        so only the buckets of the requested days are visited. Birthdays on Feb 29th fall on March 1st in non-leap years.
         If the birthday falls on a weekend, it adjusts the congratulation date to the next Monday.
 
         Args:
@@ -431,91 +1081,208 @@ class AddressBook(UserDict):
             dict: A dictionary with names as keys and the date of the congratulation as values.
         '''
         congratulation_dct = {}
-        records = filter(lambda rec: rec.birthday != None, self.data.values())
         today_date = datetime.today().date()
 
-        for record in records:
-            birthday_value_date = record.birthday.value.date()
-            try:
-                birthday_this_year = birthday_value_date.replace(year=today_date.year)
-            except ValueError:
-                # This happens if birthday_date_original is Feb 29th and today_date.year is not a leap year.
-                # In this case, we move the birthday to March 1st of the current year.
-                birthday_this_year = datetime(today_date.year, 3, 1).date()
-
-            if birthday_this_year < today_date:
-                try:
-                    next_birthday = birthday_value_date.replace(year=today_date.year + 1)
-                except ValueError:
-                    next_birthday = datetime(today_date.year + 1, 3, 1).date()
-            else:
-                next_birthday = birthday_this_year
-
-            days_to_birthday = (next_birthday - today_date).days
-
-            if 0 <= days_to_birthday <= days:
-                congratulation_day = next_birthday
-                if next_birthday.weekday() >= 5:
-                    days_to_add = 7 - next_birthday.weekday()
-                    congratulation_day = next_birthday + timedelta(days=days_to_add)
-                congratulation_dct.update({record.name.value: datetime.strftime(congratulation_day, "%d.%m.%Y")})
+        # The next occurrence of any birthday is at most a year ahead
+        for offset in range(min(days, 366) + 1):
+            day = today_date + timedelta(days=offset)
+            buckets = [(day.month, day.day)]
+            if day.month == 3 and day.day == 1 and not calendar.isleap(day.year):
+                # Birthdays on Feb 29th are celebrated on March 1st in non-leap years
+                buckets.append((2, 29))
+
+            congratulation_day = day
+            if day.weekday() >= 5:
+                days_to_add = 7 - day.weekday()
+                congratulation_day = day + timedelta(days=days_to_add)
+
+            for bucket in buckets:
+                for record in self.__birthday_index.get(bucket):
+                    # Only the nearest occurrence of the birthday is reported
+                    if record.name.value not in congratulation_dct:
+                        congratulation_dct.update({record.name.value: datetime.strftime(congratulation_day, "%d.%m.%Y")})
 
         return congratulation_dct
 
-    def find_records(self, query: str, field_type: str) -> list[Record]:
+    def find_records(self, query: str | dict[str, str], field_type: str | None = None, mode: str = "and") -> list[Record]:
         """
         New method for searching records by various fields.
-        This method allows searching for records based on a query string and a specified field type.
+        This method allows searching for records based on a query string and a specified field type,
+        or on several criteria given as a dictionary {field_type: query} and combined with AND or OR.
         The field_type can be one of the following: 'name', 'phone', 'email', 'address', 'birthday'.
         The search is performed using a pattern matching approach, where the query can contain wildcards:
         - '%' matches any sequence of characters
         - '_' matches any single character
+        The 'name~' field type searches for the names closest to the query, tolerating typos (see find_fuzzy).
+        The criteria are executed by a query plan that starts from the most selective index, see plan_query.
+        Results are cached until the next change of the address book.
 
         Arg:
             self: AddressBook instance.
-            query: string for search.
-            field_type: type field ('name', 'phone', 'email', 'address', 'birthday').
+            query: string for search, or a dictionary of criteria.
+            field_type: type field ('name', 'name~', 'phone', 'email', 'address', 'birthday'), when query is a string.
+            mode: 'and' if all criteria must match, 'or' if any criterion must match. Defaults to 'and'.
         Return: 
             list of Record
         """
-        def like(pattern: str, text: str) -> bool:
-            regex = '^' + re.escape(pattern).replace('%', '.*').replace('_', '.') + '$'
-            return re.match(regex, text) is not None
+        criteria = query if isinstance(query, dict) else {field_type: query}
+        key = (tuple(criteria.items()), mode)
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            result = self.plan_query(criteria, mode).execute()
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def query_cache_stats(self) -> dict[str, int]:
+        '''
+        Get the statistics of the search result cache.
 
-        matching_records = [] # Initialize an empty list to store matching records
-        search_value = query.lower() # lowercase 
+        Args:
+            self: AddressBook instance.
+        Returns:
+            dict: Cache hits, misses, current size and maximum size.
+        '''
+        return self.__query_cache.stats()
 
-        if field_type not in ['name', 'phone', 'email', 'address', 'birthday']:
-           return matching_records # If field_type is not valid, return empty list
+    def plan_query(self, criteria: dict[str, str], mode: str = "and") -> QueryPlan:
+        '''
+        Build the execution plan of a multi-criteria search.
+        Every criterion gets the best available access path: the phone or email hash index for exact values,
+        the phone suffix index for phones with a run of digits, the domain index for emails ending in '@domain',
+        the name index for names with a literal prefix, the trigram index for fuzzy names,
+        the birthday index for dates, a full scan otherwise.
+        Criteria for unknown fields are ignored.
 
-        for record in self.data.values():
-            field_value = None
-
-            if field_type == 'name' and record.name:
-                field_value = record.name.value
-            elif field_type == 'email' and record.email:
-                field_value = record.email.value
-            elif field_type == 'address' and record.address:
-                field_value = record.address.value
-            elif field_type == 'birthday' and record.birthday:
+        Args:
+            self: AddressBook instance.
+            criteria (dict): The searched values or patterns keyed by field type.
+            mode (str): 'and' if all criteria must match, 'or' if any criterion must match. Defaults to 'and'.
+        Returns:
+            QueryPlan: The plan, which can be executed or described.
+        Raises:
+            exceptions.InputError: If the mode is unknown or a birthday is not a valid date.
+        '''
+        if mode not in ("and", "or"):
+            raise exceptions.InputError(f"Invalid search mode '{mode}'. Use 'and' or 'or'")
+        steps = [self.__plan_step(field_type, query) for field_type, query in criteria.items()
+                 if field_type in SEARCH_FIELDS and query]
+        return QueryPlan(mode, steps, self.data.values)
+
+    def __plan_step(self, field_type: str, query: str) -> PlanStep:
+        '''
+        Choose the access path for a single criterion.
+
+        Args:
+            self: AddressBook instance.
+            field_type (str): The searched field.
+            query (str): The searched value or pattern.
+        Returns:
+            PlanStep: The criterion with its access path, estimate and predicate.
+        '''
+        search_value = query.lower()
+        is_exact = not has_wildcards(query)
+        matches = compile_pattern(search_value)
+
+        match field_type:
+            case 'name':
+                predicate = lambda record: matches(record.name.value.lower())
+                # Only the names starting with the literal prefix of the pattern can match
+                prefix = literal_prefix(search_value)
+                if prefix:
+                    return PlanStep(field_type, query, "name prefix index", self.__name_index.count_prefix(prefix),
+                                    lambda: [self.data[name_key] for name_key in self.__name_index.with_prefix(prefix)
+                                             if matches(name_key)],
+                                    predicate)
+            case 'name~':
+                # The closest names are taken from the trigram index once; the records fetched by another
+                # criterion are checked against the same names, so both access paths find the same contacts
+                closest = self.find_fuzzy(query)
+                name_keys = {record.name.value.lower() for record in closest}
+                predicate = lambda record: record.name.value.lower() in name_keys
+                return PlanStep(field_type, query, "name trigram index", len(closest), lambda: closest, predicate)
+            case 'phone':
+                # Phones are compared as they are, without lowercasing
+                matches = compile_pattern(query)
+                predicate = lambda record: any(matches(phone) for phone in record.phone_values)
+                if is_exact:
+                    return PlanStep(field_type, query, "phone hash index", self.__phone_index.count(query),
+                                    lambda: self.__phone_index.get(query), predicate)
+                estimate = self.__phone_suffixes().estimate(query)
+                if estimate is not None:
+                    return PlanStep(field_type, query, "phone suffix index", estimate,
+                                    lambda: list({id(record): record
+                                                  for record, _ in self.find_phone_matches(query)}.values()),
+                                    predicate)
+            case 'email':
+                predicate = lambda record: record.email is not None and matches(record.email.value.lower())
+                if is_exact:
+                    return PlanStep(field_type, query, "email hash index", self.__email_index.count(search_value),
+                                    lambda: self.__email_index.get(search_value), predicate)
+                # An email has a single '@', so a pattern ending in '@' and a literal domain
+                # only matches the emails at that domain
+                local_part, at, domain = search_value.rpartition('@')
+                if at and domain and not has_wildcards(domain):
+                    return PlanStep(field_type, query, "email domain index", self.__domain_index.count(domain),
+                                    lambda: [record for record in self.__domain_index.get(domain) if predicate(record)],
+                                    predicate)
+            case 'address':
+                predicate = lambda record: record.address is not None and matches(record.address.value.lower())
+            case 'birthday':
                 try:
                     search_date = datetime.strptime(query, "%d.%m.%Y").date()
-                    if record.birthday.value.date() == search_date:
-                        matching_records.append(record)
-                    continue # Next record
                 except ValueError:
                     raise exceptions.InputError("Invalid birthday date format for search. Use DD.MM.YYYY")
-            elif field_type == 'phone':
-                # If field_type is 'phone', we use the find_phone method of Record
-                if record.find_phone(query):
-                    matching_records.append(record)
-                continue #  Next record
-
-            if field_value:
-                if like(search_value, field_value.lower()):
-                    matching_records.append(record)
-                    
-        return matching_records
+                predicate = lambda record: record.birthday is not None and record.birthday.value.date() == search_date
+                # Only the records born on the same day of the year can match
+                bucket = (search_date.month, search_date.day)
+                return PlanStep(field_type, query, "birthday index", self.__birthday_index.count(bucket),
+                                lambda: [record for record in self.__birthday_index.get(bucket) if predicate(record)],
+                                predicate)
+
+        return PlanStep(field_type, query, "full scan", len(self.data),
+                        lambda: [record for record in self.data.values() if predicate(record)], predicate)
+
+    def __getstate__(self):
+        '''
+        Get the state of the address book for pickling.
+        The secondary indexes are not stored, they are rebuilt when the book is loaded.
+        '''
+        return {"data": self.data}
+
+    def pickle_states(self) -> dict[int, dict]:
+        '''
+        Take the pickle states of the address book and its records, keyed by the ids of the objects.
+        The states share no mutable object with the address book, so they can be pickled by another
+        thread while the book changes (see file_serializer.SerializedObject.save_in_background).
+
+        Returns:
+            dict: The states of the address book and of every record.
+        '''
+        data = dict(self.data)
+        states = {id(record): record.__getstate__() for record in data.values()}
+        states[id(self)] = {"data": data}
+        return states
+
+    def __setstate__(self, state):
+        '''
+        Restore the state of the address book from a pickle and rebuild the secondary indexes.
+
+        Args:
+            state (dict): A dictionary containing the saved state of the address book.
+        '''
+        self.__dict__.update(state)
+        self.__name_index = SortedIndex(self.data.keys())
+        self.__fuzzy_index = None
+        self.__phone_index = HashIndex()
+        self.__phone_suffix_index = None
+        self.__email_index = HashIndex()
+        self.__domain_index = HashIndex()
+        self.__birthday_index = HashIndex()
+        self.__generation = 0
+        self.__query_cache = QueryCache()
+        self.__listeners = ListenerRegistry()
+        for record in self.data.values():
+            self.__index_record(record)
 
     def __str__(self):
         str = "Address book:\n"
@@ -0,0 +1,62 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Autosaver:
+    '''
+    Thread saving the modified collections at a fixed interval while the console bot runs.
+    Every storage is saved with save_in_background, which writes only modified collections
+    and holds the lock only while it takes a consistent copy; commands hold the lock while they run.
+
+    Attributes:
+        lock (threading.Lock): The lock held while a command changes the collections.
+    '''
+    def __init__(self, storages, interval: int):
+        '''
+        Prepare the autosave thread, it is started by start.
+
+        Args:
+            storages (list[BackgroundStorage]): The storages to save, the ones still loading are skipped.
+            interval (int): The number of seconds between two saves.
+        '''
+        self.lock = threading.Lock()
+        self.__storages = storages
+        self.__interval = interval
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, name="autosave", daemon=True)
+
+    def start(self) -> None:
+        '''
+        Start the autosave thread.
+        '''
+        self.__thread.start()
+
+    def stop(self) -> None:
+        '''
+        Stop the autosave thread, waiting for the save in progress.
+        '''
+        self.__stopped.set()
+        if self.__thread.is_alive():
+            self.__thread.join()
+
+    def save(self) -> None:
+        '''
+        Save the modified collections of the loaded storages.
+        Errors are logged, the collections are saved again at the next interval.
+        '''
+        for storage in self.__storages:
+            if not storage.is_loaded:
+                continue
+            try:
+                storage.storage.save_in_background(self.lock)
+            except Exception:
+                logger.exception("Autosave failed")
+
+    def __run(self) -> None:
+        '''
+        Save the collections every interval until the thread is stopped.
+        '''
+        while not self.__stopped.wait(self.__interval):
+            self.save()
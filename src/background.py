@@ -0,0 +1,67 @@
+import logging
+import time
+from concurrent.futures import Executor
+from console_output import ConsoleOutput
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundStorage:
+    '''
+    Storage of a collection opened on a background thread.
+    The storage is opened as soon as the object is created; the first access to the storage
+    or to its collection waits until it is open, showing a spinner. The time taken to open
+    every file is logged.
+    '''
+    def __init__(self, executor: Executor, open_storage, filename: str, default):
+        '''
+        Start opening a storage.
+
+        Args:
+            executor (Executor): The executor running the opening.
+            open_storage (callable): The function called as open_storage(filename, default), returns the storage.
+            filename (str): The name of the file the collection is stored in.
+            default (AddressBook | Notebook): The empty collection used when the file does not exist.
+        '''
+        self.__filename = filename
+        self.__future = executor.submit(self.__open, open_storage, filename, default)
+
+    def __open(self, open_storage, filename: str, default):
+        '''
+        Open the storage and log the time it took.
+        '''
+        start = time.perf_counter()
+        try:
+            storage = open_storage(filename, default)
+        except Exception:
+            logger.exception("Loading %s failed", filename)
+            raise
+        logger.info("Loaded %s in %.3f s", filename, time.perf_counter() - start)
+        return storage
+
+    @property
+    def is_loaded(self) -> bool:
+        '''
+        True if the storage has been opened successfully.
+        '''
+        return self.__future.done() and self.__future.exception() is None
+
+    @property
+    def storage(self):
+        '''
+        The opened storage, waiting with a spinner until it is open.
+
+        Raises:
+            Exception: The error raised while opening the storage.
+        '''
+        if not self.__future.done():
+            with ConsoleOutput().status(f"Loading {self.__filename}..."):
+                return self.__future.result()
+        return self.__future.result()
+
+    @property
+    def object(self):
+        '''
+        The collection of the opened storage, see storage.
+        '''
+        return self.storage.object
@@ -0,0 +1,682 @@
+from array import array
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+import calendar
+import os
+import exceptions
+from addressbook import SEARCH_FIELDS, Record, email_domain
+from indexes import SortedIndex
+from fuzzy_index import FUZZY_LIMIT, TrigramIndex
+from journal import JournaledObject
+from notebook import Notebook
+from query_cache import QueryCache
+from listeners import ListenerRegistry
+from wildcard import compile_pattern, has_wildcards, literal_prefix
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Compact the columns when more than this share of the rows is removed
+_DEAD_ROWS_RATIO = 0.5
+# Do not compact small books
+_MIN_COMPACT_ROWS = 1024
+# Suffix of the pickle of a columnar address book, replaces the extension of the address book pickle
+COLUMNAR_SUFFIX = ".columnar.pkl"
+
+
+class StringColumn:
+    '''
+    Column of optional strings stored in a single UTF-8 heap with offset and length tables.
+    Changed values are appended to the heap; the old bytes stay there until the column is rebuilt.
+    '''
+    def __init__(self):
+        self.__heap = bytearray()
+        self.__offsets = array('q')
+        self.__lengths = array('q')
+        self.__garbage = 0
+
+    def append(self, value: str | None) -> None:
+        '''
+        Add a value for a new row.
+
+        Args:
+            value (str | None): The value of the row.
+        '''
+        self.__offsets.append(-1)
+        self.__lengths.append(0)
+        self.set(len(self.__offsets) - 1, value)
+
+    def set(self, row: int, value: str | None) -> None:
+        '''
+        Set the value of a row.
+
+        Args:
+            row (int): The row number.
+            value (str | None): The new value of the row.
+        '''
+        if self.__offsets[row] >= 0:
+            self.__garbage += self.__lengths[row]
+        if value is None:
+            self.__offsets[row] = -1
+            self.__lengths[row] = 0
+            return
+        encoded = value.encode()
+        self.__offsets[row] = len(self.__heap)
+        self.__lengths[row] = len(encoded)
+        self.__heap += encoded
+
+    def get(self, row: int) -> str | None:
+        '''
+        Get the value of a row.
+
+        Args:
+            row (int): The row number.
+        Returns:
+            str | None: The value of the row.
+        '''
+        offset = self.__offsets[row]
+        if offset < 0:
+            return None
+        return self.__heap[offset:offset + self.__lengths[row]].decode()
+
+    @property
+    def garbage(self) -> int:
+        '''
+        Number of heap bytes taken by replaced values.
+        '''
+        return self.__garbage
+
+    def __len__(self):
+        return len(self.__offsets)
+
+
+class ColumnarAddressBook:
+    '''
+    Address book that stores contacts column by column in compact arrays instead of Record objects.
+    Names, emails and addresses are kept in string heaps, phones as integers in an array('q'),
+    birthdays as date ordinals with a (month * 100 + day) column for birthday queries.
+    Record objects are materialized only when they are accessed and write their changes back to the columns.
+    Scans and filters run over the columns and are vectorized with NumPy when it is installed.
+    Listeners registered with add_listener are notified about added, removed and changed records like
+    the listeners of AddressBook; the records passed to them are materialized from the columns.
+
+    The class provides the AddressBook interface used by the console bot. An existing book can be converted with
+    ColumnarAddressBook.from_records(book.get_all_contacts()) and saved in place of the AddressBook.
+    '''
+    def __init__(self):
+        self.__names = StringColumn()
+        self.__emails = StringColumn()
+        self.__addresses = StringColumn()
+        self.__phone_digits = array('q')    # phone numbers without '+', all rows
+        self.__phone_rows = array('q')      # row of every phone number, -1 if it was replaced
+        self.__phone_start = array('q')     # position of the first phone of the row
+        self.__phone_count = array('q')     # number of phones of the row
+        self.__birthdays = array('q')       # date ordinal, 0 if not set
+        self.__birth_days = array('h')      # month * 100 + day, 0 if not set
+        self.__alive = bytearray()
+        self.__rows = {}                    # lowercased name -> row
+        self.__name_index = SortedIndex()
+        self.__fuzzy_index = None           # built on the first fuzzy search
+        self.__dead_rows = 0
+        self.__generation = 0               # number of changes, tags the cached search results
+        self.__query_cache = QueryCache()
+        self.__listeners = ListenerRegistry()
+
+    @classmethod
+    def from_records(cls, records) -> "ColumnarAddressBook":
+        '''
+        Create a columnar address book from records.
+
+        Args:
+            records (Iterable[Record]): The records to store.
+        Returns:
+            ColumnarAddressBook: The address book with the records.
+        '''
+        book = cls()
+        for record in records:
+            book.add_record(record)
+        return book
+
+    @property
+    def generation(self) -> int:
+        '''
+        The number of changes made to the address book and its records.
+        '''
+        return self.__generation
+
+    def add_listener(self, listener) -> None:
+        '''
+        Register a function notified about every added, removed or changed record.
+
+        Args:
+            listener (callable): The function called as listener(record, field, old_value, new_value);
+                field is None when a whole record is added or removed.
+        '''
+        self.__listeners.add(listener)
+
+    def remove_listener(self, listener) -> None:
+        '''
+        Unregister a function registered with add_listener.
+
+        Args:
+            listener (callable): The registered function.
+        '''
+        self.__listeners.discard(listener)
+
+    def get_all_contacts(self) -> list[Record]:
+        '''
+        Get all contacts in the address book sorted by name.
+
+        Returns:
+            list: A list of all contacts in the address book.
+        '''
+        return list(self.iter_contacts())
+
+    def iter_contacts(self, offset: int = 0, limit: int | None = None) -> Iterator[Record]:
+        '''
+        Iterate over the contacts sorted by name, one page at a time.
+
+        Args:
+            offset (int): The number of contacts to skip. Defaults to 0.
+            limit (int | None): The maximum number of contacts to return, all remaining if None.
+        Returns:
+            Iterator: The contacts of the requested page.
+        '''
+        end = None if limit is None else offset + limit
+        for name_key in self.__name_index[offset:end]:
+            yield self.__materialize(self.__rows[name_key])
+
+    def add_record(self, record: Record) -> None:
+        '''
+        Add a record to the address book.
+        If the record already exists (based on the name), it will update the existing record.
+
+        Args:
+            record (Record): The record to add to the address book.
+        '''
+        self.__generation += 1
+        name_key = record.name.value.lower()
+        row = self.__rows.get(name_key)
+        if row is not None and len(self.__listeners):
+            previous = self.__detached(row)
+            self.__listeners.notify(previous, None, previous, None)
+        if row is None:
+            row = self.__append_row()
+            self.__rows[name_key] = row
+            self.__name_index.add(name_key)
+            if self.__fuzzy_index is not None:
+                self.__fuzzy_index.add(name_key)
+        self.__names.set(row, record.name.value)
+        self.__emails.set(row, record.email.value if record.email else None)
+        self.__addresses.set(row, record.address.value if record.address else None)
+        self.__set_phones(row, record.phone_values)
+        self.__set_birthday(row, record.birthday)
+        record.attach(self)
+        self.__listeners.notify(record, None, None, record)
+
+    def import_records(self, records) -> int:
+        '''
+        Add a batch of records to the address book.
+
+        Args:
+            records (Iterable[Record]): The records to add.
+        Returns:
+            int: The number of added records.
+        '''
+        count = 0
+        for record in records:
+            self.add_record(record)
+            count += 1
+        return count
+
+    def find(self, name: str) -> Record | None:
+        '''
+        Find a record by name.
+
+        Args:
+            name (str): The name of the record to find.
+        Returns:
+            Record | None: The record if found, None if not found.
+        '''
+        row = self.__rows.get(name.lower())
+        return self.__materialize(row) if row is not None else None
+
+    def remove(self, name: str) -> bool:
+        '''
+        Remove a record by name.
+
+        Args:
+            name (str): The name of the record to remove.
+        Returns:
+            bool: True if the record was removed, False if it was not found.
+        '''
+        row = self.__rows.get(name.lower())
+        if row is None:
+            return False
+        removed = self.__detached(row) if len(self.__listeners) else None
+        del self.__rows[name.lower()]
+        self.__generation += 1
+        self.__name_index.discard(name.lower())
+        if self.__fuzzy_index is not None:
+            self.__fuzzy_index.discard(name.lower())
+        self.__set_phones(row, ())
+        self.__alive[row] = 0
+        self.__dead_rows += 1
+        if self.__dead_rows >= _MIN_COMPACT_ROWS and self.__dead_rows > len(self.__alive) * _DEAD_ROWS_RATIO:
+            self.compact()
+        if removed is not None:
+            self.__listeners.notify(removed, None, removed, None)
+        return True
+
+    def complete_names(self, prefix: str, limit: int = 20) -> list[str]:
+        '''
+        Get the names of the contacts that start with the prefix.
+
+        Args:
+            prefix (str): The beginning of the name, case insensitive.
+            limit (int): The maximum number of names to return. Defaults to 20.
+        Returns:
+            list: The names of the matching contacts in alphabetical order.
+        '''
+        return [self.__names.get(self.__rows[key]) for key in self.__name_index.with_prefix(prefix.lower(), limit)]
+
+    def find_by_domain(self, domain: str) -> list[Record]:
+        '''
+        Find the contacts with an email at the given domain.
+
+        Args:
+            domain (str): The email domain, e.g. 'company.ua', case insensitive.
+        Returns:
+            list: The contacts with an email at the domain.
+        '''
+        suffix = "@" + domain.lower().lstrip('@')
+        return [self.__materialize(row) for row in self.__scan_strings(self.__emails, lambda email: email.endswith(suffix))]
+
+    def get_domain_counts(self) -> dict[str, int]:
+        '''
+        Count the contacts per email domain with one pass over the email column.
+
+        Returns:
+            dict: The number of contacts keyed by domain, the largest domains first.
+        '''
+        counts = {}
+        for row in self.__scan_strings(self.__emails, lambda email: True):
+            domain = email_domain(self.__emails.get(row))
+            counts[domain] = counts.get(domain, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def find_fuzzy(self, name: str, limit: int = FUZZY_LIMIT, max_distance: int | None = None) -> list[Record]:
+        '''
+        Find the contacts whose names are closest to the given name by edit distance.
+
+        Args:
+            name (str): The name with possible typos, case insensitive.
+            limit (int): The maximum number of contacts to return. Defaults to 10.
+            max_distance (int | None): The largest tolerated number of typos, depends on the name length if None.
+        Returns:
+            list: The closest contacts, closest first.
+        '''
+        return [self.__materialize(row) for row in self.__find_fuzzy_rows(name, limit, max_distance)]
+
+    def __find_fuzzy_rows(self, name: str, limit: int = FUZZY_LIMIT, max_distance: int | None = None) -> list[int]:
+        '''
+        Get the rows of the names closest to the given name, closest first.
+        '''
+        if self.__fuzzy_index is None:
+            self.__fuzzy_index = TrigramIndex(self.__name_index)
+        return [self.__rows[name_key] for name_key, _ in self.__fuzzy_index.search(name.lower(), limit, max_distance)]
+
+    def on_record_changed(self, record: Record, field: str, old_value, new_value) -> None:
+        '''
+        Write a change of a materialized record back to the columns.
+        This method is called by the records attached to the address book.
+        Every find returns a new record for the row, so only the reported change is applied:
+        a record taken before another record of the row was changed does not write back its old phones.
+
+        Args:
+            record (Record): The changed record.
+            field (str): The name of the changed field ('phone', 'email', 'address' or 'birthday').
+            old_value: The previous value, None if the value was added.
+            new_value: The new value, None if the value was removed.
+        '''
+        row = self.__rows.get(record.name.value.lower())
+        if row is None:
+            return
+        self.__generation += 1
+        match field:
+            case "phone":
+                self.__set_phones(row, self.__changed_phones(row, old_value, new_value))
+            case "email":
+                self.__emails.set(row, new_value)
+            case "address":
+                self.__addresses.set(row, new_value)
+            case "birthday":
+                self.__set_birthday(row, record.birthday)
+        self.__listeners.notify(record, field, old_value, new_value)
+
+    def get_upcoming_birthdays(self, days: int = 7) -> dict[str, str]:
+        '''
+        Get a list of upcoming birthdays within a certain number of days.
+        The (month, day) column is filtered with the days of the period in a single pass.
+        Birthdays on Feb 29th fall on March 1st in non-leap years.
+        If the birthday falls on a weekend, it adjusts the congratulation date to the next Monday.
+
+        Args:
+            days (int): The number of days to look ahead for upcoming birthdays. Defaults to 7.
+        Returns:
+            dict: A dictionary with names as keys and the date of the congratulation as values.
+        '''
+        today_date = datetime.today().date()
+        wanted = {}  # month * 100 + day -> (days from today, congratulation date)
+        for offset in range(min(days, 366) + 1):
+            day = today_date + timedelta(days=offset)
+            congratulation_day = day
+            if day.weekday() >= 5:
+                congratulation_day = day + timedelta(days=7 - day.weekday())
+            congratulation = (offset, datetime.strftime(congratulation_day, "%d.%m.%Y"))
+            wanted.setdefault(day.month * 100 + day.day, congratulation)
+            if day.month == 3 and day.day == 1 and not calendar.isleap(day.year):
+                wanted.setdefault(229, congratulation)
+
+        rows = self.__select_rows(self.__birth_days, lambda column: numpy.isin(column, list(wanted)),
+                                  lambda value: value in wanted)
+        found = sorted((wanted[self.__birth_days[row]], self.__names.get(row)) for row in rows)
+        return {name: congratulation_day for (_, congratulation_day), name in found}
+
+    def find_records(self, query: str | dict[str, str], field_type: str | None = None, mode: str = "and") -> list[Record]:
+        '''
+        Search for records by various fields.
+        The field_type can be one of the following: 'name', 'name~', 'phone', 'email', 'address', 'birthday'.
+        The 'name~' field type searches for the names closest to the query, tolerating typos (see find_fuzzy).
+        Several criteria can be given as a dictionary {field_type: query} and combined with AND or OR;
+        every criterion is evaluated over its column and the row sets are intersected or merged.
+        The query can contain wildcards: '%' matches any sequence of characters, '_' matches any single character.
+        Results are cached until the next change of the address book.
+
+        Args:
+            query (str | dict): The string to search for, or a dictionary of criteria.
+            field_type (str | None): The field to search in, when query is a string.
+            mode (str): 'and' if all criteria must match, 'or' if any criterion must match. Defaults to 'and'.
+        Returns:
+            list: The matching records.
+        '''
+        if mode not in ("and", "or"):
+            raise exceptions.InputError(f"Invalid search mode '{mode}'. Use 'and' or 'or'")
+        criteria = query if isinstance(query, dict) else {field_type: query}
+        key = (tuple(criteria.items()), mode)
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            result = self.__find_criteria_records(criteria, mode)
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def query_cache_stats(self) -> dict[str, int]:
+        '''
+        Get the statistics of the search result cache.
+
+        Returns:
+            dict: Cache hits, misses, current size and maximum size.
+        '''
+        return self.__query_cache.stats()
+
+    def __find_criteria_records(self, criteria: dict[str, str], mode: str) -> list[Record]:
+        '''
+        Get the records matching all or any of the criteria.
+        '''
+        row_sets = [self.__find_rows(value, field) for field, value in criteria.items()
+                    if field in SEARCH_FIELDS and value]
+        if not row_sets:
+            return []
+        rows = dict.fromkeys(row_sets[0])
+        for other in row_sets[1:]:
+            if mode == "and":
+                other = set(other)
+                rows = {row: None for row in rows if row in other}
+            else:
+                rows.update(dict.fromkeys(other))
+        return [self.__materialize(row) for row in rows]
+
+    def __find_rows(self, query: str, field_type: str) -> list[int]:
+        '''
+        Get the rows matching a single criterion.
+        '''
+        search_value = query.lower()
+        match field_type:
+            case 'name':
+                matches = compile_pattern(search_value)
+                prefix = literal_prefix(search_value)
+                name_keys = self.__name_index.with_prefix(prefix) if prefix else self.__name_index
+                rows = [self.__rows[name_key] for name_key in name_keys if matches(name_key)]
+            case 'name~':
+                rows = self.__find_fuzzy_rows(query)
+            case 'phone':
+                rows = self.__find_phone_rows(query)
+            case 'email':
+                rows = self.__scan_strings(self.__emails, compile_pattern(search_value))
+            case 'address':
+                rows = self.__scan_strings(self.__addresses, compile_pattern(search_value))
+            case 'birthday':
+                try:
+                    ordinal = datetime.strptime(query, "%d.%m.%Y").toordinal()
+                except ValueError:
+                    raise exceptions.InputError("Invalid birthday date format for search. Use DD.MM.YYYY")
+                rows = self.__select_rows(self.__birthdays, lambda column: column == ordinal,
+                                          lambda value: value == ordinal)
+            case _:
+                rows = []
+        return rows
+
+    def compact(self) -> None:
+        '''
+        Rebuild the columns without the removed rows and the replaced values.
+        The rows are written in name order. The listeners are kept and not notified,
+        the records do not change.
+        '''
+        records = self.get_all_contacts()
+        generation = self.__generation
+        listeners = self.__listeners
+        self.__init__()
+        for record in records:
+            self.add_record(record)
+        self.__generation = generation
+        self.__listeners = listeners
+
+    def __append_row(self) -> int:
+        '''
+        Add an empty row to every column.
+
+        Returns:
+            int: The number of the new row.
+        '''
+        for column in (self.__names, self.__emails, self.__addresses):
+            column.append(None)
+        self.__phone_start.append(len(self.__phone_digits))
+        self.__phone_count.append(0)
+        self.__birthdays.append(0)
+        self.__birth_days.append(0)
+        self.__alive.append(1)
+        return len(self.__alive) - 1
+
+    def __set_phones(self, row: int, phones: tuple[str, ...]) -> None:
+        '''
+        Replace the phones of a row. The new phones are appended to the phone column.
+        '''
+        start = self.__phone_start[row]
+        for position in range(start, start + self.__phone_count[row]):
+            self.__phone_rows[position] = -1
+        self.__phone_start[row] = len(self.__phone_digits)
+        self.__phone_count[row] = len(phones)
+        for phone in phones:
+            self.__phone_digits.append(int(phone[1:]))
+            self.__phone_rows.append(row)
+
+    def __changed_phones(self, row: int, old_value: str | None, new_value: str | None) -> tuple[str, ...]:
+        '''
+        Get the phones of a row with one phone replaced, added or removed.
+        '''
+        phones = list(self.__get_phones(row))
+        if old_value in phones:
+            index = phones.index(old_value)
+            if new_value is None or new_value in phones:
+                del phones[index]
+            else:
+                phones[index] = new_value
+        elif new_value is not None and new_value not in phones:
+            phones.append(new_value)
+        return tuple(phones)
+
+    def __get_phones(self, row: int) -> tuple[str, ...]:
+        '''
+        Get the phones of a row as strings.
+        '''
+        start = self.__phone_start[row]
+        return tuple(f"+{digits}" for digits in self.__phone_digits[start:start + self.__phone_count[row]])
+
+    def __set_birthday(self, row: int, birthday) -> None:
+        '''
+        Set the birthday of a row from a Birthday field or None.
+        '''
+        if birthday is None:
+            self.__birthdays[row] = 0
+            self.__birth_days[row] = 0
+        else:
+            self.__birthdays[row] = birthday.value.toordinal()
+            self.__birth_days[row] = birthday.value.month * 100 + birthday.value.day
+
+    def __detached(self, row: int) -> Record:
+        '''
+        Build a Record from a row without attaching it, for the listeners of a removed record.
+        '''
+        record = self.__materialize(row)
+        record.attach(None)
+        return record
+
+    def __materialize(self, row: int) -> Record:
+        '''
+        Build a Record from a row and attach it to the address book.
+        '''
+        ordinal = self.__birthdays[row]
+        record = Record.restore({"name": self.__names.get(row),
+                                 "phones": self.__get_phones(row),
+                                 "address": self.__addresses.get(row),
+                                 "email": self.__emails.get(row),
+                                 "birthday": ordinal or None})
+        record.attach(self)
+        return record
+
+    def __select_rows(self, column: array, vector_predicate, predicate) -> list[int]:
+        '''
+        Get the alive rows whose value in a numeric column satisfies a predicate.
+
+        Args:
+            column (array): The column with one value per row.
+            vector_predicate (callable): The predicate for a NumPy array, used when NumPy is installed.
+            predicate (callable): The predicate for a single value.
+        Returns:
+            list: The numbers of the matching rows.
+        '''
+        if numpy is not None and len(column):
+            values = numpy.frombuffer(column, dtype=numpy.dtype(column.typecode))
+            alive = numpy.frombuffer(self.__alive, dtype=numpy.uint8).astype(bool)
+            return numpy.flatnonzero(vector_predicate(values) & alive).tolist()
+        return [row for row, value in enumerate(column) if self.__alive[row] and predicate(value)]
+
+    def __find_phone_rows(self, query: str) -> list[int]:
+        '''
+        Get the rows that have a phone matching the query.
+        Exact phone numbers are compared as integers over the whole phone column.
+        '''
+        if not has_wildcards(query):
+            if not (query.startswith('+') and query[1:].isdigit()):
+                return []
+            target = int(query[1:])
+            positions = self.__select_phone_positions(target)
+        else:
+            matches = compile_pattern(query)
+            positions = [position for position, digits in enumerate(self.__phone_digits) if matches(f"+{digits}")]
+        rows = (self.__phone_rows[position] for position in positions)
+        return list(dict.fromkeys(row for row in rows if row >= 0))
+
+    def __select_phone_positions(self, target: int) -> list[int]:
+        '''
+        Get the positions of a phone number in the phone column.
+        '''
+        if numpy is not None and len(self.__phone_digits):
+            digits = numpy.frombuffer(self.__phone_digits, dtype=numpy.int64)
+            return numpy.flatnonzero(digits == target).tolist()
+        return [position for position, digits in enumerate(self.__phone_digits) if digits == target]
+
+    def __scan_strings(self, column: StringColumn, matches) -> list[int]:
+        '''
+        Get the alive rows whose lowercased value in a string column matches a pattern.
+        '''
+        rows = []
+        for row in range(len(column)):
+            if self.__alive[row]:
+                value = column.get(row)
+                if value is not None and matches(value.lower()):
+                    rows.append(row)
+        return rows
+
+    def __getstate__(self):
+        '''
+        Get the state of the address book for pickling.
+        If the columns hold removed rows or replaced values, the state is taken from a compacted copy,
+        so they are not stored; the address book itself is not changed.
+        '''
+        source = self
+        has_garbage = any(column.garbage for column in (self.__names, self.__emails, self.__addresses))
+        if self.__dead_rows or has_garbage or len(self.__phone_digits) > sum(self.__phone_count):
+            source = ColumnarAddressBook.from_records(self.get_all_contacts())
+            source.__generation = self.__generation
+        state = source.__dict__.copy()
+        # The trigram index is rebuilt on the next fuzzy search, cached results are not stored
+        state["_ColumnarAddressBook__fuzzy_index"] = None
+        state["_ColumnarAddressBook__query_cache"] = QueryCache()
+        del state["_ColumnarAddressBook__listeners"]
+        return state
+
+    def __setstate__(self, state):
+        '''
+        Restore the state of the address book from a pickle, without listeners.
+
+        Args:
+            state (dict): A dictionary containing the saved state of the address book.
+        '''
+        self.__dict__.update(state)
+        self.__listeners = ListenerRegistry()
+
+    def __len__(self):
+        return len(self.__rows)
+
+    def __contains__(self, name):
+        return name.lower() in self.__rows
+
+    def __str__(self):
+        return "Address book:\n" + "".join(f"{record}\n" for record in self.iter_contacts())
+
+
+def open_columnar(filename: str, object):
+    '''
+    Open the storage of a collection in the columnar mode.
+    Address books are stored as a journaled pickle of ColumnarAddressBook next to the pickle file,
+    with the COLUMNAR_SUFFIX extension; it is created from the pickle and its journal when it does not exist.
+    Notebooks have no columnar format and are journaled.
+
+    Args:
+        filename (str): The name of the pickle file of the collection.
+        object (AddressBook | Notebook): The empty collection.
+    Returns:
+        JournaledObject: The storage of the collection.
+    '''
+    if isinstance(object, Notebook):
+        return JournaledObject(filename, object)
+    path = os.path.splitext(filename)[0] + COLUMNAR_SUFFIX
+    if os.path.exists(path):
+        return JournaledObject(path, ColumnarAddressBook())
+    stored = JournaledObject(filename, object).object if os.path.exists(filename) else object
+    storage = JournaledObject(path, ColumnarAddressBook.from_records(stored.get_all_contacts()))
+    storage.compact()
+    return storage
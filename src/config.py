@@ -0,0 +1,50 @@
+import os
+
+# Storage modes of the address book and the notebook:
+# 'journal' - a snapshot pickle and an append-only journal of the changes since the snapshot
+# 'pickle' - the whole collection is pickled on exit
+# 'sqlite' - a SQLite database, the collection is queried without loading it into memory
+# 'snapshot' - a memory-mapped binary snapshot of the address book, the notebook is journaled
+# 'columnar' - a journaled column-oriented address book, the notebook is journaled
+STORAGE_MODES = ("journal", "pickle", "sqlite", "snapshot", "columnar")
+
+# Compression of the pickle files, see file_serializer.CODECS
+SNAPSHOT_CODECS = ("none", "zlib", "lzma", "bz2")
+
+
+def _env_int(name: str, default: int) -> int:
+    '''
+    Read a non-negative integer setting from the environment.
+
+    Args:
+        name (str): The name of the environment variable.
+        default (int): The value used when the variable is not set.
+    Returns:
+        int: The value of the setting.
+    Raises:
+        ValueError: If the variable is not a non-negative integer.
+    '''
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    if not value.strip().isdigit():
+        raise ValueError(f"{name} must be a non-negative integer, got '{value}'")
+    return int(value)
+
+
+STORAGE_MODE = os.environ.get("PYCONTACTS_STORAGE", "journal").strip().lower()
+if STORAGE_MODE not in STORAGE_MODES:
+    raise ValueError(f"PYCONTACTS_STORAGE must be one of {', '.join(STORAGE_MODES)}, got '{STORAGE_MODE}'")
+
+SNAPSHOT_CODEC = os.environ.get("PYCONTACTS_CODEC", "none").strip().lower()
+if SNAPSHOT_CODEC not in SNAPSHOT_CODECS:
+    raise ValueError(f"PYCONTACTS_CODEC must be one of {', '.join(SNAPSHOT_CODECS)}, got '{SNAPSHOT_CODEC}'")
+
+# File the load times and storage errors are logged to
+LOG_FILE = os.environ.get("PYCONTACTS_LOG", "pycontacts.log")
+
+# Size of the journal in bytes after which it is compacted into a new snapshot
+JOURNAL_MAX_BYTES = _env_int("PYCONTACTS_JOURNAL_MAX_BYTES", 1 << 20)
+
+# Number of seconds between two background saves of the modified collections, 0 disables the autosave
+AUTOSAVE_INTERVAL = _env_int("PYCONTACTS_AUTOSAVE_INTERVAL", 60)
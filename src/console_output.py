@@ -61,13 +61,15 @@ class ConsoleOutput:
 
     def print_object_list(self, data: list):
         """
-        Print a list of objects as a table, using their __dict__ attributes.
+        Print a list of objects as a table, using their to_dict() fields or public __dict__ attributes.
 
         :param data: List of objects to display.
         """
         table = Table(show_lines=True)
         if data:
-            data_dct = [dt.__dict__ for dt in data]
+            data_dct = [dt.to_dict() if hasattr(dt, "to_dict")
+                        else {key: value for key, value in dt.__dict__.items() if not key.startswith("_")}
+                        for dt in data]
             for column_name in data_dct[0].keys():
                 table.add_column(column_name.title(), justify="left",
                                  style="blue", no_wrap=True)
@@ -86,6 +88,26 @@ class ConsoleOutput:
             self.__print_str(
                 "No items to display", style="bold blue")
 
+    @property
+    def page_size(self) -> int:
+        """
+        Number of table rows that fit on one screen.
+        Every row of a table with lines takes at least two lines of the terminal.
+        """
+        return max(1, (self.__console.size.height - 6) // 2)
+
+    def ask_next_page(self, shown: int, total: int) -> bool:
+        """
+        Ask the user whether to display the next page.
+
+        :param shown: Number of items already displayed.
+        :param total: Total number of items.
+        :return: True if the next page should be displayed, False otherwise.
+        """
+        answer = self.__console.input(
+            f"[bold blue]Shown {shown} of {total}. Press Enter for the next page or 'q' to stop:[/] ")
+        return answer.strip().lower() != "q"
+
     def print_msg(self, msg):
         """
         Print a success or informational message in green.
@@ -108,6 +130,15 @@ class ConsoleOutput:
         """
         self.__console.clear()
 
+    def status(self, msg):
+        """
+        Show a spinner with a message while a block of code runs.
+
+        :param msg: Message shown next to the spinner.
+        :return: Context manager that removes the spinner on exit.
+        """
+        return self.__console.status(msg)
+
     def print_map_with_title(self, title: str, data: dict):
         """
         Print a dictionary as a table with a title.
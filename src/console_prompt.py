@@ -12,14 +12,18 @@ command_descriptions = {
     "add":         "Add new contact",
     "change":      "Edit contact",
     "remove":      "Remove the contact",
-    "find":        "Find contact by selected criteria (use % and _ as wildcards)",
+    "find":        "Find contact by one or more criteria (use % and _ as wildcards)",
     "show":        "Show detailed contact info",
-    "all":         "Display all contacts/notes(contacts by default)",
+    "all":         "Display all contacts/notes page by page (contacts by default)",
     "birthdays":   "Show upcoming birthdays next input days (default 7)",
+    "import":      "Import contacts from a CSV or JSONL file",
+    "domains":     "Show the number of contacts per email domain",
+    "stats":       "Show search cache hits and misses and the note index size",
     "add_note":    "Add new note",
     "remove_note": "Remove dedicated note",
     "change_note": "Edit dedicated note",
     "find_notes":  "Find notes by selected criteria",
+    "search":      "Full-text search of notes (\"phrase\", word NEAR/k word)",
     "add_tags":    "Add tag to selected note",
     "remove_tags": "Remove tag from selected note",
     "show_notes":  "Display notes sorted by tags",
@@ -40,10 +44,14 @@ class Command(Enum):
     SHOW_DETAILS = "show"
     ALL = "all"
     BIRTHDAYS = "birthdays"
+    IMPORT = "import"
+    DOMAINS = "domains"
+    STATS = "stats"
     ADD_NOTE = "add_note"
     REMOVE_NOTE = "remove_note"
     CHANGE_NOTE = "change_note"
     FIND_NOTES = "find_notes"
+    SEARCH = "search"
     ADD_TAGS = "add_tags"
     REMOVE_TAGS = "remove_tags"
     SHOW_NOTES = "show_notes"
@@ -56,6 +64,7 @@ class ContactKeys(Enum):
     Enum representing keys for contact properties.
     """
     NAME = "name"           # Contact's name
+    FUZZY_NAME = "name~"    # Contact's name with possible typos
     PHONE = "phone"         # Contact's phone number(s)
     EMAIL = "email"         # Contact's email address
     ADDRESS = "address"     # Contact's physical address
@@ -63,6 +72,9 @@ class ContactKeys(Enum):
     OLD_PHONE = "old_phone"  # Old phone number for change operations
     NEW_PHONE = "new_phone"  # New phone number for change operations
     DAYS = "days"           # Number of days for birthday search
+    FILE = "file"           # Path to a file for import
+    MODE = "mode"           # How to combine search criteria: and/or
+    EXPLAIN = "explain"     # Show the query plan of a search
 
 
 class NoteKeys(Enum):
@@ -74,6 +86,8 @@ class NoteKeys(Enum):
     TEXT = "text"   # Note text content
     TAGS = "tags"   # Tags associated with the note
     TAG = "tag"     # Single tag for add/remove operations
+    QUERY = "query"  # Words, phrases and NEAR clauses for the full-text search
+    LIMIT = "limit"  # Maximum number of search results
 
 
 class FirstWordCompleter(Completer):
@@ -104,6 +118,36 @@ class FirstWordCompleter(Completer):
                 yield Completion(word, start_position=-len(current_word),  display_meta=self.command_descr.get(word, ""))
 
 
+class ContactNameCompleter(Completer):
+    """
+    Completer that suggests contact names starting with the entered text.
+    Names are requested from a callable backed by the address book name index,
+    so only a limited number of matching names is fetched on every keystroke.
+    """
+
+    def __init__(self, names_source, limit: int = 20):
+        """
+        Initialize with a source of contact names.
+        :param names_source: Callable that takes a prefix and a limit and returns matching names.
+        :param limit: Maximum number of suggestions.
+        """
+        self.names_source = names_source
+        self.limit = limit
+
+    def get_completions(self, document, complete_event):
+        """
+        Yield contact names that start with the text before the cursor.
+        :param document: The prompt_toolkit document object.
+        :param complete_event: The completion event.
+        """
+        prefix = document.text_before_cursor.lstrip()
+        if not prefix:
+            return
+
+        for name in self.names_source(prefix, self.limit):
+            yield Completion(name, start_position=-len(prefix))
+
+
 style = Style.from_dict({
     "prompt": "#884444",
     "command": "#00aa00",
@@ -126,23 +170,25 @@ class Builder:
         self.session = session
         self.result = {}
 
-    def prompt(self, prompt):
+    def prompt(self, prompt, completer=None):
         """
         Prompt the user for input.
         :param prompt: Prompt text.
+        :param completer: Completer for the input, no completion if None.
         :return: User input or None.
         """
-        val = self.session.prompt(prompt, completer=DummyCompleter())
+        val = self.session.prompt(prompt, completer=completer or DummyCompleter())
         return val if val.strip() else None
 
-    def get_property(self, prompt, key):
+    def get_property(self, prompt, key, completer=None):
         """
         Get a property value from the user and store it in the result.
         :param prompt: Prompt text.
         :param key: Key to store the value under.
+        :param completer: Completer for the input, no completion if None.
         """
         colored_prompt = FormattedText([("class:params", prompt)])
-        value = self.prompt(colored_prompt)
+        value = self.prompt(colored_prompt, completer)
         if value:
             value = value.strip()
             self.result.update({key: value})
@@ -173,9 +219,22 @@ class ContactBuilder(Builder):
     Builder for collecting contact properties.
     """
 
+    def __init__(self, session, names_source=None):
+        """
+        Initialize with a prompt session and an optional source of contact names.
+        :param session: PromptSession object.
+        :param names_source: Callable that takes a prefix and a limit and returns matching names.
+        """
+        super().__init__(session)
+        self.name_completer = ContactNameCompleter(names_source) if names_source else None
+
     def get_name(self):
-        """Prompt for contact name."""
-        self.get_property("name:", ContactKeys.NAME.value)
+        """Prompt for contact name with name completion."""
+        self.get_property("name:", ContactKeys.NAME.value, self.name_completer)
+
+    def get_fuzzy_name(self):
+        """Prompt for contact name with possible typos."""
+        self.get_property("name (with typos):", ContactKeys.FUZZY_NAME.value)
 
     def get_phone(self):
         """Prompt for contact phone(s)."""
@@ -268,23 +327,37 @@ class FindBuilder(ContactBuilder):
 
     def build(self):
         """
-        Prompt for find criteria and collect corresponding property.
+        Prompt for find criteria until an empty input and collect corresponding properties.
+        If several criteria are entered, prompt how to combine them.
+        The 'name~' criterion searches for the closest names, tolerating typos.
+        The 'explain' criterion requests the query plan of the search.
         """
-        find_criteria = self.what(
-            "find criteria:", [ContactKeys.NAME.value, ContactKeys.PHONE.value, ContactKeys.EMAIL.value, ContactKeys.ADDRESS.value, ContactKeys.BIRTHDAY.value])
-        match find_criteria:
-            case ContactKeys.NAME.value:
-                self.get_name()
-            case ContactKeys.PHONE.value:
-                self.get_phone()
-            case ContactKeys.EMAIL.value:
-                self.get_email()
-            case ContactKeys.ADDRESS.value:
-                self.get_address()
-            case ContactKeys.BIRTHDAY.value:
-                self.get_birthday()
-            case _:
-                raise InputError("Invalid input")
+        criteria = [ContactKeys.NAME.value, ContactKeys.FUZZY_NAME.value, ContactKeys.PHONE.value,
+                    ContactKeys.EMAIL.value, ContactKeys.ADDRESS.value, ContactKeys.BIRTHDAY.value,
+                    ContactKeys.EXPLAIN.value]
+        while find_criteria := self.what("find criteria (empty to search):", criteria):
+            match find_criteria:
+                case ContactKeys.NAME.value:
+                    self.get_name()
+                case ContactKeys.FUZZY_NAME.value:
+                    self.get_fuzzy_name()
+                case ContactKeys.PHONE.value:
+                    self.get_phone()
+                case ContactKeys.EMAIL.value:
+                    self.get_email()
+                case ContactKeys.ADDRESS.value:
+                    self.get_address()
+                case ContactKeys.BIRTHDAY.value:
+                    self.get_birthday()
+                case ContactKeys.EXPLAIN.value:
+                    self.result.update({ContactKeys.EXPLAIN.value: True})
+                case _:
+                    raise InputError("Invalid input")
+            criteria.remove(find_criteria)
+
+        if len(self.result.keys() - {ContactKeys.EXPLAIN.value}) > 1:
+            mode = self.what("match all or any criteria (and/or):", ["and", "or"])
+            self.result.update({ContactKeys.MODE.value: mode or "and"})
         return self.result
 
 
@@ -299,6 +372,17 @@ class BirthdaysBuilder(ContactBuilder):
         return self.result
 
 
+class ImportBuilder(ContactBuilder):
+    """
+    Builder for importing contacts from a file.
+    """
+
+    def build(self):
+        """Prompt for the path to the file."""
+        self.get_property("file:", ContactKeys.FILE.value)
+        return self.result
+
+
 class ShowDetailsBuilder(ContactBuilder):
     """
     Builder for showing contact details with filter criteria.
@@ -456,17 +540,31 @@ class FindNotesBuilder(NoteBuilder):
         return self.result
 
 
+class SearchNotesBuilder(NoteBuilder):
+    """
+    Builder for the full-text search of notes.
+    """
+
+    def build(self):
+        """Prompt for the searched words and the number of results."""
+        self.get_property("query:", NoteKeys.QUERY.value)
+        self.get_property("limit:", NoteKeys.LIMIT.value)
+        return self.result
+
+
 class CommandPrompt:
     """
     Main class for prompting user commands and parameters.
     """
 
-    def __init__(self):
+    def __init__(self, names_source=None):
         """
         Initialize the command prompt with history and style.
+        :param names_source: Callable that takes a prefix and a limit and returns matching contact names.
         """
         history = FileHistory('command_history.txt')
         self.session = PromptSession(style=style, history=history)
+        self.names_source = names_source
         self.result = ()
 
     def get_builder(self, command):
@@ -477,15 +575,15 @@ class CommandPrompt:
         """
         match command:
             case Command.ADD.value:
-                return AddBuilder(self.session)
+                return AddBuilder(self.session, self.names_source)
             case Command.CHANGE.value:
-                return ChangeBuilder(self.session)
+                return ChangeBuilder(self.session, self.names_source)
             case Command.REMOVE.value:
-                return RemoveBuilder(self.session)
+                return RemoveBuilder(self.session, self.names_source)
             case Command.FIND.value:
-                return FindBuilder(self.session)
+                return FindBuilder(self.session, self.names_source)
             case Command.SHOW_DETAILS.value:
-                return ShowDetailsBuilder(self.session)
+                return ShowDetailsBuilder(self.session, self.names_source)
             case Command.ADD_NOTE.value:
                 return AddNoteBuilder(self.session)
             case Command.REMOVE_NOTE.value:
@@ -494,12 +592,16 @@ class CommandPrompt:
                 return ChangeNoteBuilder(self.session)
             case Command.FIND_NOTES.value:
                 return FindNotesBuilder(self.session)
+            case Command.SEARCH.value:
+                return SearchNotesBuilder(self.session)
             case Command.ADD_TAGS.value:
                 return AddTagBuilder(self.session)
             case Command.REMOVE_TAGS.value:
                 return RemoveTagBuilder(self.session)
             case Command.BIRTHDAYS.value:
-                return BirthdaysBuilder(self.session)
+                return BirthdaysBuilder(self.session, self.names_source)
+            case Command.IMPORT.value:
+                return ImportBuilder(self.session)
             case Command.ALL.value:
                 return AllBuilder(self.session)
             case _:
@@ -0,0 +1,221 @@
+import csv
+import json
+import re
+import time
+from itertools import islice
+from addressbook import Birthday, Record, address_error, email_error, name_error, phone_error
+from exceptions import InputError, ValidationError
+
+# Number of rows validated and inserted at once
+IMPORT_CHUNK_SIZE = 10_000
+
+# Phones in one cell can be separated by commas, semicolons or spaces
+PHONES_SEPARATOR = re.compile(r"[,;\s]+")
+
+
+class ImportReport:
+    '''
+    Result of a bulk import.
+
+    Attributes:
+        imported (int): The number of imported contacts, a name is counted once.
+        duplicates (int): The number of rows repeating the name of a row imported before.
+        errors (list): The rejected rows as (line number, error message) tuples.
+        elapsed (float): The duration of the import in seconds.
+    '''
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows(self) -> int:
+        '''
+        The number of processed rows.
+        '''
+        return self.imported + self.duplicates + len(self.errors)
+
+    @property
+    def rows_per_sec(self) -> float:
+        '''
+        The import throughput in rows per second.
+        '''
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(path: str):
+    '''
+    Read contact rows from a CSV or JSONL file one by one.
+    CSV files must have a header with the columns name, phones, email, address and birthday.
+    JSONL files contain one JSON object with the same keys per line.
+
+    Args:
+        path (str): The path to the file.
+    Returns:
+        Iterator: (line number, row dictionary) tuples.
+    Raises:
+        InputError: If the file format is not supported.
+    '''
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+    elif path.lower().endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line_num, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_num, json.loads(line)
+                    except json.JSONDecodeError as err:
+                        yield line_num, err
+    else:
+        raise InputError(f"import - unsupported file format '{path}'. Use .csv or .jsonl")
+
+
+def split_columns(chunk: list) -> tuple[dict, dict]:
+    '''
+    Split a chunk of rows into columns of stripped values.
+    Rows that are not objects or have no name are rejected here.
+
+    Args:
+        chunk (list): The (line number, row dictionary) tuples of the chunk.
+    Returns:
+        tuple[dict, dict]: The columns as {field: {line number: value}} and the errors as {line number: message}.
+    '''
+    columns = {field: {} for field in ("name", "phones", "email", "address", "birthday")}
+    errors = {}
+    for line_num, row in chunk:
+        if not isinstance(row, dict):
+            errors[line_num] = f"Invalid row: {row}"
+            continue
+        name = row.get("name")
+        if not name:
+            errors[line_num] = "Contact name is required"
+            continue
+        columns["name"][line_num] = name.strip() if isinstance(name, str) else name
+        phones = row.get("phones") or row.get("phone") or ""
+        if isinstance(phones, str):
+            phones = PHONES_SEPARATOR.split(phones.strip())
+        elif not isinstance(phones, (list, tuple)):
+            phones = [phones]
+        columns["phones"][line_num] = [phone for phone in phones if phone]
+        for field in ("email", "address", "birthday"):
+            value = row.get(field)
+            if value:
+                columns[field][line_num] = value.strip() if isinstance(value, str) else value
+    return columns, errors
+
+
+def phones_error(phones: list) -> str | None:
+    '''
+    Check the phone numbers of a row.
+
+    Args:
+        phones (list): The phone numbers.
+    Returns:
+        str | None: The error message of the first invalid phone number, None if all are valid.
+    '''
+    return next(filter(None, map(phone_error, phones)), None)
+
+
+# Validators of the columns checked before the birthdays, in the order the fields are reported
+COLUMN_VALIDATORS = (("name", name_error), ("phones", phones_error),
+                     ("email", email_error), ("address", address_error))
+
+
+def parse_birthdays(column: dict, errors: dict) -> dict:
+    '''
+    Validate a column of birthdays, parsing every distinct value once.
+    The rows with an invalid birthday are added to errors.
+
+    Args:
+        column (dict): The birthdays as {line number: value}.
+        errors (dict): The rejected rows as {line number: message}, rows already in it are skipped.
+    Returns:
+        dict: The date ordinals of the valid birthdays as {line number: ordinal}.
+    '''
+    parsed = {}
+    ordinals = {}
+    for line_num, birthday in column.items():
+        if line_num in errors:
+            continue
+        result = parsed.get(birthday) if isinstance(birthday, str) else None
+        if result is None:
+            try:
+                result = Birthday(birthday).value.toordinal()
+            except ValidationError as err:
+                result = str(err)
+            if isinstance(birthday, str):
+                parsed[birthday] = result
+        if isinstance(result, str):
+            errors[line_num] = result
+        else:
+            ordinals[line_num] = result
+    return ordinals
+
+
+def validate_chunk(chunk: list) -> tuple[list, dict]:
+    '''
+    Validate a chunk of rows column by column and build the records of the valid rows.
+    Every column is checked with the field validator in one pass; a row rejected by a column
+    is skipped by the following ones. Birthdays are parsed once per distinct value.
+
+    Args:
+        chunk (list): The (line number, row dictionary) tuples of the chunk.
+    Returns:
+        tuple[list, dict]: The records of the valid rows and the errors as {line number: message}.
+    '''
+    columns, errors = split_columns(chunk)
+    for field, error_of in COLUMN_VALIDATORS:
+        for line_num, value in columns[field].items():
+            if line_num not in errors and (error := error_of(value)):
+                errors[line_num] = error
+
+    ordinals = parse_birthdays(columns["birthday"], errors)
+
+    records = []
+    for line_num, name in columns["name"].items():
+        if line_num in errors:
+            continue
+        address = columns["address"].get(line_num)
+        records.append(Record.restore({
+            "name": name.title(),
+            "phones": tuple(dict.fromkeys(columns["phones"][line_num])),
+            "address": address.title() if address else None,
+            "email": columns["email"].get(line_num),
+            "birthday": ordinals.get(line_num)}))
+    return records, errors
+
+
+def import_contacts(path: str, book, chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportReport:
+    '''
+    Import contacts from a CSV or JSONL file into the address book.
+    The file is streamed in chunks; every chunk is validated column by column and inserted
+    with a single call to import_records. Invalid rows are collected in the report
+    instead of stopping the import. A name that appears again in the file replaces the
+    previous contact and is counted as a duplicate.
+
+    Args:
+        path (str): The path to the file.
+        book (AddressBook): The address book to import into.
+        chunk_size (int): The number of rows per chunk.
+    Returns:
+        ImportReport: The number of imported contacts and duplicates, the rejected rows and the throughput.
+    '''
+    report = ImportReport()
+    start = time.perf_counter()
+    rows = read_rows(path)
+    seen = set()
+    while chunk := list(islice(rows, chunk_size)):
+        records, errors = validate_chunk(chunk)
+        report.errors.extend(sorted(errors.items()))
+        unique = {record.name.value.lower(): record for record in records}
+        new_names = unique.keys() - seen
+        seen.update(new_names)
+        report.imported += len(new_names)
+        report.duplicates += len(records) - len(new_names)
+        book.import_records(unique.values())
+    report.elapsed = time.perf_counter() - start
+    return report
@@ -1,44 +1,169 @@
+import bz2
+import copyreg
+import io
+import logging
+import lzma
+import os
 import pickle
+import zlib
+import config
+
+logger = logging.getLogger(__name__)
+
+# Compression of the saved files by codec name: (compress, decompress, magic bytes the compressed data starts with).
+# Pickles start with the b'\x80' protocol opcode, so uncompressed files are told apart by the same check.
+CODECS = {
+    "zlib": (zlib.compress, zlib.decompress, b"\x78"),
+    "lzma": (lzma.compress, lzma.decompress, b"\xfd7zXZ\x00"),
+    "bz2": (bz2.compress, bz2.decompress, b"BZh"),
+}
+
+class _StatePickler(pickle.Pickler):
+    '''
+    Pickler writing the objects whose states were taken before with those states,
+    so the pickle does not depend on later changes of the objects.
+    '''
+    def __init__(self, file, states: dict):
+        '''
+        Args:
+            file (BinaryIO): The file the pickle is written to.
+            states (dict): The states of the objects keyed by their ids, see AddressBook.pickle_states.
+        '''
+        super().__init__(file)
+        self.__states = states
+
+    def reducer_override(self, obj):
+        state = self.__states.get(id(obj))
+        if state is None:
+            return NotImplemented
+        return copyreg.__newobj__, (type(obj),), state
+
 
 class SerializedObject:
     ''' A class for serializing and deserializing an object to/from a file using pickle.
     This class provides methods to save an object to a file and load it back.
+    The file is replaced atomically: the object is written to a temporary file, flushed to disk and renamed,
+    so a crash during a save leaves the previous file intact. The pickle can be compressed with one of CODECS;
+    the codec of a loaded file is detected from its first bytes.
+    The object is saved only if it was modified: its generation counter, incremented by every change,
+    is compared with the generation of the last load or save.
     Attributes:
         __filename (str): The name of the file to save/load the object.
+        __codec (str): The compression of the saved file, 'none' or a key of CODECS.
         object (object): The object to be serialized/deserialized.
     '''
-    def __init__(self, filename, object):
+    def __init__(self, filename, object, codec=None):
         '''
         Initialize the SerializedObject with a filename and an object.
         If the file exists, it loads the object from the file; otherwise, it uses the provided object.
         Args:
             filename (str): The name of the file to save/load the object.
             object (object): The object to be serialized/deserialized.
+            codec (str | None): The compression of the saved file, config.SNAPSHOT_CODEC if None.
+        Raises:
+            ValueError: If the codec is unknown.
         ''' 
+        codec = config.SNAPSHOT_CODEC if codec is None else codec
+        if codec != "none" and codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}'")
         self.__filename = filename
+        self.__codec = codec
         loaded_obj = self.load_data()
         self.object = loaded_obj if loaded_obj != None else object
+        # None until the object is written, a new file is saved even if the object was not changed
+        self.__saved_generation = self.object.generation if loaded_obj != None else None
+
+    @property
+    def is_modified(self) -> bool:
+        '''
+        True if the object was changed after it was loaded or saved, or was never saved.
+        '''
+        return self.object.generation != self.__saved_generation
 
     def save_data(self):
         '''
-        Save the object to a file using pickle. 
-        This method opens the file in binary write mode and dumps the object into it.
+        Save the object to a file using pickle, if it was modified.
+        This method pickles and compresses the object and replaces the file with it, see __write.
+        Raises:
+            IOError: If there is an error writing to the file.
+        '''
+        if not self.is_modified:
+            return
+        generation = self.object.generation
+        self.__write(self.__serialize())
+        self.__saved_generation = generation
+
+    def save_in_background(self, lock):
+        '''
+        Save the object if it was modified, while another thread keeps changing it.
+        Under the lock only the pickle states of the object and its items are taken (see pickle_states
+        of AddressBook and Notebook), which is several times faster than pickling the object;
+        the states are pickled, compressed and written after the lock is released, into the same pickle
+        that save_data writes. The file is not written by a forked process: forking while other threads
+        run can leave the child blocked on a lock held by one of them.
+        Args:
+            lock (threading.Lock): The lock held by the thread changing the object.
         Raises:
             IOError: If there is an error writing to the file.
         '''
-        with open(self.__filename, "wb") as f:
-            pickle.dump(self.object, f)
+        with lock:
+            if not self.is_modified:
+                return
+            generation = self.object.generation
+            states = self.object.pickle_states()
+        buffer = io.BytesIO()
+        _StatePickler(buffer, states).dump(self.object)
+        self.__write(self.__compress(buffer.getvalue()))
+        self.__saved_generation = generation
+
+    def __serialize(self) -> bytes:
+        '''
+        Pickle the object and compress it with the codec of the storage.
+        '''
+        return self.__compress(pickle.dumps(self.object))
+
+    def __compress(self, data: bytes) -> bytes:
+        '''
+        Compress a pickle with the codec of the storage.
+        '''
+        if self.__codec == "none":
+            return data
+        compress, _, _ = CODECS[self.__codec]
+        return compress(data)
+
+    def __write(self, data: bytes):
+        '''
+        Replace the file with the data atomically.
+        The data is written to a temporary file next to it, flushed to disk and renamed over the file.
+        '''
+        temporary = self.__filename + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.__filename)
+
+    def commit(self):
+        '''
+        Nothing is written after a single change, the object is saved by save_data.
+        '''
 
     def load_data(self):
         '''
         Load the object from a file using pickle.
-        This method opens the file in binary read mode and loads the object from it.
+        This method reads the file, decompresses it if it starts with the magic bytes of a codec,
+        and loads the object from it.
         Returns:
             object: The loaded object, or None if the file does not exist.
         '''
         try:
             with open(self.__filename, "rb") as f:
-                return pickle.load(f)
+                data = f.read()
+            for _, decompress, magic in CODECS.values():
+                if data.startswith(magic):
+                    data = decompress(data)
+                    break
+            return pickle.loads(data)
         except FileNotFoundError:
-            print("File not found")
+            logger.info("File %s not found", self.__filename)
             return None
@@ -0,0 +1,289 @@
+from array import array
+from collections import Counter
+from bisect import bisect_left
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Maximum edit distance used when the caller does not set one
+FUZZY_MAX_DISTANCE = 2
+
+# Number of closest names returned by default
+FUZZY_LIMIT = 10
+
+# Characters added around a key, so the first and the last characters get their own trigrams
+_PADDING = "  "
+
+
+def default_distance(text: str) -> int:
+    '''
+    Get the edit distance tolerated for a query of the given length.
+    Short queries tolerate fewer typos, otherwise almost every short name would match.
+
+    Args:
+        text (str): The query.
+    Returns:
+        int: 0 for 1-2 characters, 1 for 3-6 characters, FUZZY_MAX_DISTANCE for longer queries.
+    '''
+    return min(FUZZY_MAX_DISTANCE, (len(text) + 1) // 4)
+
+
+def trigrams(text: str) -> set[str]:
+    '''
+    Get the distinct trigrams of a padded text.
+
+    Args:
+        text (str): The text to split.
+    Returns:
+        set: The trigrams of the text.
+    '''
+    padded = _PADDING + text + _PADDING
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(first: str, second: str, max_distance: int) -> int:
+    '''
+    Compute the Levenshtein distance between two strings, giving up once it exceeds max_distance.
+    The common prefix and suffix are skipped and only the cells within max_distance
+    of the diagonal are computed.
+
+    Args:
+        first (str): The first string.
+        second (str): The second string.
+        max_distance (int): The largest distance of interest.
+    Returns:
+        int: The distance, or max_distance + 1 if the strings are further apart.
+    '''
+    if first == second:
+        return 0
+    # The common prefix and suffix do not change the distance
+    start = 0
+    shortest = min(len(first), len(second))
+    while start < shortest and first[start] == second[start]:
+        start += 1
+    end = 0
+    while end < shortest - start and first[-1 - end] == second[-1 - end]:
+        end += 1
+    first, second = first[start:len(first) - end], second[start:len(second) - end]
+
+    if len(first) > len(second):
+        first, second = second, first
+    if len(second) - len(first) > max_distance:
+        return max_distance + 1
+
+    too_far = max_distance + 1
+    previous = list(range(len(second) + 1))
+    for i, char in enumerate(first, start=1):
+        low = max(1, i - max_distance)
+        high = min(len(second), i + max_distance)
+        current = [too_far] * (len(second) + 1)
+        current[0] = i if i <= max_distance else too_far
+        best = current[0]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char != second[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost if cost < too_far else too_far
+            if cost < best:
+                best = cost
+        if best > max_distance:
+            return too_far
+        previous = current
+    return min(previous[-1], too_far)
+
+
+class TrigramIndex:
+    '''
+    Index of string keys by their trigrams for typo-tolerant search.
+    Every key gets an integer id, and every (trigram, key length) pair points to the ids
+    of the keys of that length containing the trigram. Keys within distance d of the query
+    differ in length by at most d, so a search only reads the postings of 2 * d + 1 lengths.
+    Ids only grow, so the posting arrays stay sorted and can be probed with binary search.
+    A removed key leaves a tombstone in the postings; the postings are rebuilt when
+    more than half of the ids are dead.
+
+    One edit changes at most 3 trigrams, so a key within distance d of the query shares
+    at least len(trigrams(query)) - 3 * d trigrams with it. With numpy the postings of all
+    trigrams of the query are counted at once; without it, candidates are counted in the
+    rarest trigrams of the query and the other trigrams are checked by binary search.
+    Only the keys sharing enough trigrams are compared with edit_distance.
+    '''
+    def __init__(self, keys=()):
+        self.__clear()
+        self.update(keys)
+
+    def __clear(self) -> None:
+        '''
+        Drop all keys and postings.
+        '''
+        self.__keys = []
+        self.__ids = {}
+        self.__postings = {}
+
+    def add(self, key: str) -> None:
+        '''
+        Insert a key into the index if it is not present yet.
+
+        Args:
+            key (str): The key to insert.
+        '''
+        if key in self.__ids:
+            return
+        key_id = len(self.__keys)
+        self.__keys.append(key)
+        self.__ids[key] = key_id
+        length = len(key)
+        for gram in trigrams(key):
+            posting = self.__postings.get((gram, length))
+            if posting is None:
+                posting = self.__postings[gram, length] = array('i')
+            posting.append(key_id)
+
+    def update(self, keys) -> None:
+        '''
+        Insert a batch of keys into the index.
+
+        Args:
+            keys (Iterable[str]): The keys to insert.
+        '''
+        for key in keys:
+            self.add(key)
+
+    def discard(self, key: str) -> None:
+        '''
+        Remove a key from the index if it is present.
+
+        Args:
+            key (str): The key to remove.
+        '''
+        key_id = self.__ids.pop(key, None)
+        if key_id is None:
+            return
+        self.__keys[key_id] = None
+        if len(self.__ids) * 2 < len(self.__keys):
+            self.__rebuild()
+
+    def __rebuild(self) -> None:
+        '''
+        Rebuild the postings without the removed keys.
+        '''
+        keys = [key for key in self.__keys if key is not None]
+        self.__clear()
+        self.update(keys)
+
+    def search(self, query: str, limit: int | None = FUZZY_LIMIT, max_distance: int | None = None) -> list[tuple[str, int]]:
+        '''
+        Find the keys closest to the query by edit distance.
+        The distance limit is raised step by step, so the search stops as soon as
+        the closest keys fill the limit.
+
+        Args:
+            query (str): The searched text.
+            limit (int | None): The maximum number of keys to return, all keys within max_distance if None.
+            max_distance (int | None): The largest tolerated edit distance, see default_distance if None.
+        Returns:
+            list: (key, distance) tuples, closest first and alphabetical within the same distance.
+        '''
+        if max_distance is None:
+            max_distance = default_distance(query)
+        found = {}
+        for distance in range(max_distance + 1):
+            for key_id in self.__candidates(query, distance):
+                key = self.__keys[key_id]
+                if key not in found:
+                    key_distance = edit_distance(query, key, distance)
+                    if key_distance <= distance:
+                        found[key] = key_distance
+            if limit is not None and len(found) >= limit:
+                break
+        matches = sorted(found.items(), key=lambda item: (item[1], item[0]))
+        return matches if limit is None else matches[:limit]
+
+    def __candidates(self, query: str, distance: int):
+        '''
+        Get the ids of the keys that can be within the distance of the query.
+
+        Args:
+            query (str): The searched text.
+            distance (int): The tolerated edit distance.
+        Returns:
+            Iterator: The ids of the live candidate keys.
+        '''
+        if distance == 0:
+            key_id = self.__ids.get(query)
+            return [] if key_id is None else [key_id]
+
+        keys = self.__keys
+        lengths = range(max(0, len(query) - distance), len(query) + distance + 1)
+        grams = trigrams(query)
+        needed = len(grams) - 3 * distance
+        if needed <= 0:
+            # The query is too short for the trigram filter, only the length filter applies
+            return (key_id for key_id, key in enumerate(keys) if key is not None and len(key) in lengths)
+
+        postings = self.__postings
+        if numpy is not None:
+            # Count every trigram of the query at once, no binary search is needed
+            chunks = [numpy.frombuffer(posting, dtype=numpy.intc) for gram in grams for length in lengths
+                      if (posting := postings.get((gram, length)))]
+            if not chunks:
+                return []
+            counts = numpy.bincount(numpy.concatenate(chunks))
+            return (key_id for key_id in numpy.flatnonzero(counts >= needed).tolist() if keys[key_id] is not None)
+
+        sizes = {gram: sum(len(postings.get((gram, length), ())) for length in lengths) for gram in grams}
+        ranked = sorted(grams, key=sizes.get)
+        # A candidate must contain at least one of the len(grams) - needed + 1 rarest trigrams.
+        # Further trigrams are counted while their postings are not longer than the counted ones,
+        # every counted trigram raises the number of hits a candidate needs before the binary search
+        probe_count = len(grams) - needed + 1
+        counted = sum(sizes[gram] for gram in ranked[:probe_count])
+        while probe_count < len(ranked) and sizes[ranked[probe_count]] <= counted:
+            counted += sizes[ranked[probe_count]]
+            probe_count += 1
+        counts = Counter()
+        for gram in ranked[:probe_count]:
+            for length in lengths:
+                counts.update(postings.get((gram, length), ()))
+        others = ranked[probe_count:]
+        threshold = needed - len(others)
+        return (key_id for key_id, count in counts.items()
+                if count >= threshold and keys[key_id] is not None
+                and self.__shares_enough(key_id, len(keys[key_id]), count, others, needed))
+
+    def __shares_enough(self, key_id: int, length: int, count: int, others: list, needed: int) -> bool:
+        '''
+        Check if a key has at least the needed number of trigrams in common with the query.
+
+        Args:
+            key_id (int): The id of the key.
+            length (int): The length of the key.
+            count (int): The number of shared trigrams already found in the counted postings.
+            others (list): The trigrams of the query not counted yet.
+            needed (int): The required number of shared trigrams.
+        Returns:
+            bool: True if the key shares enough trigrams.
+        '''
+        remaining = len(others)
+        for gram in others:
+            if count >= needed:
+                return True
+            if count + remaining < needed:
+                return False
+            posting = self.__postings.get((gram, length))
+            if posting:
+                position = bisect_left(posting, key_id)
+                if position < len(posting) and posting[position] == key_id:
+                    count += 1
+            remaining -= 1
+        return count >= needed
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __contains__(self, key):
+        return key in self.__ids
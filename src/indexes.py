@@ -0,0 +1,439 @@
+from array import array
+from bisect import bisect_left
+from heapq import merge
+import re
+from types import MappingProxyType
+from wildcard import compile_pattern
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The largest code point, used as an upper bound for prefix ranges
+_MAX_CHAR = chr(0x10FFFF)
+
+# Phones are stored as '+380' followed by 9 subscriber digits
+_COUNTRY_DIGITS = "380"
+_SUBSCRIBER_LEN = 9
+
+# Suffixes are encoded as base-11 numbers, the digit d becomes d + 1 and 0 pads short suffixes,
+# so the numeric order of the codes is the lexicographic order of the suffixes
+_BASE11_DIGITS = str.maketrans("0123456789", "123456789a")
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+# (11 ** (9 - offset), 11 ** offset) for every offset of a suffix in the subscriber digits
+_SUFFIX_SHIFTS = [(11 ** (_SUBSCRIBER_LEN - offset), 11 ** offset) for offset in range(_SUBSCRIBER_LEN)]
+
+# Minimum number of pending phones merged into the suffix array at once
+_MIN_MERGE = 1024
+
+
+class HashIndex:
+    '''
+    Secondary hash index that maps a field value to the records holding it.
+    Several records may share the same value (e.g. a family phone), so every key
+    points to a dictionary of records keyed by the record's name key.
+    '''
+    def __init__(self):
+        self.__buckets = {}
+
+    def add(self, key, name_key: str, record) -> None:
+        '''
+        Register a record under the given key.
+
+        Args:
+            key (Hashable): The indexed value.
+            name_key (str): The lowercased name of the record.
+            record (Record): The record holding the value.
+        '''
+        self.__buckets.setdefault(key, {})[name_key] = record
+
+    def discard(self, key, name_key: str) -> None:
+        '''
+        Remove a record from the given key if it is registered there.
+
+        Args:
+            key (Hashable): The indexed value.
+            name_key (str): The lowercased name of the record.
+        '''
+        bucket = self.__buckets.get(key)
+        if bucket is not None:
+            bucket.pop(name_key, None)
+            if not bucket:
+                del self.__buckets[key]
+
+    def get(self, key) -> list:
+        '''
+        Get all records registered under the given key.
+
+        Args:
+            key (Hashable): The indexed value.
+        Returns:
+            list: The records holding the value, empty if there are none.
+        '''
+        bucket = self.__buckets.get(key)
+        return list(bucket.values()) if bucket else []
+
+    def postings(self, key) -> MappingProxyType:
+        '''
+        Get the records registered under the given key as a read-only mapping.
+        The keys view of the mapping supports set operations, so postings can be
+        intersected and merged without copying them first.
+
+        Args:
+            key (Hashable): The indexed value.
+        Returns:
+            MappingProxyType: The records keyed as they were added, empty if there are none.
+        '''
+        return MappingProxyType(self.__buckets.get(key, {}))
+
+    def count(self, key) -> int:
+        '''
+        Count the records registered under the given key.
+
+        Args:
+            key (Hashable): The indexed value.
+        Returns:
+            int: The number of records holding the value.
+        '''
+        bucket = self.__buckets.get(key)
+        return len(bucket) if bucket else 0
+
+    def counts(self) -> dict:
+        '''
+        Count the records registered under every key.
+
+        Returns:
+            dict: The number of records keyed by the indexed value.
+        '''
+        return {key: len(bucket) for key, bucket in self.__buckets.items()}
+
+    def clear(self) -> None:
+        '''
+        Remove all keys from the index.
+        '''
+        self.__buckets.clear()
+
+    def __len__(self):
+        return len(self.__buckets)
+
+    def __iter__(self):
+        return iter(self.__buckets)
+
+    def __contains__(self, key):
+        return key in self.__buckets
+
+
+class SortedIndex:
+    '''
+    Ordered index of string keys kept in a sorted array.
+    Keys are found with binary search, so prefix queries take O(log n + k),
+    where k is the number of keys with the prefix.
+    '''
+    def __init__(self, keys=()):
+        self.__keys = sorted(set(keys))
+
+    def add(self, key: str) -> None:
+        '''
+        Insert a key into the index if it is not present yet.
+
+        Args:
+            key (str): The key to insert.
+        '''
+        position = bisect_left(self.__keys, key)
+        if position == len(self.__keys) or self.__keys[position] != key:
+            self.__keys.insert(position, key)
+
+    def update(self, keys) -> None:
+        '''
+        Insert a batch of keys into the index.
+        The new keys are sorted and merged with the existing ones in one pass.
+
+        Args:
+            keys (Iterable[str]): The keys to insert.
+        '''
+        new_keys = sorted(set(key for key in keys if key not in self))
+        if new_keys:
+            self.__keys += new_keys
+            # Timsort merges the two sorted runs in linear time
+            self.__keys.sort()
+
+    def discard(self, key: str) -> None:
+        '''
+        Remove a key from the index if it is present.
+
+        Args:
+            key (str): The key to remove.
+        '''
+        position = bisect_left(self.__keys, key)
+        if position < len(self.__keys) and self.__keys[position] == key:
+            del self.__keys[position]
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        '''
+        Get the positions of the keys that start with the prefix.
+
+        Args:
+            prefix (str): The prefix of the keys.
+        Returns:
+            tuple: The start (inclusive) and end (exclusive) positions of the keys.
+        '''
+        start = bisect_left(self.__keys, prefix)
+        end = bisect_left(self.__keys, prefix + _MAX_CHAR, start)
+        return start, end
+
+    def with_prefix(self, prefix: str, limit: int | None = None) -> list[str]:
+        '''
+        Get the keys that start with the prefix in sorted order.
+
+        Args:
+            prefix (str): The prefix of the keys.
+            limit (int | None): The maximum number of keys to return, all keys if None.
+        Returns:
+            list: The keys that start with the prefix.
+        '''
+        start, end = self.prefix_range(prefix)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.__keys[start:end]
+
+    def count_prefix(self, prefix: str) -> int:
+        '''
+        Count the keys that start with the prefix.
+
+        Args:
+            prefix (str): The prefix of the keys.
+        Returns:
+            int: The number of keys with the prefix.
+        '''
+        start, end = self.prefix_range(prefix)
+        return end - start
+
+    def clear(self) -> None:
+        '''
+        Remove all keys from the index.
+        '''
+        self.__keys.clear()
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __iter__(self):
+        return iter(self.__keys)
+
+    def __getitem__(self, position):
+        return self.__keys[position]
+
+    def __contains__(self, key):
+        position = bisect_left(self.__keys, key)
+        return position < len(self.__keys) and self.__keys[position] == key
+
+
+def _encode_suffix(digits: str) -> int:
+    '''
+    Encode a suffix of the subscriber digits as a number that sorts like the suffix.
+    '''
+    return int(digits.translate(_BASE11_DIGITS).ljust(_SUBSCRIBER_LEN, "0"), 11)
+
+
+class PhoneSuffixIndex:
+    '''
+    Suffix array over the subscriber digits of '+380XXXXXXXXX' phones.
+    Every suffix of the 9 subscriber digits is stored as one 64-bit entry: the encoded suffix
+    in the high bits and the id of the phone in the low bits. The entries are sorted, so all
+    phones containing a run of digits are found with two binary searches over the suffixes
+    starting with it, and the phones ending with the digits with two binary searches over one suffix.
+
+    New phones are kept in a pending list, which is checked directly and merged into the array
+    in batches; the merge is vectorized with NumPy when it is installed. Removed phones leave tombstones that are dropped when more than half of the ids are dead.
+    '''
+    def __init__(self, phones=()):
+        self.__clear()
+        self.update(phones)
+
+    def __clear(self) -> None:
+        '''
+        Drop all phones and entries.
+        '''
+        self.__phones = []
+        self.__ids = {}
+        self.__entries = array('Q')
+        self.__pending = []
+
+    def add(self, phone: str) -> None:
+        '''
+        Insert a phone into the index if it is not present yet.
+
+        Args:
+            phone (str): The phone in the +380XXXXXXXXX format.
+        '''
+        self.__insert(phone)
+        if len(self.__pending) > max(_MIN_MERGE, len(self.__ids) // 8):
+            self.__merge()
+
+    def update(self, phones) -> None:
+        '''
+        Insert a batch of phones into the index and merge them into the suffix array at once.
+
+        Args:
+            phones (Iterable[str]): The phones to insert.
+        '''
+        for phone in phones:
+            self.__insert(phone)
+        self.__merge()
+
+    def __insert(self, phone: str) -> None:
+        '''
+        Register a phone and put it into the pending list.
+        '''
+        if phone in self.__ids:
+            return
+        phone_id = len(self.__phones)
+        self.__phones.append(phone)
+        self.__ids[phone] = phone_id
+        self.__pending.append(phone_id)
+
+    def __merge(self) -> None:
+        '''
+        Merge the suffixes of the pending phones into the sorted entries.
+        '''
+        if not self.__pending:
+            return
+        phone_ids = [phone_id for phone_id in self.__pending if self.__phones[phone_id] is not None]
+        codes = [_encode_suffix(self.__phones[phone_id][-_SUBSCRIBER_LEN:]) for phone_id in phone_ids]
+        self.__pending.clear()
+
+        if numpy is not None:
+            moduli, shifts = (numpy.array(column, dtype=numpy.uint64) for column in zip(*_SUFFIX_SHIFTS))
+            suffixes = ((numpy.array(codes, dtype=numpy.uint64)[:, None] % moduli * shifts) << numpy.uint64(_ID_BITS)
+                        | numpy.array(phone_ids, dtype=numpy.uint64)[:, None])
+            entries = numpy.concatenate([numpy.frombuffer(self.__entries, dtype=numpy.uint64), suffixes.ravel()])
+            entries.sort()
+            self.__entries = array('Q', entries.tobytes())
+            return
+
+        new_entries = []
+        for code, phone_id in zip(codes, phone_ids):
+            # The code of a suffix is the tail of the code of all subscriber digits, shifted left
+            new_entries.extend(((code % modulo * shift) << _ID_BITS) | phone_id for modulo, shift in _SUFFIX_SHIFTS)
+        new_entries.sort()
+        if self.__entries:
+            new_entries = merge(self.__entries, new_entries)
+        self.__entries = array('Q', new_entries)
+
+    def discard(self, phone: str) -> None:
+        '''
+        Remove a phone from the index if it is present.
+
+        Args:
+            phone (str): The phone to remove.
+        '''
+        phone_id = self.__ids.pop(phone, None)
+        if phone_id is None:
+            return
+        self.__phones[phone_id] = None
+        if len(self.__ids) * 2 < len(self.__phones):
+            phones = [phone for phone in self.__phones if phone is not None]
+            self.__clear()
+            self.update(phones)
+
+    def search(self, pattern: str) -> list[str] | None:
+        '''
+        Find the phones matching a LIKE-style pattern, e.g. '%4477' or '%447%'.
+        The index narrows the phones down by the longest run of digits in the pattern,
+        every candidate is then checked against the whole pattern.
+
+        Args:
+            pattern (str): The phone pattern with '%' and '_' wildcards.
+        Returns:
+            list | None: The matching phones, or None if the pattern has no digits to search by.
+        '''
+        candidates = self.__candidates(pattern)
+        if candidates is None:
+            return None
+        matches = compile_pattern(pattern)
+        return [phone for phone_id in candidates
+                if (phone := self.__phones[phone_id]) is not None and matches(phone)]
+
+    def estimate(self, pattern: str) -> int | None:
+        '''
+        Estimate the number of candidates the index yields for a pattern.
+
+        Args:
+            pattern (str): The phone pattern with '%' and '_' wildcards.
+        Returns:
+            int | None: The number of candidate entries, or None if the pattern has no digits to search by.
+        '''
+        ranges = self.__ranges(pattern)
+        if ranges is None:
+            return None
+        return sum(end - start for start, end in ranges) + len(self.__pending)
+
+    def __candidates(self, pattern: str):
+        '''
+        Get the ids of the phones that can match the pattern, without duplicates.
+        '''
+        ranges = self.__ranges(pattern)
+        if ranges is None:
+            return None
+        entries = self.__entries
+        ids = dict.fromkeys(entries[position] & _ID_MASK for start, end in ranges for position in range(start, end))
+        ids.update(dict.fromkeys(self.__pending))
+        return ids
+
+    def __ranges(self, pattern: str) -> list[tuple[int, int]] | None:
+        '''
+        Get the positions of the entries that can match the pattern.
+
+        Args:
+            pattern (str): The phone pattern with '%' and '_' wildcards.
+        Returns:
+            list | None: (start, end) ranges of entries, None if every phone can match.
+        '''
+        literal = pattern[1:]
+        if pattern.startswith("%") and literal.isascii() and literal.isdecimal():
+            # The phone ends with the digits, only one suffix can match
+            code = _encode_suffix(literal[-_SUBSCRIBER_LEN:])
+            return [self.__range(code, code + 1)]
+
+        runs = [run.lstrip('+') for run in re.split('[%_]', pattern)]
+        if any(not (run.isascii() and run.isdecimal()) for run in runs if run):
+            # Phones only contain digits after the '+'
+            return []
+        digits = max(runs, key=len)
+        if not digits or digits in _COUNTRY_DIGITS:
+            return None
+
+        ranges = []
+        if len(digits) <= _SUBSCRIBER_LEN:
+            ranges.append(self.__prefix_range(digits))
+        # The digits may also start in the country code and continue in the subscriber digits
+        for start in range(len(_COUNTRY_DIGITS)):
+            head = _COUNTRY_DIGITS[start:]
+            rest = digits[len(head):]
+            if digits.startswith(head) and 0 < len(rest) <= _SUBSCRIBER_LEN:
+                ranges.append(self.__prefix_range(rest))
+        return ranges
+
+    def __prefix_range(self, digits: str) -> tuple[int, int]:
+        '''
+        Get the positions of the entries whose suffix starts with the digits.
+        '''
+        code = _encode_suffix(digits)
+        return self.__range(code, code + 11 ** (_SUBSCRIBER_LEN - len(digits)))
+
+    def __range(self, low_code: int, high_code: int) -> tuple[int, int]:
+        '''
+        Get the positions of the entries with suffix codes in [low_code, high_code).
+        '''
+        start = bisect_left(self.__entries, low_code << _ID_BITS)
+        end = bisect_left(self.__entries, high_code << _ID_BITS, start)
+        return start, end
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __contains__(self, phone):
+        return phone in self.__ids
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import config
+from addressbook import Record
+from file_serializer import SerializedObject
+from notebook import Note, Notebook
+
+logger = logging.getLogger(__name__)
+
+# Suffix of the journal file, appended to the name of the snapshot file
+JOURNAL_SUFFIX = ".journal"
+
+
+class _RecordOperations:
+    '''
+    Journal operations of an address book. A record is journaled as a whole under its lowercased name,
+    so replaying an operation twice gives the same result.
+    '''
+    @staticmethod
+    def key(record: Record) -> str:
+        '''
+        The key the item is journaled under.
+        '''
+        return record.name.value.lower()
+
+    @staticmethod
+    def put(record: Record) -> dict:
+        '''
+        The operation storing the whole item.
+        '''
+        return {"op": "put", "record": record.__getstate__()}
+
+    @staticmethod
+    def delete(key: str) -> dict:
+        '''
+        The operation removing the item with the key.
+        '''
+        return {"op": "del", "name": key}
+
+    @staticmethod
+    def apply(book, operation: dict) -> None:
+        '''
+        Apply an operation read from the journal to the collection.
+        '''
+        if operation["op"] == "put":
+            book.add_record(Record.restore(operation["record"]))
+        else:
+            book.remove(operation["name"])
+
+
+class _NoteOperations:
+    '''
+    Journal operations of a notebook. A note is journaled as a whole under its id,
+    so replaying an operation twice gives the same result.
+    '''
+    @staticmethod
+    def key(note: Note) -> int:
+        '''
+        The key the item is journaled under.
+        '''
+        return note.id
+
+    @staticmethod
+    def put(note: Note) -> dict:
+        '''
+        The operation storing the whole item.
+        '''
+        state = note.__getstate__()
+        return {"op": "put", "note": dict(state, tags=sorted(state["tags"]))}
+
+    @staticmethod
+    def delete(key: int) -> dict:
+        '''
+        The operation removing the item with the key.
+        '''
+        return {"op": "del", "id": key}
+
+    @staticmethod
+    def apply(notebook: Notebook, operation: dict) -> None:
+        '''
+        Apply an operation read from the journal to the collection.
+        '''
+        state = operation["note"] if operation["op"] == "put" else {"id": operation["id"]}
+        existing = notebook.find_note_by_id(state["id"])
+        if existing is not None:
+            notebook.remove_note(existing)
+        if operation["op"] == "put":
+            note = Note.__new__(Note)
+            note.__setstate__(state)
+            notebook.add_note(note)
+            Note.current_id = max(Note.current_id, note.id)
+
+
+class JournaledObject:
+    '''
+    Persistence of an address book or a notebook as a snapshot and an append-only journal.
+    The snapshot is the pickle written by SerializedObject. Every change of the collection is recorded,
+    and commit appends one line per changed record or note to the journal, so saving costs O(changes).
+    On load the snapshot is read and the journal is replayed over it. Once the journal grows past
+    a size threshold it is compacted: the snapshot is rewritten and the journal is emptied,
+    which bounds the time of the replay.
+
+    Attributes:
+        object (AddressBook | Notebook): The persisted collection.
+    '''
+    def __init__(self, filename: str, object, max_journal_bytes: int | None = None):
+        '''
+        Load the collection from the snapshot and the journal.
+
+        Args:
+            filename (str): The name of the snapshot file, the journal is stored next to it.
+            object (AddressBook | Notebook): The empty collection used when there is no snapshot.
+            max_journal_bytes (int | None): The journal size that triggers a compaction,
+                                            config.JOURNAL_MAX_BYTES if None.
+        '''
+        self.__snapshot = SerializedObject(filename, object)
+        self.object = self.__snapshot.object
+        self.__operations = _NoteOperations if isinstance(self.object, Notebook) else _RecordOperations
+        self.__journal_name = filename + JOURNAL_SUFFIX
+        self.__max_bytes = config.JOURNAL_MAX_BYTES if max_journal_bytes is None else max_journal_bytes
+        self.__pending = {}
+        self.__size = 0
+        self.replayed = self.__replay()
+        self.object.add_listener(self.__on_change)
+        if self.__size > self.__max_bytes:
+            self.compact()
+
+    @property
+    def journal_size(self) -> int:
+        '''
+        The size of the journal in bytes.
+        '''
+        return self.__size
+
+    def commit(self) -> None:
+        '''
+        Append the changes made since the last commit to the journal and flush it to disk.
+        The journal is compacted if it has grown past the threshold.
+
+        Raises:
+            OSError: If the journal cannot be written; the changes are kept for the next commit.
+        '''
+        if not self.__pending:
+            return
+        operations = self.__operations
+        lines = [json.dumps(operations.delete(key) if item is None else operations.put(item),
+                            ensure_ascii=False, separators=(",", ":")) + "\n"
+                 for key, item in self.__pending.items()]
+        data = "".join(lines).encode("utf-8")
+        with open(self.__journal_name, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.__size += len(data)
+        self.__pending.clear()
+        if self.__size > self.__max_bytes:
+            self.compact()
+
+    def compact(self) -> None:
+        '''
+        Write a new snapshot of the collection and empty the journal.
+        Uncommitted changes are part of the snapshot, so they are not journaled.
+        The journal is emptied only after the snapshot is written; if the program stops in between,
+        replaying the journal over the new snapshot gives the same collection.
+        '''
+        self.__pending.clear()
+        self.__snapshot.save_data()
+        with open(self.__journal_name, "wb"):
+            pass
+        self.__size = 0
+
+    def save_data(self) -> None:
+        '''
+        Save the changes, see commit.
+        '''
+        self.commit()
+
+    def save_in_background(self, lock) -> None:
+        '''
+        Nothing is left to save, every change is journaled by commit.
+        '''
+
+    def __on_change(self, item, field, old_value, new_value) -> None:
+        '''
+        Remember a changed, added or removed item until the next commit.
+        '''
+        removed = field is None and new_value is None
+        self.__pending[self.__operations.key(item)] = None if removed else item
+
+    def __replay(self) -> int:
+        '''
+        Apply the journal to the collection loaded from the snapshot.
+        A last line without a line break was cut by a crash during a commit; it is dropped from the file.
+
+        Returns:
+            int: The number of replayed operations.
+        '''
+        try:
+            with open(self.__journal_name, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            with open(self.__journal_name, "r+b") as f:
+                f.truncate(end)
+        self.__size = end
+        replayed = 0
+        for number, line in enumerate(data[:end].splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                operation = json.loads(line)
+            except ValueError:
+                logger.warning("%s: skipped invalid line %d", self.__journal_name, number)
+                continue
+            self.__operations.apply(self.object, operation)
+            replayed += 1
+        return replayed
@@ -0,0 +1,49 @@
+class ListenerRegistry:
+    '''
+    Registry of the listeners notified about the changes of a collection and of its items.
+    A listener is a callable taking the changed item, the name of the changed field and the old
+    and new values of the field. When a whole item is added to or removed from the collection,
+    the field is None, the old value is None for an added item and the new value is None for a removed one.
+    Listeners are not pickled with their collection.
+    '''
+    def __init__(self):
+        '''
+        Initialize an empty registry.
+        '''
+        self.__listeners = []
+
+    def add(self, listener) -> None:
+        '''
+        Register a listener. A listener registered twice is notified once.
+
+        Args:
+            listener (callable): The function called as listener(item, field, old_value, new_value).
+        '''
+        if listener not in self.__listeners:
+            self.__listeners.append(listener)
+
+    def discard(self, listener) -> None:
+        '''
+        Unregister a listener if it is registered.
+
+        Args:
+            listener (callable): The registered function.
+        '''
+        if listener in self.__listeners:
+            self.__listeners.remove(listener)
+
+    def notify(self, item, field: str | None, old_value, new_value) -> None:
+        '''
+        Call every listener with the change, in the order they were registered.
+
+        Args:
+            item: The changed, added or removed item.
+            field (str | None): The name of the changed field, None if the whole item was added or removed.
+            old_value: The previous value, None if the value or the item was added.
+            new_value: The new value, None if the value or the item was removed.
+        '''
+        for listener in tuple(self.__listeners):
+            listener(item, field, old_value, new_value)
+
+    def __len__(self):
+        return len(self.__listeners)
@@ -1,6 +1,18 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from addressbook import AddressBook, Record
 from notebook import Notebook, Note
+from text_index import SEARCH_LIMIT
 from file_serializer import SerializedObject
+from journal import JournaledObject
+from sqlite_storage import SqliteObject
+from snapshot import open_snapshot
+from columnar_addressbook import open_columnar
+from background import BackgroundStorage
+from autosave import Autosaver
+import config
+from contact_import import import_contacts
+import wildcard
 from exceptions import error_handler, InputError
 from console_prompt import Command as ECommand
 from console_prompt import CommandPrompt, ContactKeys
@@ -8,6 +20,42 @@ from console_output import ConsoleOutput
 from console_prompt import command_descriptions
 
 
+# Storage backends by config.STORAGE_MODE; a backend is created as backend(filename, empty collection)
+# and provides the stored collection as its object attribute, commit, save_data and save_in_background
+STORAGE_BACKENDS = {"journal": JournaledObject, "pickle": SerializedObject, "sqlite": SqliteObject,
+                    "snapshot": open_snapshot, "columnar": open_columnar}
+
+
+def open_storage(filename: str, default):
+    '''
+    Open the storage of a collection in the mode selected by config.STORAGE_MODE.
+
+    Args:
+        filename (str): The name of the file the collection is stored in.
+        default (AddressBook | Notebook): The empty collection used when the file does not exist.
+    Returns:
+        JournaledObject | SerializedObject | SqliteObject | SnapshotObject: The storage,
+            its object is the collection.
+    '''
+    return STORAGE_BACKENDS[config.STORAGE_MODE](filename, default)
+
+
+def resolve(receiver):
+    '''
+    Get the collections a command operates on, waiting for the storages that are still loading.
+
+    Args:
+        receiver: The receiver of the command: a BackgroundStorage, a tuple of receivers or any other object.
+    Returns:
+        The collection of a storage, a tuple of resolved receivers or the receiver itself.
+    '''
+    if isinstance(receiver, BackgroundStorage):
+        return receiver.object
+    if isinstance(receiver, tuple):
+        return tuple(resolve(item) for item in receiver)
+    return receiver
+
+
 ############################ bot's commands #########################################
 @error_handler
 def add_contact(kwards, book: AddressBook) -> None:
@@ -138,38 +186,34 @@ def remove_contact(kwards, book: AddressBook) -> None:
 def find_contact(kwards, book: AddressBook) -> None:
     '''
     Find a contact in the address book.
-    The function takes keyword arguments for contact details and searches for the contact in the book.
+    The function takes keyword arguments for contact details and searches for the contacts matching
+    all of them ('and' mode, by default) or any of them ('or' mode).
+    The 'name~' criterion finds the closest names even if the entered name has typos.
+    If 'explain' is set, the query plan of the search is printed before the results.
 
     Args:
-        kwards (dict): The keyword arguments containing contact details.
+        kwards (dict): The keyword arguments containing contact details, the mode and the explain flag.
         book (AddressBook): The address book instance.
     Raises:
         InputError: If the contact details are invalid.
     '''
-    name = kwards.get("name")
-    phone = kwards.get("phone")
-    email = kwards.get("email")
-    address = kwards.get("address")
-    birthday = kwards.get("birthday")
-    if len(kwards) == 0:
+    criteria = {key: kwards[key] for key in ("name", "name~", "phone", "email", "address", "birthday") if kwards.get(key)}
+    mode = kwards.get("mode", "and").lower()
+    if len(criteria) == 0:
         raise InputError("find - too less parameters were entered")
 
-    res = None
-    if name:
-        res = book.find_records(name, 'name')
-    if phone:
-        res = book.find_records(phone, 'phone')
-    if email:
-        res = book.find_records(email, 'email')
-    if address:
-        res = book.find_records(address, 'address')
-    if birthday:
-        res = book.find_records(birthday, 'birthday')
+    if kwards.get("explain"):
+        if not hasattr(book, "plan_query"):
+            raise InputError("find - explain is not supported by this storage mode")
+        for line in book.plan_query(criteria, mode).describe():
+            ConsoleOutput().print_msg(line)
+
+    res = book.find_records(criteria, mode=mode)
 
     if not res:
-        k = next(iter(kwards))
+        described = f" {mode} ".join(f"{k} = {v}" for k, v in criteria.items())
         ConsoleOutput().print_msg(
-            f"Contact not found for criteria: {k} = {kwards[k]}")
+            f"Contact not found for criteria: {described}")
     else:
         ConsoleOutput().print_object_list(res)
 
@@ -249,9 +293,30 @@ def show_all_contacts(kwards, books: list[AddressBook]) -> None:
          InputError: If the request details are invalid.
     '''
     if "notes" in kwards:
-        ConsoleOutput().print_object_list(books[1].get_notes())
+        notes = books[1].get_notes()
+        show_pages(lambda offset, limit: notes[offset:offset + limit], len(notes))
     else:
-        ConsoleOutput().print_object_list(books[0].get_all_contacts())
+        show_pages(books[0].iter_contacts, len(books[0]))
+
+
+def show_pages(get_page, total: int) -> None:
+    '''
+    Show a list of objects one screen at a time.
+    The function requests only the page being displayed and asks the user before showing the next one.
+
+    Args:
+        get_page (callable): The function that takes an offset and a limit and returns the objects of the page.
+        total (int): The total number of objects.
+    '''
+    page_size = ConsoleOutput().page_size
+    if total == 0:
+        ConsoleOutput().print_object_list([])
+        return
+    for offset in range(0, total, page_size):
+        ConsoleOutput().print_object_list(list(get_page(offset, page_size)))
+        shown = min(offset + page_size, total)
+        if shown < total and not ConsoleOutput().ask_next_page(shown, total):
+            break
 
 
 @error_handler
@@ -276,6 +341,64 @@ def birthdays(kwards, book: AddressBook) -> None:
     ConsoleOutput().print_map(("Name", "Birthday"), book.get_upcoming_birthdays(days))
 
 
+@error_handler
+def import_file(kwards, book: AddressBook) -> None:
+    '''
+    Import contacts from a CSV or JSONL file into the address book.
+    The file is imported in chunks; invalid rows are reported and skipped.
+
+    Args:
+        kwards (dict): The keyword arguments containing the path to the file.
+        book (AddressBook): The address book instance.
+    Raises:
+        InputError: If the path is not provided or the file format is not supported.
+    '''
+    path = kwards.get("file")
+    if not path:
+        raise InputError("import - no file was entered")
+
+    report = import_contacts(path, book)
+    ConsoleOutput().print_msg(
+        f"Imported {report.imported} of {report.rows} contacts in {report.elapsed:.2f} s "
+        f"({report.rows_per_sec:.0f} rows/sec)")
+    if report.duplicates:
+        ConsoleOutput().print_msg(f"{report.duplicates} rows repeated a name and replaced the previous contact")
+    if report.errors:
+        ConsoleOutput().print_error(f"{len(report.errors)} rows were rejected:")
+        ConsoleOutput().print_map(("Line", "Error"), dict(report.errors[:20]))
+
+
+@error_handler
+def show_domains(kwards, book: AddressBook) -> None:
+    '''
+    Show the number of contacts per email domain.
+    The counts are taken from the domain index of the address book, without scanning the contacts.
+
+    Args:
+        kwards (dict): The keyword arguments containing the request details.
+        book (AddressBook): The address book instance.
+    '''
+    ConsoleOutput().print_map(("Domain", "Contacts"), book.get_domain_counts())
+
+
+@error_handler
+def show_stats(kwards, books: list) -> None:
+    '''
+    Show the statistics of the search caches and indexes.
+    The function prints the hits and misses of the contact and note result caches
+    and of the compiled pattern cache, and the size of the note full-text index.
+
+    Args:
+        kwards (dict): The keyword arguments containing the request details.
+        books (list): The address book and the notebook.
+    '''
+    book, notebook = books
+    ConsoleOutput().print_map_with_title("Contact search cache", book.query_cache_stats())
+    ConsoleOutput().print_map_with_title("Note search cache", notebook.query_cache_stats())
+    ConsoleOutput().print_map_with_title("Pattern cache", wildcard.cache_info())
+    ConsoleOutput().print_map_with_title("Note text index", notebook.text_index_stats())
+
+
 @error_handler
 def show_help(kwards=None, _=None):
     '''
@@ -350,9 +473,9 @@ def change_note(kwards, notebook: Notebook) -> None:
     message = f"Note {note.id} was updated"
     if note:
         if new_text:
-            note.text = new_text
+            note.change_text(new_text)
         elif new_title:
-            note.title = new_title
+            note.change_title(new_title)
         elif old_tag or new_tag:
             if old_tag and new_tag:
                 remove_success = note.remove_tag(old_tag)
@@ -482,9 +605,9 @@ def show_notes(kwards, notebook: Notebook) -> None:
 @error_handler
 def find_notes(kwards, notebook: Notebook) -> None:
     '''
-    Find notes by tags in the notebook.
-    The function takes keyword arguments for tags and searches for notes that match the specified tags.
-    If the tags are not provided, it raises an error.
+    Find notes by id, title, text or a tag query in the notebook.
+    The tag query combines tags with ',' (any of), '+' (all of) and '-' (none of),
+    e.g. 'work+urgent,home,-done'.
     Args:
         kwards (dict): The keyword arguments containing the tags to search for.
         notebook (Notebook): The notebook instance.
@@ -496,7 +619,6 @@ def find_notes(kwards, notebook: Notebook) -> None:
     text = kwards.get("text")
     tags_str = kwards.get("tags")
 
-    tags = {}
     res = []
     if id:
         res.append(notebook.find_note_by_id(int(id)))
@@ -505,13 +627,37 @@ def find_notes(kwards, notebook: Notebook) -> None:
     elif text:
         res = notebook.find_note(text, "text")
     elif tags_str:
-        tags_str = tags_str.lower().strip()
-        tags = set(tags_str.split(","))
-        res = notebook.find_note_by_tags(tags)
+        res = notebook.find_note_by_tag_query(tags_str)
 
     ConsoleOutput().print_object_list(sorted(res))
 
 
+@error_handler
+def search_notes(kwards, notebook: Notebook) -> None:
+    '''
+    Full-text search of the notes in the notebook.
+    The notes containing any of the searched words in the title or the text are shown,
+    the most relevant first; words found in the title weigh more.
+
+    Args:
+        kwards (dict): The keyword arguments containing the searched words and the number of results.
+        notebook (Notebook): The notebook instance.
+    Raises:
+        InputError: If the query is missing or the limit is not a positive integer.
+    '''
+    query = kwards.get("query")
+    if not query:
+        raise InputError("search - query is required")
+    limit = kwards.get("limit", SEARCH_LIMIT)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InputError(f"search - limit {limit} must be a positive integer")
+    if limit < 1:
+        raise InputError(f"search - limit {limit} must be more than 0")
+    ConsoleOutput().print_object_list([note for note, _ in notebook.search_notes(query, limit)])
+
+
 @error_handler
 def say_bye(kwards, bot):
     bot.stop()
@@ -526,7 +672,7 @@ class Command:
     Properties:
         command (str): The command name.
         func (callable): The function to execute for this command.
-        receiver (object): The object or data to operate on.
+        receiver (object): The object or data to operate on, BackgroundStorage for a collection.
     """
 
     def __init__(self, command, func, receiver):
@@ -554,10 +700,12 @@ class Command:
         """
         Call the command's function with arguments.
 
+        The storages of the receiver are waited for if they are still loading.
+
         :param args: Arguments for the function.
         :return: Result of the function call.
         """
-        return self.func(args, self.receiver)
+        return self.func(args, resolve(self.receiver))
 
 
 class ConsoleBot:
@@ -565,8 +713,9 @@ class ConsoleBot:
     Console bot for managing contacts and notes.
 
     Properties:
-        __book (SerializedObject): Serialized address book.
-        __notes (SerializedObject): Serialized notebook.
+        __book (BackgroundStorage): Stored address book, loaded in the background.
+        __notes (BackgroundStorage): Stored notebook, loaded in the background.
+        __autosaver (Autosaver): Thread saving the modified collections while the bot runs.
         __commands (list): List of Command objects.
         __is_running (bool): Bot running state.
     """
@@ -574,40 +723,52 @@ class ConsoleBot:
     def __init__(self):
         """
         Initialize the console bot with commands and data.
-        This constructor sets up the address book and notebook, and initializes the commands list.
+        This constructor starts loading the address book and notebook on background threads,
+        and initializes the commands list; the commands wait for the data they need when they run.
         It also sets the running state of the bot to False.
         """
-        self.__book = SerializedObject("addressbook.pkl", AddressBook())
-        self.__notes = SerializedObject("notebook.pkl", Notebook())
-        self.__commands = [Command(ECommand.HELP, show_help, self.__book.object),
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="loader")
+        self.__book = BackgroundStorage(executor, open_storage, "addressbook.pkl", AddressBook())
+        self.__notes = BackgroundStorage(executor, open_storage, "notebook.pkl", Notebook())
+        executor.shutdown(wait=False)
+        self.__autosaver = Autosaver([self.__book, self.__notes], config.AUTOSAVE_INTERVAL)
+        self.__commands = [Command(ECommand.HELP, show_help, None),
                            Command(ECommand.ADD, add_contact,
-                                   self.__book.object),
+                                   self.__book),
                            Command(ECommand.CHANGE, change_contact,
-                                   self.__book.object),
+                                   self.__book),
                            Command(ECommand.REMOVE, remove_contact,
-                                   self.__book.object),
+                                   self.__book),
                            Command(ECommand.FIND, find_contact,
-                                   self.__book.object),
+                                   self.__book),
                            Command(ECommand.SHOW_DETAILS,
-                                   show_details, self.__book.object),
+                                   show_details, self.__book),
                            Command(ECommand.ALL, show_all_contacts,
-                                   (self.__book.object, self.__notes.object)),
+                                   (self.__book, self.__notes)),
                            Command(ECommand.BIRTHDAYS, birthdays,
-                                   self.__book.object),
+                                   self.__book),
+                           Command(ECommand.IMPORT, import_file,
+                                   self.__book),
+                           Command(ECommand.DOMAINS, show_domains,
+                                   self.__book),
+                           Command(ECommand.STATS, show_stats,
+                                   (self.__book, self.__notes)),
                            Command(ECommand.ADD_NOTE, add_note,
-                                   self.__notes.object),
+                                   self.__notes),
                            Command(ECommand.REMOVE_NOTE,
-                                   remove_note, self.__notes.object),
+                                   remove_note, self.__notes),
                            Command(ECommand.CHANGE_NOTE,
-                                   change_note, self.__notes.object),
+                                   change_note, self.__notes),
                            Command(ECommand.FIND_NOTES, find_notes,
-                                   self.__notes.object),
+                                   self.__notes),
+                           Command(ECommand.SEARCH, search_notes,
+                                   self.__notes),
                            Command(ECommand.ADD_TAGS, add_tag,
-                                   self.__notes.object),
+                                   self.__notes),
                            Command(ECommand.REMOVE_TAGS,
-                                   remove_tag, self.__notes.object),
+                                   remove_tag, self.__notes),
                            Command(ECommand.SHOW_NOTES, show_notes,
-                                   self.__notes.object),
+                                   self.__notes),
                            Command(ECommand.CLOSE, say_bye, self),
                            Command(ECommand.EXIT, say_bye, self)]
         self.__is_running = False  # Bot running state
@@ -618,27 +779,58 @@ class ConsoleBot:
         This method initializes the console output, prints a welcome message, and shows the help information.
         It enters a loop to prompt the user for commands, executes the commands, and handles errors
         until the bot is stopped.
-        It saves the address book and notebook data before exiting.
+        The prompt is shown while the data is loading; commands that need the data wait for it.
+        The changes made by every command are committed to the storage, the modified address book
+        and notebook data are saved in the background every config.AUTOSAVE_INTERVAL seconds and before exiting.
         '''
         ConsoleOutput().clear()
         ConsoleOutput().print_msg("Welcome to the assistant bot!")
         show_help()
         # Start the console bot.
         self.__is_running = True
+        if config.AUTOSAVE_INTERVAL > 0:
+            self.__autosaver.start()
         while self.__is_running:
             try:
-                command, args = CommandPrompt().prompt()
+                command, args = CommandPrompt(self.__complete_names).prompt()
                 command = command.strip().lower()
 
                 index = self.__commands.index(command)
-                self.__commands[index](args)
+                with self.__autosaver.lock:
+                    self.__commands[index](args)
             except ValueError:
                 ConsoleOutput().print_error("Error: Invalid command")
             except Exception as err:
                 ConsoleOutput().print_error(f"Error: {err}")
+            self.__commit()
 
-        self.__book.save_data()
-        self.__notes.save_data()
+        self.__autosaver.stop()
+        for storage in (self.__book, self.__notes):
+            if storage.is_loaded:
+                storage.storage.save_data()
+
+    def __commit(self):
+        """
+        Save the changes made by the last command to the journals.
+        """
+        try:
+            for storage in (self.__book, self.__notes):
+                if storage.is_loaded:
+                    storage.storage.commit()
+        except OSError as err:
+            ConsoleOutput().print_error(f"Error: changes were not saved: {err}")
+
+    def __complete_names(self, prefix: str, limit: int = 20) -> list[str]:
+        """
+        Get the contact names for the completion, none while the address book is loading.
+
+        :param prefix: Beginning of the name.
+        :param limit: Maximum number of names.
+        :return: List of names.
+        """
+        if not self.__book.is_loaded:
+            return []
+        return self.__book.object.complete_names(prefix, limit)
 
     def stop(self):
         """
@@ -648,5 +840,7 @@ class ConsoleBot:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(filename=config.LOG_FILE, level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     console_bot = ConsoleBot()
     console_bot.start()
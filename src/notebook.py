@@ -1,6 +1,41 @@
 
 from collections import UserList
-import re
+from wildcard import compile_pattern
+from query_cache import QueryCache
+from indexes import HashIndex
+from listeners import ListenerRegistry
+from text_index import TextIndex, SEARCH_LIMIT, parse_query
+import exceptions
+
+# Weight of a word found in the title of a note relative to a word found in its text
+TITLE_BOOST = 2.0
+
+
+def parse_tag_query(query: str) -> tuple[list[tuple[str, ...]], list[str]]:
+    '''
+    Split a tag query into the alternatives and the excluded tags.
+
+    Args:
+        query (str): The tag query, e.g. 'work+urgent,home,-done'.
+    Returns:
+        tuple: The alternatives as tuples of required tags, and the excluded tags.
+    Raises:
+        exceptions.InputError: If the query contains no tags.
+    '''
+    alternatives, excluded = [], []
+    for alternative in query.lower().split(","):
+        required = []
+        for tag in alternative.split("+"):
+            tag = tag.strip()
+            if tag.startswith("-") and tag[1:].strip():
+                excluded.append(tag[1:].strip())
+            elif tag:
+                required.append(tag)
+        if required:
+            alternatives.append(tuple(sorted(set(required))))
+    if not alternatives and not excluded:
+        raise exceptions.InputError(f"Invalid tag query '{query}'")
+    return sorted(set(alternatives)), sorted(set(excluded))
 
 
 class Note:
@@ -12,6 +47,8 @@ class Note:
         title (str): Title of the note.
         text (str): Text content of the note.
         tags (set): Set of tags associated with the note.
+    The title, text and tags are properties: every change notifies the notebook holding the note
+    with the field name and the old and new values.
     """
     current_id = 0
 
@@ -28,10 +65,94 @@ class Note:
         return (note.title.lower())
 
     def __init__(self, title: str, text: str, tags={}):
+        self.__notebook = None
         self.id = Note.__get_next_id()
-        self.title = title.capitalize()
-        self.text = text.capitalize()
-        self.tags = {tag.lower() for tag in tags}
+        self.__title = title.capitalize()
+        self.__text = text.capitalize()
+        self.__tags = {tag.lower() for tag in tags}
+
+    @property
+    def title(self) -> str:
+        '''
+        The title of the note.
+        '''
+        return self.__title
+
+    @title.setter
+    def title(self, title: str) -> None:
+        old_value = self.__title
+        self.__title = title
+        if old_value != title:
+            self.__notify("title", old_value, title)
+
+    @property
+    def text(self) -> str:
+        '''
+        The text of the note.
+        '''
+        return self.__text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        old_value = self.__text
+        self.__text = text
+        if old_value != text:
+            self.__notify("text", old_value, text)
+
+    @property
+    def tags(self) -> set[str]:
+        '''
+        The lowercased tags of the note. Use add_tag and remove_tag to change them.
+        '''
+        return self.__tags
+
+    @tags.setter
+    def tags(self, tags) -> None:
+        old_tags = self.__tags
+        self.__tags = {tag.lower() for tag in tags}
+        for tag in old_tags - self.__tags:
+            self.__notify("tag", tag, None)
+        for tag in self.__tags - old_tags:
+            self.__notify("tag", None, tag)
+
+    def attach(self, notebook) -> None:
+        '''
+        Attach the note to the notebook that holds it, so the notebook is notified about changes.
+
+        Args:
+            notebook (Notebook | None): The notebook, None to detach the note.
+        '''
+        self.__notebook = notebook
+
+    def __notify(self, field: str, old_value, new_value) -> None:
+        '''
+        Notify the notebook holding the note about a change.
+
+        Args:
+            field (str): The name of the changed field ('title', 'text' or 'tag').
+            old_value (str | None): The previous value, None if the value was added.
+            new_value (str | None): The new value, None if the value was removed.
+        '''
+        if self.__notebook is not None:
+            self.__notebook.on_note_changed(self, field, old_value, new_value)
+
+    def change_title(self, title: str):
+        '''
+        Change the title of the note.
+
+        Args:
+            title (str): The new title.
+        '''
+        self.title = title
+
+    def change_text(self, text: str):
+        '''
+        Change the text of the note.
+
+        Args:
+            text (str): The new text.
+        '''
+        self.text = text
 
     def add_tag(self, tag: str):
         '''
@@ -41,8 +162,10 @@ class Note:
         Args:
             tag (str): The tag to add to the note.
         '''
-        if not tag in self.tags:
-            self.tags.add(tag.lower())
+        tag = tag.lower()
+        if not tag in self.__tags:
+            self.__tags.add(tag)
+            self.__notify("tag", None, tag)
 
     def remove_tag(self, tag: str):
         '''
@@ -53,9 +176,10 @@ class Note:
             tag (str): The tag to remove from the note.
         '''
         res = False
-        if tag in self.tags:
-            self.tags.remove(tag)
+        if tag in self.__tags:
+            self.__tags.remove(tag)
             res = True
+            self.__notify("tag", tag, None)
 
         return res
 
@@ -70,6 +194,35 @@ class Note:
         cls.current_id += 1
         return cls.current_id
 
+    def __getstate__(self):
+        '''
+        Get the state of the note for pickling, without the notebook it is attached to.
+        The fields are stored under their public names, as in the notes pickled before they became properties.
+        '''
+        return {"id": self.id, "title": self.__title, "text": self.__text, "tags": self.__tags}
+
+    def to_dict(self) -> dict:
+        '''
+        Get the fields of the note for display.
+
+        Returns:
+            dict: The fields of the note keyed by their names.
+        '''
+        return {"id": self.id, "title": self.__title, "text": self.__text, "tags": self.__tags}
+
+    def __setstate__(self, state):
+        '''
+        Restore the state of the note from a pickle. The notebook attaches the note when it is loaded.
+
+        Args:
+            state (dict): A dictionary containing the saved state of the note.
+        '''
+        self.__notebook = None
+        self.id = state["id"]
+        self.__title = state["title"]
+        self.__text = state["text"]
+        self.__tags = set(state["tags"])
+
     def __lt__(self, other):
         '''
         Compare two notes based on their IDs.
@@ -105,22 +258,325 @@ class Notebook(UserList):
     A class representing a collection of notes.
     This class extends UserList to provide a list-like interface for managing notes.
     It allows adding, removing, and searching for notes by tags or ID.
+    Every change of the notebook or of its notes increments the generation counter; search results
+    are cached together with the generation and served only while it is unchanged.
+    Tags are indexed in tag -> notes postings, so tag queries do not scan the notes.
+    Titles and texts are indexed word by word for the full-text search ranked by BM25.
+    The notes are stored in an id -> note dictionary kept in id order, so a note is found
+    and removed by id in constant time and the notes are iterated in order without sorting.
+    Listeners registered with add_listener are notified about every added, removed or changed note
+    after the notebook has updated its own indexes, see listeners.ListenerRegistry.
+    The list methods that add or remove notes (append, extend, +=, remove, pop, del, clear) go through
+    add_note and remove_note; the ones that place notes at a position or reorder them raise TypeError.
     Attributes:
-        data (list): A list of Note objects representing the notes in the notebook.
+        data (list): A list of Note objects representing the notes in the notebook, ordered by id.
     '''
+    def __init__(self, initlist=None):
+        self.__generation = 0
+        self.__listeners = ListenerRegistry()
+        self.__load(initlist or [])
+
+    def __load(self, notes) -> None:
+        '''
+        Fill the notebook with the given notes and build its indexes.
+        Notebooks saved as plain lists may hold several notes with the same id;
+        every repeated note gets a new id after the largest one.
+
+        Args:
+            notes (Iterable[Note]): The notes in any order.
+        '''
+        self.__notes = {}
+        self.__ordered = None
+        self.__query_cache = QueryCache()
+        self.__tag_index = HashIndex()
+        self.__text_index = TextIndex({"title": TITLE_BOOST, "text": 1.0})
+        repeated = []
+        for note in sorted(notes):
+            if note.id in self.__notes:
+                repeated.append(note)
+                continue
+            self.__notes[note.id] = note
+            self.__index_note(note)
+        for note in repeated:
+            note.id = next(reversed(self.__notes)) + 1
+            Note.current_id = max(Note.current_id, note.id)
+            self.__notes[note.id] = note
+            self.__index_note(note)
+
+    @property
+    def data(self) -> list[Note]:
+        '''
+        The notes ordered by id.
+        The list is built after a note is removed and reused until the next removal,
+        it must not be changed directly; use add_note and remove_note instead.
+        '''
+        if self.__ordered is None:
+            self.__ordered = list(self.__notes.values())
+        return self.__ordered
+
+    @data.setter
+    def data(self, notes: list[Note]) -> None:
+        for note in self.__notes.values():
+            self.__unindex_note(note)
+        self.__load(notes)
+        self.__generation += 1
+
+    @property
+    def generation(self) -> int:
+        '''
+        The number of changes made to the notebook and its notes.
+        '''
+        return self.__generation
+
+    def add_listener(self, listener) -> None:
+        '''
+        Register a function notified about every added, removed or changed note.
+
+        Args:
+            listener (callable): The function called as listener(note, field, old_value, new_value);
+                field is None when a whole note is added or removed.
+        '''
+        self.__listeners.add(listener)
+
+    def remove_listener(self, listener) -> None:
+        '''
+        Unregister a function registered with add_listener.
+
+        Args:
+            listener (callable): The registered function.
+        '''
+        self.__listeners.discard(listener)
+
     def add_note(self, note: Note):
         '''
         Add a note to the notebook.
-        This method appends a Note object to the notebook's data list.
+        Notes get increasing ids, so a new note is normally appended to the end of the id order;
+        a note with a smaller id than the last one makes the notebook re-sort its notes.
+
+        Raises:
+            ValueError: If a note with the same id is already in the notebook.
         '''
-        self.data.append(note)
+        if note.id in self.__notes:
+            raise ValueError(f"Note #{note.id} is already in the notebook")
+        last_id = next(reversed(self.__notes), None)
+        self.__notes[note.id] = note
+        if last_id is not None and note.id < last_id:
+            self.__notes = dict(sorted(self.__notes.items()))
+            self.__ordered = None
+        elif self.__ordered is not None:
+            self.__ordered.append(note)
+        self.__index_note(note)
+        self.__generation += 1
 
     def remove_note(self, note: Note):
         '''
         Remove a note from the notebook.
-        This method removes a Note object from the notebook's data list.
+
+        Raises:
+            ValueError: If the note is not in the notebook.
+        '''
+        if self.__notes.get(note.id) is not note:
+            raise ValueError(f"Note #{note.id} is not in the notebook")
+        del self.__notes[note.id]
+        self.__ordered = None
+        self.__unindex_note(note)
+        self.__generation += 1
+
+    def append(self, note: Note):
+        '''
+        Add a note to the notebook, see add_note.
+        '''
+        self.add_note(note)
+
+    def remove(self, note: Note):
+        '''
+        Remove a note from the notebook, see remove_note.
+        '''
+        self.remove_note(note)
+
+    def extend(self, notes):
+        '''
+        Add the notes to the notebook, see add_note.
+        '''
+        for note in list(notes):
+            self.add_note(note)
+
+    def __iadd__(self, notes):
+        self.extend(notes)
+        return self
+
+    def pop(self, index: int = -1) -> Note:
+        '''
+        Remove the note at the position in the id order from the notebook and return it, see remove_note.
+
+        Raises:
+            IndexError: If the notebook has no note at the position.
+        '''
+        note = self.data[index]
+        self.remove_note(note)
+        return note
+
+    def __delitem__(self, index):
+        '''
+        Remove the note or the slice of notes at the position in the id order, see remove_note.
+        '''
+        notes = self.data[index]
+        for note in (notes if isinstance(index, slice) else [notes]):
+            self.remove_note(note)
+
+    def clear(self):
+        '''
+        Remove all notes from the notebook, see remove_note.
         '''
-        self.data.remove(note)
+        for note in list(self.__notes.values()):
+            self.remove_note(note)
+
+    def __getitem__(self, index):
+        '''
+        Get the note at the position in the id order, or a list of the notes of a slice.
+        The notes of a slice stay in this notebook, they are not copied into a new one.
+        '''
+        return self.data[index]
+
+    def insert(self, index: int, note: Note):
+        '''
+        Not supported, the notes are kept in id order; use add_note.
+
+        Raises:
+            TypeError: Always.
+        '''
+        raise TypeError("Notes are kept in id order and cannot be inserted at a position, use add_note")
+
+    def __setitem__(self, index, note):
+        '''
+        Not supported, the notes are kept in id order; use remove_note and add_note.
+
+        Raises:
+            TypeError: Always.
+        '''
+        raise TypeError("Notes are kept in id order and cannot be replaced at a position, "
+                        "use remove_note and add_note")
+
+    def sort(self, *args, **kwargs):
+        '''
+        Not supported, the notes are kept in id order.
+
+        Raises:
+            TypeError: Always.
+        '''
+        raise TypeError("Notes are kept in id order and cannot be sorted")
+
+    def reverse(self):
+        '''
+        Not supported, the notes are kept in id order.
+
+        Raises:
+            TypeError: Always.
+        '''
+        raise TypeError("Notes are kept in id order and cannot be reversed")
+
+    def __add__(self, other):
+        '''
+        Not supported, a note belongs to one notebook; use copy and extend.
+
+        Raises:
+            TypeError: Always.
+        '''
+        raise TypeError("Notebooks cannot be concatenated, a note belongs to one notebook; use copy and extend")
+
+    __radd__ = __add__
+
+    def __mul__(self, n):
+        '''
+        Not supported, a note belongs to one notebook.
+
+        Raises:
+            TypeError: Always.
+        '''
+        raise TypeError("Notebooks cannot be repeated, a note belongs to one notebook")
+
+    __rmul__ = __imul__ = __mul__
+
+    def copy(self) -> "Notebook":
+        '''
+        Get a copy of the notebook, see __copy__.
+        '''
+        return self.__copy__()
+
+    def __copy__(self) -> "Notebook":
+        '''
+        Get a copy of the notebook with copies of its notes.
+        A note is attached to the one notebook that indexes it, so the notes are copied with their ids
+        and the copy builds its own indexes; changes of either notebook do not affect the other.
+        '''
+        notes = []
+        for note in self.__notes.values():
+            copy = Note.__new__(Note)
+            copy.__setstate__(note.__getstate__())
+            notes.append(copy)
+        return Notebook(notes)
+
+    def __len__(self):
+        return len(self.__notes)
+
+    def __iter__(self):
+        return iter(self.__notes.values())
+
+    def __contains__(self, note):
+        return isinstance(note, Note) and self.__notes.get(note.id) is note
+
+    def on_note_changed(self, note: Note, field: str, old_value, new_value):
+        '''
+        Register a change of a note held by the notebook, keep the tag and text indexes in sync
+        and notify the listeners.
+        This method is called by the notes attached to the notebook.
+
+        Args:
+            note (Note): The changed note.
+            field (str): The name of the changed field ('title', 'text' or 'tag').
+            old_value (str | None): The previous value, None if the value was added.
+            new_value (str | None): The new value, None if the value was removed.
+        '''
+        self.__generation += 1
+        if field == "tag":
+            if old_value is not None:
+                self.__tag_index.discard(old_value, note.id)
+            if new_value is not None:
+                self.__tag_index.add(new_value, note.id, note)
+        else:
+            self.__text_index.replace(note.id, field, old_value, new_value)
+        self.__listeners.notify(note, field, old_value, new_value)
+
+    def __index_note(self, note: Note):
+        '''
+        Add the note to the tag and text indexes, attach it to the notebook and notify the listeners.
+        '''
+        for tag in note.tags:
+            self.__tag_index.add(tag, note.id, note)
+        self.__text_index.add(note.id, "title", note.title)
+        self.__text_index.add(note.id, "text", note.text)
+        note.attach(self)
+        self.__listeners.notify(note, None, None, note)
+
+    def __unindex_note(self, note: Note):
+        '''
+        Remove the note from the tag and text indexes, detach it from the notebook and notify the listeners.
+        '''
+        for tag in note.tags:
+            self.__tag_index.discard(tag, note.id)
+        self.__text_index.discard(note.id, "title", note.title)
+        self.__text_index.discard(note.id, "text", note.text)
+        note.attach(None)
+        self.__listeners.notify(note, None, note, None)
+
+    def query_cache_stats(self) -> dict[str, int]:
+        '''
+        Get the statistics of the search result cache.
+
+        Returns:
+            dict: Cache hits, misses, current size and maximum size.
+        '''
+        return self.__query_cache.stats()
 
     def find_note_by_tags(self, tags):
         '''
@@ -133,8 +589,116 @@ class Notebook(UserList):
         Returns:
             list: A list of Note objects that match the given tags.
         '''
-        tags = set(tags)
-        return [note for note in self.data if tags & note.tags]
+        alternatives = sorted({(tag.strip().lower(),) for tag in tags if tag.strip()})
+        return self.__find_by_tags(alternatives, []) if alternatives else []
+
+    def find_note_by_tag_query(self, query: str) -> list[Note]:
+        '''
+        Find notes by a tag query.
+        The query is a comma-separated list of alternatives, a note matches if it matches any of them:
+        - 'a,b' finds the notes tagged with a or b
+        - 'a+b' finds the notes tagged with both a and b
+        - '-c' excludes the notes tagged with c from the result; a query with exclusions only
+          finds all notes without these tags
+        The query is evaluated over the tag postings: the postings of every alternative are intersected
+        starting from the smallest one, the alternatives are merged and the excluded postings removed.
+
+        Args:
+            query (str): The tag query, e.g. 'work+urgent,home,-done'.
+        Returns:
+            list: The matching notes ordered by id.
+        Raises:
+            exceptions.InputError: If the query contains no tags.
+        '''
+        return self.__find_by_tags(*parse_tag_query(query))
+
+    def __find_by_tags(self, alternatives: list[tuple[str, ...]], excluded: list[str]) -> list[Note]:
+        '''
+        Find notes by a parsed tag query, caching the result.
+
+        Args:
+            alternatives (list): The alternatives as tuples of required tags.
+            excluded (list): The excluded tags.
+        Returns:
+            list: The matching notes ordered by id.
+        '''
+        key = ("tags", tuple(alternatives), tuple(excluded))
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            found = self.__match_tags(alternatives, excluded)
+            result = [found[note_id] for note_id in sorted(found)]
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def __match_tags(self, alternatives: list[tuple[str, ...]], excluded: list[str]) -> dict:
+        '''
+        Evaluate a parsed tag query over the tag postings.
+
+        Args:
+            alternatives (list): The alternatives as tuples of required tags.
+            excluded (list): The excluded tags.
+        Returns:
+            dict: The matching notes keyed by id.
+        '''
+        if alternatives:
+            found = {}
+            for required in alternatives:
+                postings = sorted((self.__tag_index.postings(tag) for tag in required), key=len)
+                note_ids = postings[0].keys()
+                for posting in postings[1:]:
+                    if not note_ids:
+                        break
+                    note_ids = note_ids & posting.keys()
+                for note_id in note_ids:
+                    found[note_id] = postings[0][note_id]
+        else:
+            found = dict(self.__notes)
+
+        for tag in excluded:
+            posting = self.__tag_index.postings(tag)
+            if len(posting) < len(found):
+                for note_id in posting:
+                    found.pop(note_id, None)
+            else:
+                found = {note_id: note for note_id, note in found.items() if note_id not in posting}
+        return found
+
+    def search_notes(self, query: str, limit: int | None = SEARCH_LIMIT) -> list[tuple[Note, float]]:
+        '''
+        Full-text search of the notes ranked by BM25.
+        A note matches if its title or text contains any word of the query; words found
+        in the title count TITLE_BOOST times more than words found in the text.
+        "Quoted phrases" and 'word1 NEAR/k word2' clauses restrict the result to the notes
+        containing the phrase, or the two words at most k words apart, in the title or the text.
+
+        Args:
+            query (str): The searched words, phrases and NEAR clauses.
+            limit (int | None): The maximum number of notes to return, all matching notes if None.
+        Returns:
+            list: (note, score) tuples, the most relevant notes first.
+        Raises:
+            exceptions.InputError: If the query contains no words or a NEAR clause is incomplete.
+        '''
+        terms, phrases, proximities = parse_query(query)
+        if not terms:
+            raise exceptions.InputError(f"Invalid search query '{query}'")
+        key = ("search", terms, phrases, proximities, limit)
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            result = [(self.__notes[note_id], score)
+                      for note_id, score in self.__text_index.search(query, limit)]
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def text_index_stats(self) -> dict[str, int]:
+        '''
+        Get the size of the full-text index compared with the size of the indexed titles and texts.
+
+        Returns:
+            dict: The number of notes and distinct words, the bytes of the encoded posting blocks,
+                the memory of the whole index and the bytes of the indexed titles and texts.
+        '''
+        return self.__text_index.memory_usage()
 
     def find_note_by_id(self, id: int):
         '''
@@ -147,15 +711,13 @@ class Notebook(UserList):
         Returns:
             Note: The Note object with the given ID, or None if not found.
         '''
-        for note in self.data:
-            if note.id == id:
-                return note
-
+        return self.__notes.get(id)
 
     def find_note(self, query: str, field_type: str) -> list[Note]:
         """
         Find notes by a query string in a specified field (title or text).
         Supports SQL-like wildcards: % for any sequence, _ for any single character.
+        Results are cached until the next change of the notebook.
 
         Args:
             query (str): The search query, may contain wildcards.
@@ -164,18 +726,20 @@ class Notebook(UserList):
         Returns:
             list[Note]: List of matching Note objects.
         """
-        def like(pattern: str, text: str) -> bool:
-            regex = '^' + re.escape(pattern).replace('%',
-                                                     '.*').replace('_', '.') + '$'
-            return re.match(regex, text) is not None
-
         matching_records = []
         search_value = query.lower()
 
         if field_type not in ['title', 'text']:
             return matching_records
 
-        for note in self.data:
+        key = (search_value, field_type)
+        cached = self.__query_cache.get(key, self.__generation)
+        if cached is not None:
+            return cached
+
+        matches = compile_pattern(search_value)
+
+        for note in self.__notes.values():
             field_value = None
 
             if field_type == 'title' and note.title:
@@ -184,9 +748,10 @@ class Notebook(UserList):
                 field_value = note.text
 
             if field_value:
-                if like(search_value, field_value.lower()):
+                if matches(field_value.lower()):
                     matching_records.append(note)
 
+        self.__query_cache.put(key, self.__generation, matching_records)
         return matching_records
 
     def get_notes(self):
@@ -195,20 +760,48 @@ class Notebook(UserList):
         This method returns a list of all Note objects in the notebook.
 
         Returns:
-            list: A list of all Note objects in the notebook.
+            list: A list of all Note objects in the notebook, ordered by id.
+        '''
+        return list(self.__notes.values())
+
+    def __getstate__(self):
+        '''
+        Get the state of the notebook for pickling.
+        The notes are stored as the list of a UserList, the indexes and the result cache are not stored.
+        '''
+        return {"data": list(self.__notes.values())}
+
+    def pickle_states(self) -> dict[int, dict]:
+        '''
+        Take the pickle states of the notebook and its notes, keyed by the ids of the objects.
+        The tags are copied, so the states can be pickled by another thread while the notebook changes
+        (see file_serializer.SerializedObject.save_in_background).
+
+        Returns:
+            dict: The states of the notebook and of every note.
         '''
-        return [note for note in sorted(self.data)]
+        notes = list(self.__notes.values())
+        states = {}
+        for note in notes:
+            state = note.__getstate__()
+            state["tags"] = set(state["tags"])
+            states[id(note)] = state
+        states[id(self)] = {"data": notes}
+        return states
 
     def __setstate__(self, state):
         '''
         Restore the notebook's state from a saved state.
-        This method updates the notebook's attributes with the given state.
+        This method rebuilds the id -> note dictionary and the indexes from the saved list of notes
+        and attaches the notes to the notebook.
         Args:
             state (dict): A dictionary containing the saved state of the notebook.
         '''
-        self.__dict__.update(state)
-        if self.data:
-            Note.current_id = max(note.id for note in self.data)
+        self.__generation = 0
+        self.__listeners = ListenerRegistry()
+        self.__load(state.get("data", []))
+        if self.__notes:
+            Note.current_id = max(Note.current_id, next(reversed(self.__notes)))
 
     def __str__(self):
         '''
@@ -218,4 +811,4 @@ class Notebook(UserList):
         Returns:
             str: A formatted string representation of the notebook.
         '''
-        return f"Notebook:\n{"\n".join(str(note) for note in self.data)}"
+        return f"Notebook:\n{"\n".join(str(note) for note in self.__notes.values())}"
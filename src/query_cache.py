@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+# Maximum number of query results kept in a cache
+QUERY_CACHE_SIZE = 256
+
+
+class QueryCache:
+    '''
+    Bounded LRU cache of query results.
+    Every result is stored with the mutation generation of its collection at the time of the query.
+    A result is only served while the generation is unchanged, so a result computed before
+    any change of the collection is never returned after it.
+    '''
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE):
+        '''
+        Initialize an empty cache.
+
+        Args:
+            max_size (int): The maximum number of results to keep.
+        '''
+        self.__entries = OrderedDict()
+        self.__max_size = max_size
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key, generation: int) -> list | None:
+        '''
+        Get a cached result.
+
+        Args:
+            key (Hashable): The query, its field and options.
+            generation (int): The current mutation generation of the collection.
+        Returns:
+            list | None: A copy of the result, None if it is not cached or is stale.
+        '''
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] != generation:
+            if entry is not None:
+                del self.__entries[key]
+            self.__misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.__hits += 1
+        return list(entry[1])
+
+    def put(self, key, generation: int, result: list) -> None:
+        '''
+        Store a result, evicting the least recently used one if the cache is full.
+
+        Args:
+            key (Hashable): The query, its field and options.
+            generation (int): The mutation generation the result was computed at.
+            result (list): The result of the query.
+        '''
+        self.__entries[key] = (generation, list(result))
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        '''
+        Remove all results and reset the statistics.
+        '''
+        self.__entries.clear()
+        self.__hits = 0
+        self.__misses = 0
+
+    def stats(self) -> dict[str, int]:
+        '''
+        Get the statistics of the cache.
+
+        Returns:
+            dict: Cache hits, misses, current size and maximum size.
+        '''
+        return {"hits": self.__hits, "misses": self.__misses,
+                "size": len(self.__entries), "max size": self.__max_size}
+
+    def __len__(self):
+        return len(self.__entries)
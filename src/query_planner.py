@@ -0,0 +1,102 @@
+class PlanStep:
+    '''
+    One criterion of a query together with the way to find the records matching it.
+
+    Attributes:
+        field (str): The searched field.
+        query (str): The searched value or pattern.
+        access_path (str): The name of the index used to fetch candidates, 'full scan' if there is none.
+        estimate (int): The estimated number of candidates fetched by the access path.
+    '''
+    def __init__(self, field: str, query: str, access_path: str, estimate: int, fetch, predicate):
+        '''
+        Initialize the step.
+
+        Args:
+            field (str): The searched field.
+            query (str): The searched value or pattern.
+            access_path (str): The name of the index used to fetch candidates.
+            estimate (int): The estimated number of candidates.
+            fetch (callable): The function that returns all records matching the criterion.
+            predicate (callable): The function that checks if a record matches the criterion.
+        '''
+        self.field = field
+        self.query = query
+        self.access_path = access_path
+        self.estimate = estimate
+        self.fetch = fetch
+        self.predicate = predicate
+
+    def __str__(self):
+        return f"{self.field} = '{self.query}'"
+
+
+class QueryPlan:
+    '''
+    Execution plan of a multi-criteria search.
+    For AND queries the most selective criterion drives the search: its access path fetches the candidates
+    and the other criteria are only checked on these candidates. For OR queries every criterion is fetched
+    through its own access path and the results are merged; if any criterion needs a full scan,
+    the book is scanned once for all criteria instead.
+    '''
+    def __init__(self, mode: str, steps: list[PlanStep], scan):
+        '''
+        Initialize the plan.
+
+        Args:
+            mode (str): 'and' if all criteria must match, 'or' if any criterion must match.
+            steps (list[PlanStep]): The criteria of the query.
+            scan (callable): The function that returns all records of the book.
+        '''
+        self.mode = mode
+        self.steps = sorted(steps, key=lambda step: step.estimate) if mode == "and" else steps
+        self.__scan = scan
+
+    def execute(self) -> list:
+        '''
+        Run the plan.
+
+        Returns:
+            list: The records matching the query.
+        '''
+        if not self.steps:
+            return []
+        if self.mode == "and":
+            driver, *filters = self.steps
+            return [record for record in driver.fetch()
+                    if all(step.predicate(record) for step in filters)]
+
+        if self.__needs_scan():
+            return [record for record in self.__scan()
+                    if any(step.predicate(record) for step in self.steps)]
+        found = {}
+        for step in self.steps:
+            for record in step.fetch():
+                found.setdefault(id(record), record)
+        return list(found.values())
+
+    def describe(self) -> list[str]:
+        '''
+        Describe the plan in a human readable form.
+
+        Returns:
+            list: One line per criterion with the chosen index and the estimated number of candidates.
+        '''
+        if not self.steps:
+            return ["No criteria"]
+        lines = [f"{self.mode.upper()} of {len(self.steps)} criteria"]
+        if self.mode == "and":
+            driver, *filters = self.steps
+            lines.append(f"{driver}: {driver.access_path}, ~{driver.estimate} candidates")
+            lines.extend(f"{step}: checked on the candidates" for step in filters)
+        elif self.__needs_scan():
+            lines.extend(f"{step}: full scan" for step in self.steps)
+        else:
+            lines.extend(f"{step}: {step.access_path}, ~{step.estimate} candidates" for step in self.steps)
+        return lines
+
+    def __needs_scan(self) -> bool:
+        '''
+        Check if any criterion has no index to fetch its records.
+        '''
+        return any(step.access_path == "full scan" for step in self.steps)
@@ -0,0 +1,836 @@
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from itertools import islice
+import calendar
+import mmap
+import os
+import struct
+import sys
+import exceptions
+from addressbook import SEARCH_FIELDS, Record, email_domain
+from fuzzy_index import FUZZY_LIMIT, TrigramIndex
+from journal import JournaledObject
+from listeners import ListenerRegistry
+from notebook import Notebook
+from query_cache import QueryCache
+from wildcard import compile_pattern, has_wildcards, literal_prefix
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Extension of the snapshot file, replaces the extension of the pickle file
+SNAPSHOT_SUFFIX = ".snap"
+
+SNAPSHOT_MAGIC = b"PYCSNAP\0"
+SNAPSHOT_VERSION = 1
+
+# String columns, each stored as a table of count + 1 offsets ('Q') and a UTF-8 heap.
+# The keys are the lowercased names, the records are stored in the order of their keys.
+# The phones of a record are joined with commas; an empty value stands for a missing field.
+_STRING_COLUMNS = ("key", "name", "phones", "address", "email")
+# Numeric columns with one value per record: the birthday as a date ordinal ('i')
+# and as month * 100 + day ('H'), 0 if the birthday is not set.
+_NUMBER_COLUMNS = (("birthday", "i"), ("birth_day", "H"))
+
+# Header: magic, version, number of records, then (offset, length) of every section
+_SECTIONS = [(column, "Q") for column in _STRING_COLUMNS] + [(column + " heap", "B") for column in _STRING_COLUMNS]
+_SECTIONS += list(_NUMBER_COLUMNS)
+_HEADER = struct.Struct("<8sII" + "QQ" * len(_SECTIONS))
+
+
+def _table(values, typecode: str) -> bytes:
+    '''
+    Encode a fixed-width table in little-endian byte order.
+    '''
+    table = array(typecode, values)
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table.tobytes()
+
+
+def write_snapshot(path: str, records) -> None:
+    '''
+    Write records to a snapshot file.
+    The file is written next to the target and renamed over it, so a snapshot that is
+    currently opened stays readable.
+
+    Args:
+        path (str): The path to the snapshot file.
+        records (Iterable[Record]): The records to store.
+    '''
+    write_states(path, (record.__getstate__() for record in records))
+
+
+def write_states(path: str, states) -> None:
+    '''
+    Write the states of records to a snapshot file, see write_snapshot.
+
+    Args:
+        path (str): The path to the snapshot file.
+        states (Iterable[dict]): The states of the records to store, see Record.__getstate__.
+    '''
+    states = sorted(states, key=lambda state: state["name"].lower())
+    heaps = {column: bytearray() for column in _STRING_COLUMNS}
+    offsets = {column: [0] for column in _STRING_COLUMNS}
+    birthdays, birth_days = [], []
+    for state in states:
+        values = {"key": state["name"].lower(), "name": state["name"], "phones": ",".join(state["phones"]),
+                  "address": state["address"], "email": state["email"]}
+        for column in _STRING_COLUMNS:
+            heaps[column] += (values[column] or "").encode()
+            offsets[column].append(len(heaps[column]))
+        ordinal = state["birthday"] or 0
+        day = date.fromordinal(ordinal) if ordinal else None
+        birthdays.append(ordinal)
+        birth_days.append(day.month * 100 + day.day if day else 0)
+
+    sections = {column: _table(offsets[column], "Q") for column in _STRING_COLUMNS}
+    sections.update({column + " heap": bytes(heaps[column]) for column in _STRING_COLUMNS})
+    sections["birthday"] = _table(birthdays, "i")
+    sections["birth_day"] = _table(birth_days, "H")
+
+    layout, position = [], _HEADER.size
+    for name, _ in _SECTIONS:
+        position += -position % 8  # tables are aligned for memoryview casts
+        layout.append((position, len(sections[name])))
+        position += len(sections[name])
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(states), *(value for item in layout for value in item)))
+        for (name, _), (offset, _) in zip(_SECTIONS, layout):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(sections[name])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class SnapshotAddressBook:
+    '''
+    Address book served from a memory-mapped binary snapshot, see write_snapshot.
+    Opening the book only maps the file and reads its header; records are decoded when they are accessed.
+    Names are found by binary search over the sorted keys, phones by searching the phone heap,
+    birthdays by filtering the fixed-width birthday tables (with NumPy when it is installed);
+    other criteria decode only the column they search.
+    The snapshot is never changed: added, changed and removed records are kept in an in-memory overlay
+    that hides the snapshot rows with the same names, until save writes a new snapshot with the changes.
+    Listeners registered with add_listener are notified like the listeners of AddressBook.
+
+    The class provides the AddressBook interface used by the console bot, except the query plans.
+    '''
+    def __init__(self, path: str):
+        '''
+        Map a snapshot file.
+
+        Args:
+            path (str): The path to the snapshot file.
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version.
+        '''
+        self.__open(path)
+        self.__overlay = {}                 # lowercased name -> changed or added record, None if removed
+        self.__count = self.__rows
+        self.__fuzzy_index = None           # built on the first fuzzy search
+        self.__generation = 0
+        self.__query_cache = QueryCache()
+        self.__listeners = ListenerRegistry()
+
+    def __open(self, path: str) -> None:
+        '''
+        Map a snapshot file and read its header.
+        '''
+        with open(path, "rb") as f:
+            self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.__mmap) < _HEADER.size:
+            self.__mmap.close()
+            raise ValueError(f"{path} is not a contacts snapshot")
+        magic, version, self.__rows, *layout = _HEADER.unpack_from(self.__mmap)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.__mmap.close()
+            raise ValueError(f"{path} is not a contacts snapshot of version {SNAPSHOT_VERSION}")
+        view = memoryview(self.__mmap)
+        self.__sections = {}
+        for (name, typecode), offset, length in zip(_SECTIONS, layout[::2], layout[1::2]):
+            self.__sections[name] = self.__cast(view[offset:offset + length], typecode)
+        self.__offsets = {name: (self.__sections[name], self.__sections[name + " heap"]) for name in _STRING_COLUMNS}
+        self.__heap_start = {name: layout[2 * _SECTIONS.index((name + " heap", "B"))] for name in _STRING_COLUMNS}
+
+    def __close(self) -> None:
+        '''
+        Release the views of the snapshot and unmap it.
+        '''
+        for section in self.__sections.values():
+            if isinstance(section, memoryview):
+                section.release()
+        self.__sections, self.__offsets = {}, {}
+        self.__mmap.close()
+
+    def save(self, path: str) -> None:
+        '''
+        Write the contacts, with the changes of the overlay, to a new snapshot and map it in place of the current one.
+        The overlay is emptied; the records materialized before stay attached to the book.
+
+        Args:
+            path (str): The path to the new snapshot, usually the path of the current one.
+        '''
+        records = self.get_all_contacts()
+        self.__close()
+        try:
+            write_snapshot(path, records)
+        finally:
+            self.__open(path)
+        self.__overlay = {}
+        self.__count = self.__rows
+
+    def save_in_background(self, path: str, lock) -> None:
+        '''
+        Write the contacts, with the changes of the overlay, to a new snapshot while another thread keeps
+        changing the book, and map the new snapshot in place of the current one.
+        The states of the overlay records are taken under the lock; the snapshot rows are read and
+        the new snapshot is written after the lock is released. The overlay entries that were not changed
+        meanwhile are then dropped, the later changes stay in the overlay.
+        The mapped snapshot is replaced by renaming, which fails on systems that do not allow renaming
+        over a mapped file; the book is then saved by save.
+
+        Args:
+            path (str): The path to the new snapshot, the path of the current one.
+            lock (threading.Lock): The lock held by the thread changing the book.
+        '''
+        with lock:
+            if not self.__overlay:
+                return
+            changes = {name_key: record.__getstate__() if record is not None else None
+                       for name_key, record in self.__overlay.items()}
+        states = [self.__row_state(row) for row in range(self.__rows)
+                  if self.__string("key", row) not in changes]
+        states += [state for state in changes.values() if state is not None]
+        write_states(path, states)
+        with lock:
+            self.__close()
+            self.__open(path)
+            for name_key, state in changes.items():
+                record = self.__overlay[name_key]
+                if (record.__getstate__() if record is not None else None) == state:
+                    del self.__overlay[name_key]
+            self.__count = self.__rows + sum((record is not None) - (self.__find_row(name_key) is not None)
+                                             for name_key, record in self.__overlay.items())
+
+    @staticmethod
+    def __cast(view: memoryview, typecode: str):
+        '''
+        View a little-endian table with the item type of an array typecode.
+        On big-endian machines the table is copied and byte-swapped.
+        '''
+        if sys.byteorder == "little":
+            return view.cast(typecode)
+        table = array(typecode, bytes(view))
+        table.byteswap()
+        return table
+
+    @property
+    def generation(self) -> int:
+        '''
+        The number of changes made to the address book and its records.
+        '''
+        return self.__generation
+
+    @property
+    def is_modified(self) -> bool:
+        '''
+        True if records were added, changed or removed since the snapshot was opened.
+        '''
+        return bool(self.__overlay)
+
+    def add_listener(self, listener) -> None:
+        '''
+        Register a function notified about every added, removed or changed record.
+
+        Args:
+            listener (callable): The function called as listener(record, field, old_value, new_value);
+                field is None when a whole record is added or removed.
+        '''
+        self.__listeners.add(listener)
+
+    def remove_listener(self, listener) -> None:
+        '''
+        Unregister a function registered with add_listener.
+
+        Args:
+            listener (callable): The registered function.
+        '''
+        self.__listeners.discard(listener)
+
+    def get_all_contacts(self) -> list[Record]:
+        '''
+        Get all contacts in the address book sorted by name.
+
+        Returns:
+            list: A list of all contacts in the address book.
+        '''
+        return list(self.iter_contacts())
+
+    def iter_contacts(self, offset: int = 0, limit: int | None = None) -> Iterator[Record]:
+        '''
+        Iterate over the contacts sorted by name, one page at a time.
+
+        Args:
+            offset (int): The number of contacts to skip. Defaults to 0.
+            limit (int | None): The maximum number of contacts to return, all remaining if None.
+        Returns:
+            Iterator: The contacts of the requested page.
+        '''
+        end = None if limit is None else offset + limit
+        for name_key, row in islice(self.__iter_keys(), offset, end):
+            yield self.__overlay[name_key] if row is None else self.__materialize(row)
+
+    def add_record(self, record: Record) -> None:
+        '''
+        Add a record to the address book.
+        If the record already exists (based on the name), it will update the existing record.
+
+        Args:
+            record (Record): The record to add to the address book.
+        '''
+        name_key = record.name.value.lower()
+        previous = self.find(name_key) if len(self.__listeners) else None
+        self.__set(name_key, record)
+        record.attach(self)
+        if previous is not None and previous is not record:
+            previous.attach(None)
+            self.__listeners.notify(previous, None, previous, None)
+        self.__listeners.notify(record, None, None, record)
+
+    def import_records(self, records) -> int:
+        '''
+        Add a batch of records to the address book.
+
+        Args:
+            records (Iterable[Record]): The records to add.
+        Returns:
+            int: The number of added records.
+        '''
+        count = 0
+        for record in records:
+            self.add_record(record)
+            count += 1
+        return count
+
+    def find(self, name: str) -> Record | None:
+        '''
+        Find a record by name, in the overlay or by binary search over the snapshot.
+
+        Args:
+            name (str): The name of the record to find.
+        Returns:
+            Record | None: The record if found, None if not found.
+        '''
+        name_key = name.lower()
+        if name_key in self.__overlay:
+            return self.__overlay[name_key]
+        row = self.__find_row(name_key)
+        return self.__materialize(row) if row is not None else None
+
+    def remove(self, name: str) -> bool:
+        '''
+        Remove a record by name.
+
+        Args:
+            name (str): The name of the record to remove.
+        Returns:
+            bool: True if the record was removed, False if it was not found.
+        '''
+        removed = self.find(name)
+        if removed is None:
+            return False
+        self.__set(name.lower(), None)
+        removed.attach(None)
+        self.__listeners.notify(removed, None, removed, None)
+        return True
+
+    def complete_names(self, prefix: str, limit: int = 20) -> list[str]:
+        '''
+        Get the names of the contacts that start with the prefix.
+
+        Args:
+            prefix (str): The beginning of the name, case insensitive.
+            limit (int): The maximum number of names to return. Defaults to 20.
+        Returns:
+            list: The names of the matching contacts in alphabetical order.
+        '''
+        prefix = prefix.lower()
+        names = []
+        for name_key, row in self.__iter_keys(prefix):
+            if not name_key.startswith(prefix) or len(names) >= limit:
+                break
+            names.append(self.__overlay[name_key].name.value if row is None else self.__string("name", row))
+        return names
+
+    def find_by_domain(self, domain: str) -> list[Record]:
+        '''
+        Find the contacts with an email at the given domain.
+
+        Args:
+            domain (str): The email domain, e.g. 'company.ua', case insensitive.
+        Returns:
+            list: The contacts with an email at the domain.
+        '''
+        return self.find_records("%@" + domain.lower().lstrip('@'), "email")
+
+    def get_domain_counts(self) -> dict[str, int]:
+        '''
+        Count the contacts per email domain with one pass over the email heap.
+
+        Returns:
+            dict: The number of contacts keyed by domain, the largest domains first.
+        '''
+        counts = {}
+        emails = [email for row, email in self.__scan_strings("email", lambda email: True)
+                  if not self.__overlay or self.__string("key", row) not in self.__overlay]
+        emails += [record.email.value for record in self.__overlay.values() if record is not None and record.email]
+        for email in emails:
+            domain = email_domain(email)
+            counts[domain] = counts.get(domain, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def find_fuzzy(self, name: str, limit: int = FUZZY_LIMIT, max_distance: int | None = None) -> list[Record]:
+        '''
+        Find the contacts whose names are closest to the given name by edit distance.
+
+        Args:
+            name (str): The name with possible typos, case insensitive.
+            limit (int): The maximum number of contacts to return. Defaults to 10.
+            max_distance (int | None): The largest tolerated number of typos, depends on the name length if None.
+        Returns:
+            list: The closest contacts, closest first.
+        '''
+        return [self.find(name_key) for name_key in self.__find_fuzzy_keys(name, limit, max_distance)]
+
+    def __find_fuzzy_keys(self, name: str, limit: int = FUZZY_LIMIT, max_distance: int | None = None) -> list[str]:
+        '''
+        Get the lowercased names closest to the given name, closest first.
+        '''
+        if self.__fuzzy_index is None:
+            self.__fuzzy_index = TrigramIndex(name_key for name_key, _ in self.__iter_keys())
+        return [name_key for name_key, _ in self.__fuzzy_index.search(name.lower(), limit, max_distance)]
+
+    def on_record_changed(self, record: Record, field: str, old_value, new_value) -> None:
+        '''
+        Keep a changed record in the overlay.
+        This method is called by the records attached to the address book.
+        Every find of a contact that is not in the overlay returns a new record, so when the changed
+        record is not the one in the overlay, only the reported change is applied to the stored fields:
+        a record taken before another record of the contact was changed does not drop that change.
+
+        Args:
+            record (Record): The changed record.
+            field (str): The name of the changed field ('phone', 'email', 'address' or 'birthday').
+            old_value: The previous value, None if the value was added.
+            new_value: The new value, None if the value was removed.
+        '''
+        name_key = record.name.value.lower()
+        if name_key not in self:
+            return
+        stored = self.__overlay.get(name_key)
+        if stored is not record:
+            state = stored.__getstate__() if stored is not None else self.__row_state(self.__find_row(name_key))
+            match field:
+                case "phone":
+                    state["phones"] = self.__changed_phones(state["phones"], old_value, new_value)
+                case "email" | "address":
+                    state[field] = new_value
+                case "birthday":
+                    state["birthday"] = record.__getstate__()["birthday"]
+            if state != record.__getstate__():
+                record = Record.restore(state)
+                record.attach(self)
+            self.__set(name_key, record)
+        self.__listeners.notify(record, field, old_value, new_value)
+
+    @staticmethod
+    def __changed_phones(phones, old_value: str | None, new_value: str | None) -> tuple[str, ...]:
+        '''
+        Get the phones of a contact with one phone replaced, added or removed.
+        '''
+        phones = list(phones)
+        if old_value in phones:
+            index = phones.index(old_value)
+            if new_value is None or new_value in phones:
+                del phones[index]
+            else:
+                phones[index] = new_value
+        elif new_value is not None and new_value not in phones:
+            phones.append(new_value)
+        return tuple(phones)
+
+    def get_upcoming_birthdays(self, days: int = 7) -> dict[str, str]:
+        '''
+        Get a list of upcoming birthdays within a certain number of days.
+        The (month, day) table of the snapshot is filtered with the days of the period in a single pass.
+        Birthdays on Feb 29th fall on March 1st in non-leap years.
+        If the birthday falls on a weekend, it adjusts the congratulation date to the next Monday.
+
+        Args:
+            days (int): The number of days to look ahead for upcoming birthdays. Defaults to 7.
+        Returns:
+            dict: A dictionary with names as keys and the date of the congratulation as values.
+        '''
+        today_date = datetime.today().date()
+        wanted = {}  # month * 100 + day -> (days from today, congratulation date)
+        for offset in range(min(days, 366) + 1):
+            day = today_date + timedelta(days=offset)
+            congratulation_day = day
+            if day.weekday() >= 5:
+                congratulation_day = day + timedelta(days=7 - day.weekday())
+            congratulation = (offset, datetime.strftime(congratulation_day, "%d.%m.%Y"))
+            wanted.setdefault(day.month * 100 + day.day, congratulation)
+            if day.month == 3 and day.day == 1 and not calendar.isleap(day.year):
+                wanted.setdefault(229, congratulation)
+
+        birth_days = self.__sections["birth_day"]
+        rows = self.__select_rows("birth_day", lambda column: numpy.isin(column, list(wanted)),
+                                  lambda value: value in wanted)
+        found = [(wanted[birth_days[row]], self.__string("name", row)) for row in rows
+                 if not self.__overlay or self.__string("key", row) not in self.__overlay]
+        for record in self.__overlay.values():
+            if record is not None and record.birthday:
+                birth_day = record.birthday.value.month * 100 + record.birthday.value.day
+                if birth_day in wanted:
+                    found.append((wanted[birth_day], record.name.value))
+        return {name: congratulation_day for (_, congratulation_day), name in sorted(found)}
+
+    def find_records(self, query: str | dict[str, str], field_type: str | None = None, mode: str = "and") -> list[Record]:
+        '''
+        Search for records by various fields.
+        The field_type can be one of the following: 'name', 'name~', 'phone', 'email', 'address', 'birthday'.
+        The 'name~' field type searches for the names closest to the query, tolerating typos (see find_fuzzy).
+        Several criteria can be given as a dictionary {field_type: query} and combined with AND or OR;
+        every criterion selects snapshot rows and the row sets are intersected or merged,
+        the records of the overlay are checked one by one.
+        The query can contain wildcards: '%' matches any sequence of characters, '_' matches any single character.
+        Results are cached until the next change of the address book.
+
+        Args:
+            query (str | dict): The string to search for, or a dictionary of criteria.
+            field_type (str | None): The field to search in, when query is a string.
+            mode (str): 'and' if all criteria must match, 'or' if any criterion must match. Defaults to 'and'.
+        Returns:
+            list: The matching records ordered by name.
+        '''
+        if mode not in ("and", "or"):
+            raise exceptions.InputError(f"Invalid search mode '{mode}'. Use 'and' or 'or'")
+        criteria = query if isinstance(query, dict) else {field_type: query}
+        key = (tuple(criteria.items()), mode)
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            result = self.__find_criteria_records(criteria, mode)
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def query_cache_stats(self) -> dict[str, int]:
+        '''
+        Get the statistics of the search result cache.
+
+        Returns:
+            dict: Cache hits, misses, current size and maximum size.
+        '''
+        return self.__query_cache.stats()
+
+    def __find_criteria_records(self, criteria: dict[str, str], mode: str) -> list[Record]:
+        '''
+        Get the records matching all or any of the criteria, ordered by name.
+        '''
+        criteria = {field: value for field, value in criteria.items() if field in SEARCH_FIELDS and value}
+        if not criteria:
+            return []
+        rows = None
+        for field, value in criteria.items():
+            found = set(self.__find_rows(field, value))
+            if rows is None:
+                rows = found
+            else:
+                rows = rows & found if mode == "and" else rows | found
+        matches = {field: self.__record_predicate(field, value) for field, value in criteria.items()}
+        combine = all if mode == "and" else any
+        records = [self.__materialize(row) for row in rows if self.__string("key", row) not in self.__overlay]
+        records += [record for record in self.__overlay.values()
+                    if record is not None and combine(matches[field](record) for field in criteria)]
+        return sorted(records, key=lambda record: record.name.value.lower())
+
+    def __find_rows(self, field_type: str, query: str) -> list[int]:
+        '''
+        Get the snapshot rows matching a single criterion, including the rows hidden by the overlay.
+        '''
+        search_value = query.lower()
+        matches = compile_pattern(search_value)
+        match field_type:
+            case 'name':
+                if not has_wildcards(search_value):
+                    row = self.__find_row(search_value)
+                    return [] if row is None else [row]
+                prefix = literal_prefix(search_value)
+                rows = []
+                for row in range(self.__lower_bound(prefix), self.__rows):
+                    name_key = self.__string("key", row)
+                    if not name_key.startswith(prefix):
+                        break
+                    if matches(name_key):
+                        rows.append(row)
+                return rows
+            case 'name~':
+                rows = (self.__find_row(name_key) for name_key in self.__find_fuzzy_keys(query))
+                return [row for row in rows if row is not None]
+            case 'phone':
+                if not has_wildcards(query):
+                    return self.__find_phone_rows(query)
+                matches = compile_pattern(query)
+                return [row for row, phones in self.__scan_strings("phones", lambda phones: True)
+                        if any(matches(phone) for phone in phones.split(","))]
+            case 'email' | 'address':
+                return [row for row, _ in self.__scan_strings(field_type, lambda value: matches(value.lower()))]
+            case 'birthday':
+                ordinal = self.__parse_birthday(query)
+                return self.__select_rows("birthday", lambda column: column == ordinal, lambda value: value == ordinal)
+        return []
+
+    def __record_predicate(self, field_type: str, query: str):
+        '''
+        Get the predicate of a single criterion for the records of the overlay.
+        '''
+        search_value = query.lower()
+        matches = compile_pattern(search_value)
+        match field_type:
+            case 'name':
+                return lambda record: matches(record.name.value.lower())
+            case 'name~':
+                name_keys = set(self.__find_fuzzy_keys(query))
+                return lambda record: record.name.value.lower() in name_keys
+            case 'phone':
+                matches = compile_pattern(query)
+                return lambda record: any(matches(phone) for phone in record.phone_values)
+            case 'email':
+                return lambda record: record.email is not None and matches(record.email.value.lower())
+            case 'address':
+                return lambda record: record.address is not None and matches(record.address.value.lower())
+            case 'birthday':
+                ordinal = self.__parse_birthday(query)
+                return lambda record: record.birthday is not None and record.birthday.value.toordinal() == ordinal
+        return lambda record: False
+
+    @staticmethod
+    def __parse_birthday(query: str) -> int:
+        '''
+        Get the date ordinal of a searched birthday.
+        '''
+        try:
+            return datetime.strptime(query, "%d.%m.%Y").toordinal()
+        except ValueError:
+            raise exceptions.InputError("Invalid birthday date format for search. Use DD.MM.YYYY")
+
+    def __set(self, name_key: str, record: Record | None) -> None:
+        '''
+        Put a changed record in the overlay, or None for a removed one.
+        '''
+        was_present = name_key in self
+        self.__overlay[name_key] = record
+        self.__count += (record is not None) - was_present
+        self.__generation += 1
+        if self.__fuzzy_index is not None:
+            if record is None:
+                self.__fuzzy_index.discard(name_key)
+            elif not was_present:
+                self.__fuzzy_index.add(name_key)
+
+    def __iter_keys(self, start: str = "") -> Iterator[tuple[str, int | None]]:
+        '''
+        Iterate over the names of the contacts from the given one, in order, merging the overlay into the snapshot.
+
+        Returns:
+            Iterator: (lowercased name, snapshot row) tuples, the row is None for the records of the overlay.
+        '''
+        added = sorted(name_key for name_key, record in self.__overlay.items()
+                       if record is not None and name_key >= start)
+        position = 0
+        for row in range(self.__lower_bound(start), self.__rows):
+            name_key = self.__string("key", row)
+            while position < len(added) and added[position] < name_key:
+                yield added[position], None
+                position += 1
+            if name_key not in self.__overlay:
+                yield name_key, row
+        for name_key in added[position:]:
+            yield name_key, None
+
+    def __lower_bound(self, name_key: str) -> int:
+        '''
+        Get the first snapshot row whose key is not less than the given one.
+        '''
+        low, high = 0, self.__rows
+        while low < high:
+            middle = (low + high) // 2
+            if self.__string("key", middle) < name_key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __find_row(self, name_key: str) -> int | None:
+        '''
+        Get the snapshot row of a lowercased name, None if it is not in the snapshot.
+        '''
+        row = self.__lower_bound(name_key)
+        return row if row < self.__rows and self.__string("key", row) == name_key else None
+
+    def __string(self, column: str, row: int) -> str | None:
+        '''
+        Decode the value of a string column, None if it is empty.
+        '''
+        offsets, heap = self.__offsets[column]
+        start, end = offsets[row], offsets[row + 1]
+        return str(heap[start:end], "utf-8") if end > start else None
+
+    def __scan_strings(self, column: str, matches) -> list[tuple[int, str]]:
+        '''
+        Get the rows whose value in a string column is set and matches a predicate.
+        '''
+        found = []
+        for row in range(self.__rows):
+            value = self.__string(column, row)
+            if value is not None and matches(value):
+                found.append((row, value))
+        return found
+
+    def __find_phone_rows(self, phone: str) -> list[int]:
+        '''
+        Get the rows with an exact phone number by searching the phone heap.
+        '''
+        offsets, heap = self.__offsets["phones"]
+        start = self.__heap_start["phones"]
+        end = start + len(heap)
+        target = phone.encode()
+        rows = []
+        position = self.__mmap.find(target, start, end)
+        while position >= 0:
+            row = bisect_right(offsets, position - start) - 1
+            first, last = start + offsets[row], start + offsets[row + 1]
+            after = position + len(target)
+            if (position == first or self.__mmap[position - 1] == ord(",")) and \
+                    (after == last or self.__mmap[after] == ord(",")):
+                rows.append(row)
+            position = self.__mmap.find(target, after, end)
+        return rows
+
+    def __select_rows(self, column: str, vector_predicate, predicate) -> list[int]:
+        '''
+        Get the rows whose value in a numeric column satisfies a predicate.
+
+        Args:
+            column (str): The name of the column.
+            vector_predicate (callable): The predicate for a NumPy array, used when NumPy is installed.
+            predicate (callable): The predicate for a single value.
+        Returns:
+            list: The matching rows.
+        '''
+        values = self.__sections[column]
+        if numpy is not None and len(values):
+            return numpy.flatnonzero(vector_predicate(numpy.asarray(values))).tolist()
+        return [row for row, value in enumerate(values) if predicate(value)]
+
+    def __row_state(self, row: int) -> dict:
+        '''
+        Decode a snapshot row into the state of a record, see Record.__getstate__.
+        '''
+        phones = self.__string("phones", row)
+        return {"name": self.__string("name", row),
+                "phones": tuple(phones.split(",")) if phones else (),
+                "address": self.__string("address", row),
+                "email": self.__string("email", row),
+                "birthday": self.__sections["birthday"][row] or None}
+
+    def __materialize(self, row: int) -> Record:
+        '''
+        Build a Record from a snapshot row and attach it to the address book.
+        '''
+        record = Record.restore(self.__row_state(row))
+        record.attach(self)
+        return record
+
+    def __len__(self):
+        return self.__count
+
+    def __contains__(self, name):
+        name_key = name.lower()
+        if name_key in self.__overlay:
+            return self.__overlay[name_key] is not None
+        return self.__find_row(name_key) is not None
+
+    def __str__(self):
+        return "Address book:\n" + "".join(f"{record}\n" for record in self.iter_contacts())
+
+
+class SnapshotObject:
+    '''
+    Storage of an address book as a binary snapshot, with the interface of SerializedObject.
+    The snapshot is stored next to the pickle file, with the SNAPSHOT_SUFFIX extension; it is created
+    from the pickle and its journal when it does not exist. save_data and save_in_background
+    write a new snapshot if the book was changed.
+
+    Attributes:
+        object (SnapshotAddressBook): The stored address book.
+    '''
+    def __init__(self, filename: str, object):
+        '''
+        Open the snapshot of an address book.
+
+        Args:
+            filename (str): The name of the pickle file of the address book.
+            object (AddressBook): The empty address book used when there is no pickle.
+        '''
+        self.__path = os.path.splitext(filename)[0] + SNAPSHOT_SUFFIX
+        if not os.path.exists(self.__path):
+            stored = JournaledObject(filename, object).object if os.path.exists(filename) else object
+            write_snapshot(self.__path, stored.get_all_contacts())
+        self.object = SnapshotAddressBook(self.__path)
+
+    def commit(self) -> None:
+        '''
+        Nothing is written after a single change, the address book is saved by save_in_background
+        at the autosave interval and by save_data.
+        '''
+
+    def save_data(self) -> None:
+        '''
+        Write a new snapshot with the changes of the overlay, see SnapshotAddressBook.save.
+        '''
+        if self.object.is_modified:
+            self.object.save(self.__path)
+
+    def save_in_background(self, lock) -> None:
+        '''
+        Write a new snapshot with the changes of the overlay while commands keep changing the book,
+        see SnapshotAddressBook.save_in_background.
+
+        Args:
+            lock (threading.Lock): The lock held by the thread changing the book.
+        '''
+        self.object.save_in_background(self.__path, lock)
+
+
+def open_snapshot(filename: str, object):
+    '''
+    Open the storage of a collection in the snapshot mode.
+    Address books are stored as binary snapshots; notebooks have no snapshot format and are journaled.
+
+    Args:
+        filename (str): The name of the pickle file of the collection.
+        object (AddressBook | Notebook): The empty collection.
+    Returns:
+        SnapshotObject | JournaledObject: The storage of the collection.
+    '''
+    if isinstance(object, Notebook):
+        return JournaledObject(filename, object)
+    return SnapshotObject(filename, object)
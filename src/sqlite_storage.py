@@ -0,0 +1,1003 @@
+import calendar
+import os
+import sqlite3
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+import exceptions
+from addressbook import Record, email_domain
+from notebook import Note, Notebook, TITLE_BOOST, parse_tag_query
+from fuzzy_index import FUZZY_LIMIT, TrigramIndex
+from journal import JournaledObject
+from listeners import ListenerRegistry
+from query_cache import QueryCache
+from text_index import SEARCH_LIMIT, parse_query, tokenize
+from wildcard import compile_pattern, has_wildcards, literal_prefix
+
+# Extension of the database file, replaces the extension of the pickle file
+DATABASE_SUFFIX = ".db"
+
+# Character greater than any character of a name, ends the range of the names starting with a prefix
+_MAX_CHAR = "\U0010ffff"
+
+# Separator of the tags of a note in a single column
+_TAG_SEPARATOR = "\x1f"
+
+_CONTACTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    phones TEXT NOT NULL,
+    address TEXT,
+    address_key TEXT,
+    email TEXT,
+    email_key TEXT,
+    domain TEXT,
+    birthday INTEGER,
+    birth_day INTEGER
+);
+CREATE INDEX IF NOT EXISTS contacts_address ON contacts (address_key);
+CREATE INDEX IF NOT EXISTS contacts_email ON contacts (email_key);
+CREATE INDEX IF NOT EXISTS contacts_domain ON contacts (domain);
+CREATE INDEX IF NOT EXISTS contacts_birthday ON contacts (birthday);
+CREATE INDEX IF NOT EXISTS contacts_birth_day ON contacts (birth_day);
+CREATE TABLE IF NOT EXISTS phones (
+    phone TEXT NOT NULL,
+    contact_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones (phone);
+CREATE INDEX IF NOT EXISTS phones_contact ON phones (contact_id);
+"""
+
+_NOTES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    note_id INTEGER NOT NULL,
+    PRIMARY KEY (tag, note_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_note ON tags (note_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5 (
+    title, text, content='notes', content_rowid='id',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '_'"
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_vocab USING fts5vocab (notes_fts, 'col');
+CREATE TRIGGER IF NOT EXISTS notes_inserted AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_deleted AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_updated AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_fts (notes_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO notes_fts (rowid, title, text) VALUES (new.id, new.title, new.text);
+END;
+"""
+
+_CONTACT_COLUMNS = "name, phones, address, email, birthday"
+
+_NOTE_COLUMNS = (f"id, title, text, "
+                 f"(SELECT group_concat(tag, char({ord(_TAG_SEPARATOR)})) FROM tags WHERE note_id = notes.id)")
+
+
+def _wildcard_match(pattern: str, value: str | None) -> bool:
+    '''
+    The wildcard_match function of the database: the lowercased value is matched with compile_pattern.
+    The built-in LIKE ignores the case of ASCII letters only, so the columns without a lowercased copy,
+    the titles and texts of the notes, are matched with this function.
+    '''
+    return value is not None and compile_pattern(pattern)(value.lower())
+
+
+def _pattern_condition(column: str, pattern: str) -> tuple[str, list]:
+    '''
+    Translate a wildcard pattern on a lowercased key column into a condition that can use the index
+    of the column: an equality for a pattern without wildcards, otherwise the range of the literal prefix
+    narrowed by the built-in LIKE, whose '%' and '_' match like the wildcards of compile_pattern.
+
+    Returns:
+        tuple: The condition and its parameters.
+    '''
+    if not has_wildcards(pattern):
+        return f"{column} = ?", [pattern]
+    prefix = literal_prefix(pattern)
+    if prefix:
+        return f"{column} >= ? AND {column} < ? AND {column} LIKE ?", [prefix, prefix + _MAX_CHAR, pattern]
+    return f"{column} LIKE ?", [pattern]
+
+
+def _repeats_within(note: Note, word: str, distance: int) -> bool:
+    '''
+    Check if a word occurs twice at most distance words apart in the title or the text of a note.
+    FTS5 lets one occurrence satisfy a NEAR group of the same word twice, so such clauses are checked here.
+    '''
+    for text in (note.title, note.text):
+        positions = [position for position, token in enumerate(tokenize(text)) if token == word]
+        if any(second - first <= distance for first, second in zip(positions, positions[1:])):
+            return True
+    return False
+
+
+def _placeholders(values) -> str:
+    '''
+    Get the parameter placeholders of an IN list.
+    '''
+    return ", ".join("?" * len(values))
+
+
+def connect(path: str) -> sqlite3.Connection:
+    '''
+    Open a database and prepare the connection.
+
+    Args:
+        path (str): The path to the database file, created if it does not exist.
+    Returns:
+        sqlite3.Connection: The connection; changes are written by its commit.
+            The connection can be used by another thread than the one that opened it,
+            but not by two threads at once.
+    '''
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.create_function("wildcard_match", 2, _wildcard_match, deterministic=True)
+    return connection
+
+
+class SqlQueryPlan:
+    '''
+    Execution plan of a multi-criteria search over a SQLite address book.
+    The criteria are combined into the WHERE clause of a single query, the indexes are chosen by SQLite.
+    '''
+    def __init__(self, connection: sqlite3.Connection, where: str, params: list, materialize):
+        '''
+        Initialize the plan.
+
+        Args:
+            connection (sqlite3.Connection): The database.
+            where (str): The condition of the query, empty if there are no criteria.
+            params (list): The parameters of the condition.
+            materialize (callable): The function that builds a Record from a row.
+        '''
+        self.__connection = connection
+        self.__sql = f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE {where} ORDER BY name_key" if where else ""
+        self.__params = params
+        self.__materialize = materialize
+
+    def execute(self) -> list[Record]:
+        '''
+        Run the plan.
+
+        Returns:
+            list: The records matching the query ordered by name.
+        '''
+        if not self.__sql:
+            return []
+        return [self.__materialize(row) for row in self.__connection.execute(self.__sql, self.__params)]
+
+    def describe(self) -> list[str]:
+        '''
+        Describe the plan in a human readable form.
+
+        Returns:
+            list: The query followed by the steps of the plan chosen by SQLite.
+        '''
+        if not self.__sql:
+            return ["No criteria"]
+        steps = self.__connection.execute("EXPLAIN QUERY PLAN " + self.__sql, self.__params)
+        return [self.__sql] + [detail for *_, detail in steps]
+
+
+class SqliteAddressBook:
+    '''
+    Address book stored in a SQLite database.
+    Contacts are rows of the contacts table, their phones are also stored in the indexed phones table.
+    Nothing is loaded when the book is opened: every method runs a query that reads only the rows
+    it returns, and Record objects are materialized from these rows. The records write their changes
+    back to the database. Names, emails, email domains, birthdays and phones are indexed;
+    the trigram index of the names is built in memory on the first fuzzy search.
+    Listeners registered with add_listener are notified like the listeners of AddressBook.
+
+    The class provides the AddressBook interface used by the console bot. The changes are
+    written to the database by the commit of the connection, see SqliteObject.
+    '''
+    def __init__(self, connection: sqlite3.Connection):
+        '''
+        Open the address book stored in a database, creating its tables if they do not exist.
+
+        Args:
+            connection (sqlite3.Connection): The database opened with connect.
+        '''
+        self.__db = connection
+        self.__db.executescript(_CONTACTS_SCHEMA)
+        self.__count = None                 # number of contacts, counted on the first len()
+        self.__fuzzy_index = None           # built on the first fuzzy search
+        self.__generation = 0               # number of changes, tags the cached search results
+        self.__query_cache = QueryCache()
+        self.__listeners = ListenerRegistry()
+
+    @property
+    def generation(self) -> int:
+        '''
+        The number of changes made to the address book and its records.
+        '''
+        return self.__generation
+
+    def add_listener(self, listener) -> None:
+        '''
+        Register a function notified about every added, removed or changed record.
+
+        Args:
+            listener (callable): The function called as listener(record, field, old_value, new_value);
+                field is None when a whole record is added or removed.
+        '''
+        self.__listeners.add(listener)
+
+    def remove_listener(self, listener) -> None:
+        '''
+        Unregister a function registered with add_listener.
+
+        Args:
+            listener (callable): The registered function.
+        '''
+        self.__listeners.discard(listener)
+
+    def get_all_contacts(self) -> list[Record]:
+        '''
+        Get all contacts in the address book sorted by name.
+
+        Returns:
+            list: A list of all contacts in the address book.
+        '''
+        return list(self.iter_contacts())
+
+    def iter_contacts(self, offset: int = 0, limit: int | None = None) -> Iterator[Record]:
+        '''
+        Iterate over the contacts sorted by name, one page at a time.
+
+        Args:
+            offset (int): The number of contacts to skip. Defaults to 0.
+            limit (int | None): The maximum number of contacts to return, all remaining if None.
+        Returns:
+            Iterator: The contacts of the requested page.
+        '''
+        rows = self.__db.execute(f"SELECT {_CONTACT_COLUMNS} FROM contacts ORDER BY name_key LIMIT ? OFFSET ?",
+                                 (-1 if limit is None else limit, offset))
+        return (self.__materialize(row) for row in rows.fetchall())
+
+    def add_record(self, record: Record) -> None:
+        '''
+        Add a record to the address book.
+        If the record already exists (based on the name), it will update the existing record.
+
+        Args:
+            record (Record): The record to add to the address book.
+        '''
+        self.__generation += 1
+        state = record.__getstate__()
+        name_key = state["name"].lower()
+        previous = self.__fetch(name_key)
+        if previous is None:
+            contact_id = self.__db.execute(
+                "INSERT INTO contacts (name_key, name, phones, address, address_key, email, email_key, domain, "
+                "birthday, birth_day) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (name_key, state["name"], *self.__values(state))).lastrowid
+            if self.__count is not None:
+                self.__count += 1
+            if self.__fuzzy_index is not None:
+                self.__fuzzy_index.add(name_key)
+        else:
+            contact_id = self.__update(name_key, state)
+            previous.attach(None)
+            self.__listeners.notify(previous, None, previous, None)
+        self.__write_phones(contact_id, state["phones"])
+        record.attach(self)
+        self.__listeners.notify(record, None, None, record)
+
+    def import_records(self, records) -> int:
+        '''
+        Add a batch of records to the address book.
+
+        Args:
+            records (Iterable[Record]): The records to add.
+        Returns:
+            int: The number of added records.
+        '''
+        count = 0
+        for record in records:
+            self.add_record(record)
+            count += 1
+        return count
+
+    def find(self, name: str) -> Record | None:
+        '''
+        Find a record by name.
+
+        Args:
+            name (str): The name of the record to find.
+        Returns:
+            Record | None: The record if found, None if not found.
+        '''
+        return self.__fetch(name.lower())
+
+    def remove(self, name: str) -> bool:
+        '''
+        Remove a record by name.
+
+        Args:
+            name (str): The name of the record to remove.
+        Returns:
+            bool: True if the record was removed, False if it was not found.
+        '''
+        name_key = name.lower()
+        row = self.__db.execute("SELECT id FROM contacts WHERE name_key = ?", (name_key,)).fetchone()
+        if row is None:
+            return False
+        removed = self.__fetch(name_key) if len(self.__listeners) else None
+        self.__db.execute("DELETE FROM phones WHERE contact_id = ?", row)
+        self.__db.execute("DELETE FROM contacts WHERE id = ?", row)
+        self.__generation += 1
+        if self.__count is not None:
+            self.__count -= 1
+        if self.__fuzzy_index is not None:
+            self.__fuzzy_index.discard(name_key)
+        if removed is not None:
+            removed.attach(None)
+            self.__listeners.notify(removed, None, removed, None)
+        return True
+
+    def complete_names(self, prefix: str, limit: int = 20) -> list[str]:
+        '''
+        Get the names of the contacts that start with the prefix.
+
+        Args:
+            prefix (str): The beginning of the name, case insensitive.
+            limit (int): The maximum number of names to return. Defaults to 20.
+        Returns:
+            list: The names of the matching contacts in alphabetical order.
+        '''
+        prefix = prefix.lower()
+        rows = self.__db.execute("SELECT name FROM contacts WHERE name_key >= ? AND name_key < ? "
+                                 "ORDER BY name_key LIMIT ?", (prefix, prefix + _MAX_CHAR, limit))
+        return [name for name, in rows]
+
+    def find_by_domain(self, domain: str) -> list[Record]:
+        '''
+        Find the contacts with an email at the given domain.
+
+        Args:
+            domain (str): The email domain, e.g. 'company.ua', case insensitive.
+        Returns:
+            list: The contacts with an email at the domain.
+        '''
+        return self.__select("domain = ?", [domain.lower().lstrip('@')])
+
+    def get_domain_counts(self) -> dict[str, int]:
+        '''
+        Count the contacts per email domain with the domain index.
+
+        Returns:
+            dict: The number of contacts keyed by domain, the largest domains first.
+        '''
+        rows = self.__db.execute("SELECT domain, COUNT(*) FROM contacts WHERE domain IS NOT NULL "
+                                 "GROUP BY domain ORDER BY COUNT(*) DESC, domain")
+        return dict(rows.fetchall())
+
+    def find_fuzzy(self, name: str, limit: int = FUZZY_LIMIT, max_distance: int | None = None) -> list[Record]:
+        '''
+        Find the contacts whose names are closest to the given name by edit distance.
+
+        Args:
+            name (str): The name with possible typos, case insensitive.
+            limit (int): The maximum number of contacts to return. Defaults to 10.
+            max_distance (int | None): The largest tolerated number of typos, depends on the name length if None.
+        Returns:
+            list: The closest contacts, closest first.
+        '''
+        name_keys = self.__find_fuzzy_keys(name, limit, max_distance)
+        found = {record.name.value.lower(): record
+                 for record in self.__select(f"name_key IN ({_placeholders(name_keys)})", name_keys)}
+        return [found[name_key] for name_key in name_keys if name_key in found]
+
+    def __find_fuzzy_keys(self, name: str, limit: int = FUZZY_LIMIT, max_distance: int | None = None) -> list[str]:
+        '''
+        Get the lowercased names closest to the given name, closest first.
+        '''
+        if self.__fuzzy_index is None:
+            self.__fuzzy_index = TrigramIndex(name_key for name_key, in self.__db.execute("SELECT name_key FROM contacts"))
+        return [name_key for name_key, _ in self.__fuzzy_index.search(name.lower(), limit, max_distance)]
+
+    def on_record_changed(self, record: Record, field: str, old_value, new_value) -> None:
+        '''
+        Write a change of a materialized record back to the database.
+        This method is called by the records attached to the address book.
+        Every find returns a new record for the contact, so only the reported change is applied
+        to the stored fields: a record taken before another record of the contact was changed
+        does not write back its old values.
+
+        Args:
+            record (Record): The changed record.
+            field (str): The name of the changed field ('phone', 'email', 'address' or 'birthday').
+            old_value: The previous value, None if the value was added.
+            new_value: The new value, None if the value was removed.
+        '''
+        name_key = record.name.value.lower()
+        row = self.__db.execute(f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE name_key = ?",
+                                (name_key,)).fetchone()
+        if row is None:
+            return
+        state = dict(zip(("name", "phones", "address", "email", "birthday"), row))
+        phones = state["phones"].split(",") if state["phones"] else []
+        match field:
+            case "phone":
+                if old_value in phones:
+                    index = phones.index(old_value)
+                    if new_value is None or new_value in phones:
+                        del phones[index]
+                    else:
+                        phones[index] = new_value
+                elif new_value is not None and new_value not in phones:
+                    phones.append(new_value)
+            case "email" | "address":
+                state[field] = new_value
+            case "birthday":
+                state["birthday"] = record.__getstate__()["birthday"]
+        state["phones"] = phones
+        contact_id = self.__update(name_key, state)
+        self.__generation += 1
+        if field == "phone":
+            self.__write_phones(contact_id, state["phones"])
+        self.__listeners.notify(record, field, old_value, new_value)
+
+    def get_upcoming_birthdays(self, days: int = 7) -> dict[str, str]:
+        '''
+        Get a list of upcoming birthdays within a certain number of days.
+        The contacts are selected with the index of the (month, day) of their birthdays.
+        Birthdays on Feb 29th fall on March 1st in non-leap years.
+        If the birthday falls on a weekend, it adjusts the congratulation date to the next Monday.
+
+        Args:
+            days (int): The number of days to look ahead for upcoming birthdays. Defaults to 7.
+        Returns:
+            dict: A dictionary with names as keys and the date of the congratulation as values.
+        '''
+        today_date = datetime.today().date()
+        wanted = {}  # month * 100 + day -> (days from today, congratulation date)
+        for offset in range(min(days, 366) + 1):
+            day = today_date + timedelta(days=offset)
+            congratulation_day = day
+            if day.weekday() >= 5:
+                congratulation_day = day + timedelta(days=7 - day.weekday())
+            congratulation = (offset, datetime.strftime(congratulation_day, "%d.%m.%Y"))
+            wanted.setdefault(day.month * 100 + day.day, congratulation)
+            if day.month == 3 and day.day == 1 and not calendar.isleap(day.year):
+                wanted.setdefault(229, congratulation)
+
+        rows = self.__db.execute(f"SELECT name, birth_day FROM contacts WHERE birth_day IN ({_placeholders(wanted)})",
+                                 list(wanted))
+        found = sorted((wanted[birth_day], name) for name, birth_day in rows)
+        return {name: congratulation_day for (_, congratulation_day), name in found}
+
+    def find_records(self, query: str | dict[str, str], field_type: str | None = None, mode: str = "and") -> list[Record]:
+        '''
+        Search for records by various fields.
+        The field_type can be one of the following: 'name', 'name~', 'phone', 'email', 'address', 'birthday'.
+        The 'name~' field type searches for the names closest to the query, tolerating typos (see find_fuzzy).
+        Several criteria can be given as a dictionary {field_type: query} and combined with AND or OR
+        in a single query, see plan_query.
+        The query can contain wildcards: '%' matches any sequence of characters, '_' matches any single character.
+        Results are cached until the next change of the address book.
+
+        Args:
+            query (str | dict): The string to search for, or a dictionary of criteria.
+            field_type (str | None): The field to search in, when query is a string.
+            mode (str): 'and' if all criteria must match, 'or' if any criterion must match. Defaults to 'and'.
+        Returns:
+            list: The matching records ordered by name.
+        '''
+        criteria = query if isinstance(query, dict) else {field_type: query}
+        key = (tuple(criteria.items()), mode)
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            result = self.plan_query(criteria, mode).execute()
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def query_cache_stats(self) -> dict[str, int]:
+        '''
+        Get the statistics of the search result cache.
+
+        Returns:
+            dict: Cache hits, misses, current size and maximum size.
+        '''
+        return self.__query_cache.stats()
+
+    def plan_query(self, criteria: dict[str, str], mode: str = "and") -> SqlQueryPlan:
+        '''
+        Build the query of a multi-criteria search.
+        Exact values and birthdays, patterns with a literal prefix and emails ending in '@domain'
+        are conditions on indexed columns; other patterns are matched by the built-in LIKE.
+        Fuzzy names are looked up in the trigram index first. Criteria for unknown fields are ignored.
+
+        Args:
+            criteria (dict): The searched values or patterns keyed by field type.
+            mode (str): 'and' if all criteria must match, 'or' if any criterion must match. Defaults to 'and'.
+        Returns:
+            SqlQueryPlan: The plan, which can be executed or described.
+        Raises:
+            exceptions.InputError: If the mode is unknown or a birthday is not a valid date.
+        '''
+        if mode not in ("and", "or"):
+            raise exceptions.InputError(f"Invalid search mode '{mode}'. Use 'and' or 'or'")
+        conditions, params = [], []
+        for field_type, query in criteria.items():
+            condition = self.__condition(field_type, query) if query else None
+            if condition is not None:
+                conditions.append(f"({condition[0]})")
+                params.extend(condition[1])
+        return SqlQueryPlan(self.__db, f" {mode.upper()} ".join(conditions), params, self.__materialize)
+
+    def __condition(self, field_type: str, query: str) -> tuple[str, list] | None:
+        '''
+        Translate a single criterion into a condition on the contacts table.
+
+        Returns:
+            tuple | None: The condition and its parameters, None for an unknown field.
+        '''
+        search_value = query.lower()
+        match field_type:
+            case 'name':
+                return _pattern_condition("name_key", search_value)
+            case 'name~':
+                name_keys = self.__find_fuzzy_keys(query)
+                return f"name_key IN ({_placeholders(name_keys)})", name_keys
+            case 'phone':
+                # Phones are compared as they are, without lowercasing
+                condition, params = _pattern_condition("phone", query)
+                return f"id IN (SELECT contact_id FROM phones WHERE {condition})", params
+            case 'email':
+                if search_value.startswith("%@") and not has_wildcards(search_value[2:]):
+                    return "domain = ?", [search_value[2:]]
+                return _pattern_condition("email_key", search_value)
+            case 'address':
+                return _pattern_condition("address_key", search_value)
+            case 'birthday':
+                try:
+                    ordinal = datetime.strptime(query, "%d.%m.%Y").toordinal()
+                except ValueError:
+                    raise exceptions.InputError("Invalid birthday date format for search. Use DD.MM.YYYY")
+                return "birthday = ?", [ordinal]
+        return None
+
+    def __values(self, state: dict) -> tuple:
+        '''
+        Get the values of the columns after the name from the state of a record.
+        '''
+        email, birthday = state["email"], state["birthday"]
+        birth_day = None
+        if birthday:
+            day = date.fromordinal(birthday)
+            birth_day = day.month * 100 + day.day
+        address = state["address"]
+        return (",".join(state["phones"]), address, address.lower() if address else None, email,
+                email.lower() if email else None, email_domain(email) if email else None, birthday, birth_day)
+
+    def __update(self, name_key: str, state: dict) -> int | None:
+        '''
+        Write the fields of a record to its row.
+
+        Returns:
+            int | None: The id of the row, None if there is no contact with the name.
+        '''
+        row = self.__db.execute(
+            "UPDATE contacts SET name = ?, phones = ?, address = ?, address_key = ?, email = ?, email_key = ?, "
+            "domain = ?, birthday = ?, birth_day = ? WHERE name_key = ? RETURNING id",
+            (state["name"], *self.__values(state), name_key)).fetchone()
+        return row[0] if row else None
+
+    def __write_phones(self, contact_id: int, phones) -> None:
+        '''
+        Replace the rows of the phone index of a contact.
+        '''
+        self.__db.execute("DELETE FROM phones WHERE contact_id = ?", (contact_id,))
+        self.__db.executemany("INSERT INTO phones (phone, contact_id) VALUES (?, ?)",
+                              [(phone, contact_id) for phone in phones])
+
+    def __fetch(self, name_key: str) -> Record | None:
+        '''
+        Materialize the record with the given lowercased name.
+        '''
+        found = self.__select("name_key = ?", [name_key])
+        return found[0] if found else None
+
+    def __select(self, where: str, params: list) -> list[Record]:
+        '''
+        Materialize the records matching a condition, ordered by name.
+        '''
+        rows = self.__db.execute(f"SELECT {_CONTACT_COLUMNS} FROM contacts WHERE {where} ORDER BY name_key", params)
+        return [self.__materialize(row) for row in rows]
+
+    def __materialize(self, row: tuple) -> Record:
+        '''
+        Build a Record from a row and attach it to the address book.
+        '''
+        name, phones, address, email, birthday = row
+        record = Record.restore({"name": name,
+                                 "phones": phones.split(",") if phones else (),
+                                 "address": address,
+                                 "email": email,
+                                 "birthday": birthday})
+        record.attach(self)
+        return record
+
+    def __len__(self):
+        if self.__count is None:
+            self.__count = self.__db.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+        return self.__count
+
+    def __contains__(self, name):
+        return self.__db.execute("SELECT 1 FROM contacts WHERE name_key = ?", (name.lower(),)).fetchone() is not None
+
+    def __str__(self):
+        return "Address book:\n" + "".join(f"{record}\n" for record in self.iter_contacts())
+
+
+class SqliteNotebook:
+    '''
+    Notebook stored in a SQLite database.
+    Notes are rows of the notes table and their tags rows of the tags table; titles and texts are
+    indexed by an FTS5 table, which ranks the full-text search by BM25 like the in-memory notebook.
+    Nothing is loaded when the notebook is opened: every method runs a query that reads only the notes
+    it returns, and Note objects are materialized from the rows. The notes write their changes back
+    to the database. Listeners registered with add_listener are notified like the listeners of Notebook.
+
+    The class provides the Notebook interface used by the console bot. The changes are
+    written to the database by the commit of the connection, see SqliteObject.
+    '''
+    def __init__(self, connection: sqlite3.Connection):
+        '''
+        Open the notebook stored in a database, creating its tables if they do not exist.
+        Note ids continue after the largest stored id.
+
+        Args:
+            connection (sqlite3.Connection): The database opened with connect.
+        '''
+        self.__db = connection
+        self.__db.executescript(_NOTES_SCHEMA)
+        self.__count = None                 # number of notes, counted on the first len()
+        self.__generation = 0
+        self.__query_cache = QueryCache()
+        self.__listeners = ListenerRegistry()
+        last_id = self.__db.execute("SELECT MAX(id) FROM notes").fetchone()[0]
+        if last_id is not None:
+            Note.current_id = max(Note.current_id, last_id)
+
+    @property
+    def generation(self) -> int:
+        '''
+        The number of changes made to the notebook and its notes.
+        '''
+        return self.__generation
+
+    def add_listener(self, listener) -> None:
+        '''
+        Register a function notified about every added, removed or changed note.
+
+        Args:
+            listener (callable): The function called as listener(note, field, old_value, new_value);
+                field is None when a whole note is added or removed.
+        '''
+        self.__listeners.add(listener)
+
+    def remove_listener(self, listener) -> None:
+        '''
+        Unregister a function registered with add_listener.
+
+        Args:
+            listener (callable): The registered function.
+        '''
+        self.__listeners.discard(listener)
+
+    def add_note(self, note: Note):
+        '''
+        Add a note to the notebook. A stored note with the same id is replaced.
+        '''
+        previous = self.find_note_by_id(note.id)
+        if previous is not None:
+            self.remove_note(previous)
+        self.__db.execute("INSERT INTO notes (id, title, text) VALUES (?, ?, ?)", (note.id, note.title, note.text))
+        self.__db.executemany("INSERT INTO tags (tag, note_id) VALUES (?, ?)", [(tag, note.id) for tag in note.tags])
+        if self.__count is not None:
+            self.__count += 1
+        self.__generation += 1
+        note.attach(self)
+        self.__listeners.notify(note, None, None, note)
+
+    def remove_note(self, note: Note):
+        '''
+        Remove a note from the notebook.
+
+        Raises:
+            ValueError: If the note is not in the notebook.
+        '''
+        if note not in self:
+            raise ValueError(f"Note #{note.id} is not in the notebook")
+        self.__db.execute("DELETE FROM tags WHERE note_id = ?", (note.id,))
+        self.__db.execute("DELETE FROM notes WHERE id = ?", (note.id,))
+        if self.__count is not None:
+            self.__count -= 1
+        self.__generation += 1
+        note.attach(None)
+        self.__listeners.notify(note, None, note, None)
+
+    def append(self, note: Note):
+        '''
+        Add a note to the notebook, see add_note.
+        '''
+        self.add_note(note)
+
+    def remove(self, note: Note):
+        '''
+        Remove a note from the notebook, see remove_note.
+        '''
+        self.remove_note(note)
+
+    def on_note_changed(self, note: Note, field: str, old_value, new_value):
+        '''
+        Write a change of a materialized note back to the database.
+        This method is called by the notes attached to the notebook.
+
+        Args:
+            note (Note): The changed note.
+            field (str): The name of the changed field ('title', 'text' or 'tag').
+            old_value (str | None): The previous value, None if the value was added.
+            new_value (str | None): The new value, None if the value was removed.
+        '''
+        match field:
+            case "title":
+                self.__db.execute("UPDATE notes SET title = ? WHERE id = ?", (new_value, note.id))
+            case "text":
+                self.__db.execute("UPDATE notes SET text = ? WHERE id = ?", (new_value, note.id))
+            case "tag":
+                if old_value is not None:
+                    self.__db.execute("DELETE FROM tags WHERE tag = ? AND note_id = ?", (old_value, note.id))
+                if new_value is not None:
+                    self.__db.execute("INSERT OR IGNORE INTO tags (tag, note_id) VALUES (?, ?)", (new_value, note.id))
+        self.__generation += 1
+        self.__listeners.notify(note, field, old_value, new_value)
+
+    def query_cache_stats(self) -> dict[str, int]:
+        '''
+        Get the statistics of the search result cache.
+
+        Returns:
+            dict: Cache hits, misses, current size and maximum size.
+        '''
+        return self.__query_cache.stats()
+
+    def find_note_by_tags(self, tags):
+        '''
+        Find the notes that have at least one of the given tags.
+
+        Args:
+            tags (set): A set of tags to search for.
+        Returns:
+            list: The matching notes ordered by id.
+        '''
+        alternatives = sorted({(tag.strip().lower(),) for tag in tags if tag.strip()})
+        return self.__find_by_tags(alternatives, []) if alternatives else []
+
+    def find_note_by_tag_query(self, query: str) -> list[Note]:
+        '''
+        Find notes by a tag query, see Notebook.find_note_by_tag_query.
+        Every alternative is a lookup of the tags index grouped by note, the alternatives are merged
+        with UNION and the excluded tags removed with EXCEPT.
+
+        Args:
+            query (str): The tag query, e.g. 'work+urgent,home,-done'.
+        Returns:
+            list: The matching notes ordered by id.
+        Raises:
+            exceptions.InputError: If the query contains no tags.
+        '''
+        return self.__find_by_tags(*parse_tag_query(query))
+
+    def __find_by_tags(self, alternatives: list[tuple[str, ...]], excluded: list[str]) -> list[Note]:
+        '''
+        Find notes by a parsed tag query, caching the result.
+        '''
+        key = ("tags", tuple(alternatives), tuple(excluded))
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            selects, params = [], []
+            for required in alternatives:
+                selects.append(f"SELECT note_id FROM tags WHERE tag IN ({_placeholders(required)}) "
+                               f"GROUP BY note_id HAVING COUNT(*) = {len(required)}")
+                params.extend(required)
+            sql = " UNION ".join(selects) or "SELECT id FROM notes"
+            if excluded:
+                sql += f" EXCEPT SELECT note_id FROM tags WHERE tag IN ({_placeholders(excluded)})"
+                params.extend(excluded)
+            result = self.__select(f"id IN ({sql})", params)
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def search_notes(self, query: str, limit: int | None = SEARCH_LIMIT) -> list[tuple[Note, float]]:
+        '''
+        Full-text search of the notes ranked by BM25, see Notebook.search_notes.
+        The query is translated to an FTS5 expression: the words are alternatives, the phrases and
+        NEAR clauses are required. Words are split by the unicode61 tokenizer of FTS5.
+        A NEAR clause of a word with itself only requires the word in FTS5; the matching notes are
+        then checked for two occurrences of the word, see _repeats_within.
+
+        Args:
+            query (str): The searched words, phrases and NEAR clauses.
+            limit (int | None): The maximum number of notes to return, all matching notes if None.
+        Returns:
+            list: (note, score) tuples, the most relevant notes first.
+        Raises:
+            exceptions.InputError: If the query contains no words or a NEAR clause is incomplete.
+        '''
+        terms, phrases, proximities = parse_query(query)
+        if not terms:
+            raise exceptions.InputError(f"Invalid search query '{query}'")
+        key = ("search", terms, phrases, proximities, limit)
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            quote = lambda words: '"' + " ".join(words) + '"'
+            expression = " OR ".join(quote([term]) for term in terms)
+            repeated = [(first, distance) for first, second, distance in proximities if first == second]
+            # NEAR/k allows k - 1 words between the two words, FTS5 counts the words in between
+            required = ([quote(phrase) for phrase in phrases] +
+                        [f"NEAR({quote([first])} {quote([second])}, {max(distance - 1, 0)})"
+                         for first, second, distance in proximities if first != second] +
+                        [quote([word]) for word, _ in repeated])
+            if required:
+                expression = " AND ".join(required + [f"({expression})"])
+            scores = self.__db.execute("SELECT rowid, bm25(notes_fts, ?, 1.0) AS rank FROM notes_fts "
+                                       "WHERE notes_fts MATCH ? ORDER BY rank LIMIT ?",
+                                       (TITLE_BOOST, expression,
+                                        -1 if limit is None or repeated else limit)).fetchall()
+            notes = {note.id: note for note in self.__select(f"id IN ({_placeholders(scores)})",
+                                                             [note_id for note_id, _ in scores])}
+            result = [(notes[note_id], -rank) for note_id, rank in scores
+                      if all(_repeats_within(notes[note_id], word, distance) for word, distance in repeated)]
+            result = result[:limit]
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def text_index_stats(self) -> dict[str, int]:
+        '''
+        Get the size of the full-text index compared with the size of the indexed titles and texts.
+
+        Returns:
+            dict: The number of notes and distinct words, the bytes of the FTS5 index blocks,
+                which are the whole index, and the bytes of the indexed titles and texts.
+        '''
+        query = lambda sql: self.__db.execute(sql).fetchone()[0] or 0
+        return {"documents": len(self),
+                "terms": query("SELECT COUNT(*) FROM notes_vocab"),
+                "index bytes": query("SELECT SUM(LENGTH(block)) FROM notes_fts_data"),
+                "text bytes": query("SELECT SUM(LENGTH(CAST(title AS BLOB)) + LENGTH(CAST(text AS BLOB))) FROM notes")}
+
+    def find_note_by_id(self, id: int):
+        '''
+        Find a note in the notebook by its ID.
+
+        Args:
+            id (int): The ID of the note to find.
+        Returns:
+            Note: The Note object with the given ID, or None if not found.
+        '''
+        found = self.__select("id = ?", [id])
+        return found[0] if found else None
+
+    def find_note(self, query: str, field_type: str) -> list[Note]:
+        '''
+        Find notes by a query string in a specified field (title or text).
+        Supports SQL-like wildcards: % for any sequence, _ for any single character.
+        Results are cached until the next change of the notebook.
+
+        Args:
+            query (str): The search query, may contain wildcards.
+            field_type (str): The field to search ('title' or 'text').
+        Returns:
+            list[Note]: List of matching Note objects.
+        '''
+        if field_type not in ['title', 'text']:
+            return []
+        key = (query.lower(), field_type)
+        result = self.__query_cache.get(key, self.__generation)
+        if result is None:
+            result = self.__select(f"wildcard_match(?, {field_type})", [query.lower()])
+            self.__query_cache.put(key, self.__generation, result)
+        return result
+
+    def get_notes(self):
+        '''
+        Get all notes in the notebook.
+
+        Returns:
+            list: A list of all Note objects in the notebook, ordered by id.
+        '''
+        return self.__select("1", [])
+
+    def __select(self, where: str, params: list) -> list[Note]:
+        '''
+        Materialize the notes matching a condition, ordered by id.
+        '''
+        notes = []
+        for note_id, title, text, tags in self.__db.execute(
+                f"SELECT {_NOTE_COLUMNS} FROM notes WHERE {where} ORDER BY id", params):
+            note = Note.__new__(Note)
+            note.__setstate__({"id": note_id, "title": title, "text": text,
+                               "tags": tags.split(_TAG_SEPARATOR) if tags else ()})
+            note.attach(self)
+            notes.append(note)
+        return notes
+
+    def __len__(self):
+        if self.__count is None:
+            self.__count = self.__db.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+        return self.__count
+
+    def __iter__(self):
+        return iter(self.get_notes())
+
+    def __contains__(self, note):
+        return self.__db.execute("SELECT 1 FROM notes WHERE id = ?", (note.id,)).fetchone() is not None
+
+    def __str__(self):
+        return f"Notebook:\n{"\n".join(str(note) for note in self.get_notes())}"
+
+
+class SqliteObject:
+    '''
+    Storage of an address book or a notebook in a SQLite database, with the interface of
+    SerializedObject: the collection is the object attribute, commit and save_data write the changes.
+    The database is stored next to the pickle file, with the DATABASE_SUFFIX extension. When the database
+    does not exist yet, it is created and filled with the collection stored in the pickle and its journal.
+
+    Attributes:
+        object (SqliteAddressBook | SqliteNotebook): The stored collection.
+    '''
+    def __init__(self, filename: str, object):
+        '''
+        Open the database of a collection.
+
+        Args:
+            filename (str): The name of the pickle file of the collection.
+            object (AddressBook | Notebook): The empty collection, selects the kind of the stored collection.
+        '''
+        path = os.path.splitext(filename)[0] + DATABASE_SUFFIX
+        is_new = not os.path.exists(path)
+        self.__connection = connect(path)
+        is_notebook = isinstance(object, Notebook)
+        self.object = SqliteNotebook(self.__connection) if is_notebook else SqliteAddressBook(self.__connection)
+        if is_new and os.path.exists(filename):
+            stored = JournaledObject(filename, object).object
+            if is_notebook:
+                for note in stored.get_notes():
+                    self.object.add_note(note)
+            else:
+                self.object.import_records(stored.get_all_contacts())
+            self.commit()
+
+    def commit(self) -> None:
+        '''
+        Commit the changes made since the last commit to the database.
+        '''
+        self.__connection.commit()
+
+    def save_data(self) -> None:
+        '''
+        Save the changes, see commit.
+        '''
+        self.commit()
+
+    def save_in_background(self, lock) -> None:
+        '''
+        Nothing is left to save, every change is committed to the database by commit.
+        '''
@@ -0,0 +1,897 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import nsmallest
+from math import log
+import re
+import sys
+import exceptions
+
+# BM25 term frequency saturation: higher values let repeated terms add more to the score
+BM25_K1 = 1.2
+
+# BM25 length normalization: 0 ignores the length of a field, 1 fully normalizes by it
+BM25_B = 0.75
+
+# Number of best documents returned by default
+SEARCH_LIMIT = 10
+
+# Number of removed field versions tolerated in the postings before they are compacted
+_MIN_COMPACT = 1024
+
+# Number of posting entries between two skip pointers
+_SKIP_INTERVAL = 16
+
+# The pending postings are merged into the packed ones when they take more than this fraction
+# of the memory of the packed ones, or more than _MIN_PENDING_BYTES for small indexes
+_PENDING_FRACTION = 4
+_MIN_PENDING_BYTES = 64 * 1024
+
+# Approximate memory of a pending posting besides its block: the dictionary entry, the term and the object
+_PENDING_TERM_BYTES = 256
+
+# Memory of a packed term besides its text and block: its items in the offset tables and arrays
+_PACKED_TERM_BYTES = 20
+
+_WORD = re.compile(r"\w+")
+
+# A quoted phrase, a NEAR/k operator or any other run of characters
+_QUERY_PART = re.compile(r'"([^"]*)"?|\bNEAR/(\d+)\b|[^\s"]+')
+
+
+def tokenize(text: str) -> list[str]:
+    '''
+    Split a text into lowercased words.
+
+    Args:
+        text (str): The text to split.
+    Returns:
+        list: The words of the text in order, with repetitions.
+    '''
+    return _WORD.findall(text.lower())
+
+
+def parse_query(query: str) -> tuple[tuple[str, ...], tuple[tuple[str, ...], ...], tuple[tuple[str, str, int], ...]]:
+    '''
+    Parse a full-text query.
+    The query consists of words, "quoted phrases" and 'word1 NEAR/k word2' clauses.
+    All words of the query rank the results. Phrases and NEAR clauses are also filters:
+    a document matches only if it contains every phrase and satisfies every NEAR clause.
+
+    Args:
+        query (str): The query.
+    Returns:
+        tuple: The distinct words sorted, the phrases as tuples of words,
+            and the NEAR clauses as (word, word, distance) tuples.
+    Raises:
+        exceptions.InputError: If a NEAR operator is not placed between two words.
+    '''
+    parts = []
+    for match in _QUERY_PART.finditer(query):
+        phrase, distance = match.group(1), match.group(2)
+        if phrase is not None:
+            words = tuple(tokenize(phrase))
+            if words:
+                parts.append(words)
+        elif distance is not None:
+            parts.append(int(distance))
+        else:
+            parts.extend(tokenize(match.group()))
+
+    terms, phrases, proximities = set(), [], []
+    for position, part in enumerate(parts):
+        if isinstance(part, int):
+            before = parts[position - 1] if position > 0 else None
+            after = parts[position + 1] if position + 1 < len(parts) else None
+            if not isinstance(before, str) or not isinstance(after, str):
+                raise exceptions.InputError(f"NEAR/{part} must be placed between two words")
+            proximities.append((before, after, part))
+        elif isinstance(part, tuple):
+            terms.update(part)
+            phrases.append(part)
+        else:
+            terms.add(part)
+    return tuple(sorted(terms)), tuple(phrases), tuple(proximities)
+
+
+def _write_varint(value: int, out: bytearray) -> None:
+    '''
+    Append a non-negative integer to a buffer, 7 bits per byte, lowest bits first.
+    '''
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytearray, offset: int) -> tuple[int, int]:
+    '''
+    Read a varint written by _write_varint.
+
+    Returns:
+        tuple: The value and the offset after it.
+    '''
+    value = data[offset]
+    offset += 1
+    if value < 0x80:
+        return value, offset
+    value &= 0x7F
+    shift = 7
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _encode_positions(positions: list[int]) -> bytearray:
+    '''
+    Encode increasing positions as varint deltas.
+    '''
+    encoded = bytearray()
+    previous = 0
+    for position in positions:
+        _write_varint(position - previous, encoded)
+        previous = position
+    return encoded
+
+
+def _decode_positions(block: bytearray, start: int, end: int) -> list[int]:
+    '''
+    Decode the delta-encoded positions of one entry of a posting block.
+    '''
+    positions = []
+    position = 0
+    while start < end:
+        delta, start = _read_varint(block, start)
+        position += delta
+        positions.append(position)
+    return positions
+
+
+def _read_entry(block: bytearray, offset: int, previous: int) -> tuple[int, int, int, int]:
+    '''
+    Read one entry of a posting block. Single-byte varints, by far the most common ones, are read inline.
+    The frequency is stored shifted left by one bit; the low bit is set when the encoded positions
+    are longer than one byte each, and their size follows only then.
+
+    Args:
+        block (bytearray): The posting block.
+        offset (int): The offset of the entry.
+        previous (int): The slot of the previous entry, 0 for the first one.
+    Returns:
+        tuple: The slot, the term frequency and the start and end offsets of the encoded positions.
+    '''
+    delta = block[offset]
+    if delta < 0x80:
+        offset += 1
+    else:
+        delta, offset = _read_varint(block, offset)
+    frequency = block[offset]
+    if frequency < 0x80:
+        offset += 1
+    else:
+        frequency, offset = _read_varint(block, offset)
+    if not frequency & 1:
+        return previous + delta, frequency >> 1, offset, offset + (frequency >> 1)
+    size = block[offset]
+    if size < 0x80:
+        offset += 1
+    else:
+        size, offset = _read_varint(block, offset)
+    return previous + delta, frequency >> 1, offset, offset + size
+
+
+def _continue_block(block, last_slot: int) -> tuple[bytearray, int]:
+    '''
+    Re-encode the first slot delta of a posting block started from slot 0, so the block continues
+    a block whose last slot is given.
+
+    Returns:
+        tuple: The new block and the change of its size.
+    '''
+    slot, offset = _read_varint(block, 0)
+    continued = bytearray()
+    _write_varint(slot - last_slot, continued)
+    continued += block[offset:]
+    return continued, len(continued) - len(block)
+
+
+def _within(first: list[int], second: list[int], distance: int) -> bool:
+    '''
+    Check if two sorted position lists have positions at most distance apart, merging them in one pass.
+    Equal positions do not count: two different words never share a position, and a word repeated
+    in a NEAR clause needs two occurrences.
+    '''
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if 0 < abs(first[i] - second[j]) <= distance:
+            return True
+        if first[i] < second[j]:
+            i += 1
+        else:
+            j += 1
+    return False
+
+
+class _Posting:
+    '''
+    Compressed posting block of one term in one field.
+    Every entry holds the slot delta, the term frequency, the size of the encoded positions unless
+    they take one byte each, and the positions as deltas, all as varints (see _read_entry). Every _SKIP_INTERVAL entries a skip pointer records
+    the slot before the entry and the offset of the entry, so a lookup of a few slots decodes
+    only the entries around them instead of the whole block.
+    Postings are only kept for the entries appended since the last merge of a _FieldPostings;
+    the postings returned by _FieldPostings.get are read-only views of the packed and pending entries.
+    '''
+    __slots__ = ("block", "last_slot", "documents", "entries", "skip_slots", "skip_offsets")
+
+    def __init__(self, block=None, skip_slots=None, skip_offsets=None):
+        '''
+        Args:
+            block (bytearray | memoryview | None): The encoded entries, a new empty block if None.
+            skip_slots (array | None): The slots before the entries the skip pointers point to.
+            skip_offsets (array | None): The offsets of these entries in the block.
+        '''
+        self.block = bytearray() if block is None else block
+        self.last_slot = 0
+        # Live documents containing the term; the block may also hold removed slots.
+        # In a pending posting, the change of the count since the last merge.
+        self.documents = 0
+        self.entries = 0
+        self.skip_slots = skip_slots
+        self.skip_offsets = skip_offsets
+
+    def append(self, slot: int, frequency: int, positions) -> None:
+        '''
+        Append an entry for a slot greater than all slots in the block.
+
+        Args:
+            slot (int): The slot.
+            frequency (int): The number of occurrences of the term.
+            positions (bytearray): The encoded positions of the term.
+        '''
+        block = self.block
+        if self.entries and self.entries % _SKIP_INTERVAL == 0:
+            if self.skip_slots is None:
+                self.skip_slots = array('I')
+                self.skip_offsets = array('I')
+            self.skip_slots.append(self.last_slot)
+            self.skip_offsets.append(len(block))
+        _write_varint(slot - self.last_slot, block)
+        if len(positions) == frequency:
+            _write_varint(frequency << 1, block)
+        else:
+            _write_varint(frequency << 1 | 1, block)
+            _write_varint(len(positions), block)
+        block += positions
+        self.last_slot = slot
+        self.entries += 1
+
+    def scan(self):
+        '''
+        Iterate over all entries of the block.
+
+        Yields:
+            tuple: The slot, the term frequency and the start and end offsets of the encoded positions.
+        '''
+        block = self.block
+        end = len(block)
+        offset = 0
+        slot = 0
+        while offset < end:
+            entry = _read_entry(block, offset, slot)
+            yield entry
+            slot = entry[0]
+            offset = entry[3]
+
+    def select(self, slots):
+        '''
+        Iterate over the entries of the given slots.
+        The whole block is scanned if the slots are many, otherwise the skip pointers are followed.
+
+        Args:
+            slots (Collection[int]): The slots of interest.
+        Yields:
+            tuple: The slot, the term frequency and the start and end offsets of the encoded positions.
+        '''
+        if not self.skip_slots or len(slots) > len(self.skip_slots):
+            yield from (entry for entry in self.scan() if entry[0] in slots)
+            return
+        block = self.block
+        end = len(block)
+        skip_slots, skip_offsets = self.skip_slots, self.skip_offsets
+        offset = 0
+        slot = 0
+        for wanted in sorted(slots):
+            skip = bisect_left(skip_slots, wanted) - 1
+            if skip >= 0 and skip_offsets[skip] > offset:
+                slot, offset = skip_slots[skip], skip_offsets[skip]
+            while offset < end:
+                entry = _read_entry(block, offset, slot)
+                if entry[0] > wanted:
+                    break
+                slot = entry[0]
+                offset = entry[3]
+                if slot == wanted:
+                    yield entry
+                    break
+
+
+class _FieldPostings:
+    '''
+    Postings of all the terms of one field, packed into a few flat buffers.
+
+    The packed part keeps the terms sorted in one UTF-8 buffer, found by binary search, and the posting
+    blocks of the terms one after another in one bytearray. Offset tables locate the term and the block
+    at every position, and arrays indexed by the same position hold the number of live documents,
+    the last slot and the range of the skip pointers of the term, so a term costs a few array items
+    instead of a dictionary entry, a string and a block object.
+
+    New entries are appended to the pending part: a _Posting per term, started from slot 0 so appending
+    does not look up the packed part. The pending postings are merged into the packed part
+    when they take more than a fraction of it. A merge replaces the packed buffers instead of resizing
+    them, so the views returned by get stay valid.
+    '''
+    def __init__(self):
+        self.__clear()
+
+    def __clear(self) -> None:
+        '''
+        Empty the packed and pending parts.
+        '''
+        self.__pack(b"", array('I', [0]), bytearray(), array('I', [0]), array('I'), array('I'),
+                    array('I', [0]), array('I'), array('I'))
+
+    def __pack(self, terms, term_offsets, blocks, block_offsets, documents, last_slots,
+               skip_starts, skip_slots, skip_offsets) -> None:
+        '''
+        Replace the packed part and empty the pending one.
+        '''
+        self.__terms = bytes(terms)
+        self.__term_offsets = term_offsets
+        # Copied to drop the spare capacity of the buffer grown by the merge
+        self.__blocks = bytearray(blocks)
+        self.__block_offsets = block_offsets
+        self.__documents = documents
+        self.__last_slots = last_slots
+        # Skip pointers of the term at position i: skip_slots[skip_starts[i]:skip_starts[i + 1]],
+        # with offsets relative to the start of its block
+        self.__skip_starts = skip_starts
+        self.__skip_slots = skip_slots
+        self.__skip_offsets = skip_offsets
+        # term -> _Posting of the entries appended since the last merge
+        self.__pending = {}
+        self.__pending_bytes = 0
+
+    def __term(self, index: int) -> bytes:
+        '''
+        Get the encoded term at a position of the packed part.
+        '''
+        return self.__terms[self.__term_offsets[index]:self.__term_offsets[index + 1]]
+
+    def __lower_bound(self, term: str, low: int = 0) -> int:
+        '''
+        Get the first position of the packed part from low on whose term is not less than the given one, by binary search.
+        '''
+        return bisect_left(range(len(self.__documents)), term.encode(), low, key=self.__term)
+
+    def __find(self, term: str) -> int:
+        '''
+        Get the position of a term in the packed part, -1 if it is not there.
+        '''
+        index = self.__lower_bound(term)
+        return index if index < len(self.__documents) and self.__term(index) == term.encode() else -1
+
+    def __packed_positions(self) -> dict[str, int]:
+        '''
+        Get the positions of the packed terms keyed by term.
+        '''
+        return {self.__term(index).decode(): index for index in range(len(self.__documents))}
+
+    def __count(self, index: int, pending: _Posting | None) -> int:
+        '''
+        Get the number of live documents of a term from its packed position and its pending posting.
+        '''
+        return (self.__documents[index] if index >= 0 else 0) + (pending.documents if pending is not None else 0)
+
+    def append(self, term: str, slot: int, frequency: int, positions: bytearray) -> None:
+        '''
+        Add an entry of a new document to the postings of a term.
+
+        Args:
+            term (str): The term.
+            slot (int): The slot of the document, greater than all slots indexed before.
+            frequency (int): The number of occurrences of the term.
+            positions (bytearray): The encoded positions of the term.
+        '''
+        posting = self.__pending.get(term)
+        if posting is None:
+            posting = self.__pending[term] = _Posting()
+        size = len(posting.block)
+        posting.append(slot, frequency, positions)
+        posting.documents += 1
+        self.__pending_bytes += len(posting.block) - size
+
+    def merge_if_full(self) -> None:
+        '''
+        Merge the pending postings into the packed part if they take more than their share of memory.
+        '''
+        pending = self.__pending_bytes + len(self.__pending) * _PENDING_TERM_BYTES
+        packed = len(self.__blocks) + len(self.__terms) + len(self.__documents) * _PACKED_TERM_BYTES
+        if pending > max(_MIN_PENDING_BYTES, packed // _PENDING_FRACTION):
+            self.__merge()
+
+    def discard(self, term: str) -> None:
+        '''
+        Count one live document less for a term. The entry stays in the block until the next compaction.
+
+        Args:
+            term (str): The term.
+        '''
+        posting = self.__pending.get(term)
+        if posting is not None:
+            posting.documents -= 1
+            return
+        index = self.__find(term)
+        if index >= 0 and self.__documents[index]:
+            self.__documents[index] -= 1
+
+    def get(self, term: str) -> _Posting | None:
+        '''
+        Get the posting of a term, as a view of its packed block followed by its pending entries.
+
+        Args:
+            term (str): The term.
+        Returns:
+            _Posting | None: The posting with the number of live documents, None if no live document contains the term.
+        '''
+        index = self.__find(term)
+        pending = self.__pending.get(term)
+        documents = self.__count(index, pending)
+        if documents <= 0:
+            return None
+        if index < 0:
+            return pending
+        start, end = self.__block_offsets[index], self.__block_offsets[index + 1]
+        skip_start, skip_end = self.__skip_starts[index], self.__skip_starts[index + 1]
+        skip_slots = self.__skip_slots[skip_start:skip_end]
+        skip_offsets = self.__skip_offsets[skip_start:skip_end]
+        if pending is None:
+            block = memoryview(self.__blocks)[start:end]
+        else:
+            continued, shift = _continue_block(pending.block, self.__last_slots[index])
+            block = self.__blocks[start:end] + continued
+            if pending.skip_slots is not None:
+                skip_slots.extend(pending.skip_slots)
+                skip_offsets.extend(offset + end - start + shift for offset in pending.skip_offsets)
+        posting = _Posting(block=block, skip_slots=skip_slots, skip_offsets=skip_offsets)
+        posting.documents = documents
+        return posting
+
+    def __merge(self) -> None:
+        '''
+        Merge the pending postings into the packed part.
+        A pending block is concatenated to the packed block of its term once its first slot delta
+        is re-encoded after the last packed slot.
+        The packed terms between two pending ones are copied as one run, with their offsets shifted in bulk,
+        so a merge costs a few operations per pending term besides copying the buffers.
+        Pending terms without live documents are dropped; packed ones are dropped by compact.
+        '''
+        terms, blocks = bytearray(), bytearray()
+        term_offsets, block_offsets, skip_starts = array('I', [0]), array('I', [0]), array('I', [0])
+        documents, last_slots, skip_slots, skip_offsets = array('I'), array('I'), array('I'), array('I')
+        old_blocks = memoryview(self.__blocks)
+
+        def copy(first: int, last: int) -> None:
+            # Copy the packed terms at positions first to last - 1
+            if first >= last:
+                return
+            for buffer, offsets, old_buffer, old_offsets in ((terms, term_offsets, self.__terms, self.__term_offsets),
+                                                             (blocks, block_offsets, old_blocks, self.__block_offsets)):
+                start, end = old_offsets[first], old_offsets[last]
+                offsets.extend(map((len(buffer) - start).__add__, old_offsets[first + 1:last + 1]))
+                buffer.extend(old_buffer[start:end])
+            start, end = self.__skip_starts[first], self.__skip_starts[last]
+            skip_starts.extend(map((len(skip_slots) - start).__add__, self.__skip_starts[first + 1:last + 1]))
+            skip_slots.extend(self.__skip_slots[start:end])
+            skip_offsets.extend(self.__skip_offsets[start:end])
+            documents.extend(self.__documents[first:last])
+            last_slots.extend(self.__last_slots[first:last])
+
+        cursor = 0
+        for term in sorted(self.__pending):
+            pending = self.__pending[term]
+            index = self.__lower_bound(term, cursor)
+            is_packed = index < len(self.__documents) and self.__term(index) == term.encode()
+            count = self.__count(index if is_packed else -1, pending)
+            if not is_packed and count <= 0:
+                continue
+            copy(cursor, index)
+            cursor = index
+            start = len(blocks)
+            block, shift = pending.block, 0
+            if is_packed:
+                blocks.extend(old_blocks[self.__block_offsets[index]:self.__block_offsets[index + 1]])
+                skip_range = slice(self.__skip_starts[index], self.__skip_starts[index + 1])
+                skip_slots.extend(self.__skip_slots[skip_range])
+                skip_offsets.extend(self.__skip_offsets[skip_range])
+                block, shift = _continue_block(block, self.__last_slots[index])
+                cursor += 1
+            if pending.skip_slots is not None:
+                shift += len(blocks) - start
+                skip_slots.extend(pending.skip_slots)
+                skip_offsets.extend(offset + shift for offset in pending.skip_offsets)
+            blocks.extend(block)
+            terms.extend(term.encode())
+            term_offsets.append(len(terms))
+            block_offsets.append(len(blocks))
+            skip_starts.append(len(skip_slots))
+            documents.append(max(count, 0))
+            last_slots.append(pending.last_slot)
+        copy(cursor, len(self.__documents))
+        old_blocks.release()
+        self.__pack(terms, term_offsets, blocks, block_offsets, documents, last_slots,
+                    skip_starts, skip_slots, skip_offsets)
+
+    def compact(self, renumbered) -> None:
+        '''
+        Rewrite the blocks without the removed slots and the terms without live documents,
+        with the live slots renumbered.
+
+        Args:
+            renumbered (Sequence[int]): The new number of every slot, -1 for the removed ones.
+        '''
+        self.__merge()
+        rewritten = {}
+        for term in self.__packed_positions():
+            posting = self.get(term)
+            if posting is None:
+                continue
+            compacted = rewritten[term] = _Posting()
+            for slot, frequency, start, end in posting.scan():
+                if renumbered[slot] >= 0:
+                    compacted.append(renumbered[slot], frequency, posting.block[start:end])
+            compacted.documents = posting.documents
+        self.__clear()
+        self.__pending = rewritten
+        self.__merge()
+
+    def encoded_bytes(self) -> int:
+        '''
+        Get the size of the encoded posting blocks, packed and pending.
+        '''
+        return len(self.__blocks) + sum(len(posting.block) for posting in self.__pending.values())
+
+    def memory(self) -> int:
+        '''
+        Get the memory taken by the packed buffers and the pending postings, measured with sys.getsizeof.
+        '''
+        size = sys.getsizeof
+        total = sum(size(buffer) for buffer in (self.__terms, self.__term_offsets, self.__blocks, self.__block_offsets,
+                                                self.__documents, self.__last_slots, self.__skip_starts,
+                                                self.__skip_slots, self.__skip_offsets, self.__pending))
+        for term, posting in self.__pending.items():
+            total += size(term) + size(posting) + size(posting.block)
+            if posting.skip_slots is not None:
+                total += size(posting.skip_slots) + size(posting.skip_offsets)
+        return total
+
+    def __len__(self):
+        packed = self.__packed_positions()
+        return sum(1 for term in packed.keys() | self.__pending.keys()
+                   if self.__count(packed.get(term, -1), self.__pending.get(term)) > 0)
+
+
+class TextIndex:
+    '''
+    Positional inverted index of documents made of several weighted text fields, ranked by BM25.
+
+    Every indexed version of a document field gets a new slot number in the field, and every field
+    has its own postings listing, for every term, the slots containing the term in increasing order
+    with the positions of the term, see _FieldPostings. New slots only grow, so indexing appends
+    to the postings. A removed or changed field leaves its old slot in the postings as a tombstone;
+    the postings are compacted and the slots renumbered when the removed slots outnumber the live ones.
+    The documents of the slots, their lengths and the slots of the documents are kept in arrays,
+    so document ids must be non-negative integers below 2**31, such as note ids.
+
+    The score of a document is the sum of the BM25 scores of its fields multiplied by the field weights.
+    Phrase and NEAR clauses are answered by intersecting the slots of their words, starting from
+    the rarest word, and merging the position lists of the words in the remaining slots only.
+
+    The index does not keep the texts. A document is removed or changed by passing the text
+    it was indexed with, which is the old value the caller already has.
+    '''
+    def __init__(self, weights: dict[str, float]):
+        '''
+        Initialize an empty index.
+
+        Args:
+            weights (dict): The names of the indexed fields mapped to their weights.
+        '''
+        self.__weights = dict(weights)
+        self.__postings = {field: _FieldPostings() for field in weights}
+        # document id -> slot of its current version, -1 if the document has no version in the field
+        self.__slots = {field: array('i') for field in weights}
+        # slot -> document id, -1 once the version is removed
+        self.__doc_ids = {field: array('i') for field in weights}
+        # slot -> number of words
+        self.__lengths = {field: array('I') for field in weights}
+        self.__live = dict.fromkeys(weights, 0)
+        self.__total_lengths = dict.fromkeys(weights, 0)
+        self.__text_bytes = dict.fromkeys(weights, 0)
+        self.__dead = dict.fromkeys(weights, 0)
+
+    def add(self, doc_id: int, field: str, text: str) -> None:
+        '''
+        Index the text of a document field.
+
+        Args:
+            doc_id (int): The id of the document.
+            field (str): The name of the field.
+            text (str): The text of the field.
+        '''
+        slot = len(self.__doc_ids[field])
+        terms = tokenize(text)
+        positions = {}
+        for position, term in enumerate(terms):
+            positions.setdefault(term, []).append(position)
+
+        postings = self.__postings[field]
+        for term, term_positions in positions.items():
+            postings.append(term, slot, len(term_positions), _encode_positions(term_positions))
+        postings.merge_if_full()
+
+        slots = self.__slots[field]
+        if doc_id >= len(slots):
+            slots.extend([-1] * (doc_id + 1 - len(slots)))
+        slots[doc_id] = slot
+        self.__doc_ids[field].append(doc_id)
+        self.__lengths[field].append(len(terms))
+        self.__text_bytes[field] += len(text.encode())
+        self.__live[field] += 1
+        self.__total_lengths[field] += len(terms)
+
+    def discard(self, doc_id: int, field: str, text: str) -> None:
+        '''
+        Remove the text of a document field from the index.
+
+        Args:
+            doc_id (int): The id of the document.
+            field (str): The name of the field.
+            text (str): The text the field was indexed with.
+        '''
+        slot = self.__slot(field, doc_id)
+        if slot is None:
+            return
+        self.__slots[field][doc_id] = -1
+        self.__doc_ids[field][slot] = -1
+        self.__live[field] -= 1
+        self.__total_lengths[field] -= self.__lengths[field][slot]
+        self.__text_bytes[field] -= len(text.encode())
+        postings = self.__postings[field]
+        for term in set(tokenize(text)):
+            postings.discard(term)
+        self.__dead[field] += 1
+        if self.__dead[field] > max(_MIN_COMPACT, self.__live[field]):
+            self.__compact(field)
+
+    def replace(self, doc_id: int, field: str, old_text: str, new_text: str) -> None:
+        '''
+        Reindex a changed document field.
+
+        Args:
+            doc_id (int): The id of the document.
+            field (str): The name of the field.
+            old_text (str): The text the field was indexed with.
+            new_text (str): The new text of the field.
+        '''
+        self.discard(doc_id, field, old_text)
+        self.add(doc_id, field, new_text)
+
+    def __slot(self, field: str, doc_id: int) -> int | None:
+        '''
+        Get the slot of the current version of a document field, None if the field is not indexed.
+        '''
+        slots = self.__slots[field]
+        slot = slots[doc_id] if 0 <= doc_id < len(slots) else -1
+        return slot if slot >= 0 else None
+
+    def __compact(self, field: str) -> None:
+        '''
+        Rewrite the postings of a field without the removed slots and renumber the live slots.
+        '''
+        doc_ids, lengths = self.__doc_ids[field], self.__lengths[field]
+        renumbered = array('i', [-1]) * len(doc_ids)
+        live = [slot for slot, doc_id in enumerate(doc_ids) if doc_id >= 0]
+        for new_slot, slot in enumerate(live):
+            renumbered[slot] = new_slot
+            self.__slots[field][doc_ids[slot]] = new_slot
+        self.__postings[field].compact(renumbered)
+        self.__doc_ids[field] = array('i', (doc_ids[slot] for slot in live))
+        self.__lengths[field] = array('I', (lengths[slot] for slot in live))
+        self.__dead[field] = 0
+
+    def search(self, query: str, limit: int | None = SEARCH_LIMIT) -> list[tuple[int, float]]:
+        '''
+        Rank the documents matching a query by BM25, see parse_query for the query syntax.
+        Only the postings of the query words are read.
+
+        Args:
+            query (str): The query.
+            limit (int | None): The maximum number of documents to return, all matching documents if None.
+        Returns:
+            list: (document id, score) tuples, best first and by id within the same score.
+        Raises:
+            exceptions.InputError: If a NEAR operator is not placed between two words.
+        '''
+        terms, phrases, proximities = parse_query(query)
+        allowed = None
+        for phrase in phrases:
+            allowed = self.__filter(allowed, lambda field: self.__phrase_matches(field, phrase))
+        for first, second, distance in proximities:
+            allowed = self.__filter(allowed, lambda field: self.__near_matches(field, first, second, distance))
+        if allowed is not None and not allowed:
+            return []
+
+        scores = Counter()
+        for field, weight in self.__weights.items():
+            count = self.__live[field]
+            if not count:
+                continue
+            doc_ids, lengths = self.__doc_ids[field], self.__lengths[field]
+            average = self.__total_lengths[field] / count or 1
+            if allowed is not None:
+                allowed_slots = {slot for slot in (self.__slot(field, doc_id) for doc_id in allowed) if slot is not None}
+            for term in terms:
+                posting = self.__postings[field].get(term)
+                if posting is None:
+                    continue
+                idf = log(1 + (count - posting.documents + 0.5) / (posting.documents + 0.5))
+                entries = posting.scan() if allowed is None else posting.select(allowed_slots)
+                for slot, frequency, _, _ in entries:
+                    doc_id = doc_ids[slot]
+                    if doc_id < 0:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[slot] / average)
+                    scores[doc_id] += weight * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        ranked = ((-score, doc_id) for doc_id, score in scores.items())
+        ranked = sorted(ranked) if limit is None else nsmallest(limit, ranked)
+        return [(doc_id, -score) for score, doc_id in ranked]
+
+    def __filter(self, allowed: set | None, matches) -> set:
+        '''
+        Restrict the allowed documents to the ones matching a clause in any field.
+
+        Args:
+            allowed (set | None): The ids of the documents matching the previous clauses, None if there were none.
+            matches (callable): The function that takes a field and returns the ids of the documents matching the clause in it.
+        Returns:
+            set: The ids of the documents matching all clauses so far.
+        '''
+        found = set()
+        for field in self.__weights:
+            found |= matches(field)
+        return found if allowed is None else allowed & found
+
+    def __common_slots(self, field: str, postings: dict[str, _Posting]) -> set[int]:
+        '''
+        Find the live slots of a field containing all the terms, looking up the slots of the rarest term
+        in the blocks of the others. The positions are not decoded.
+
+        Args:
+            field (str): The name of the field.
+            postings (dict): The postings of the terms keyed by term, None for a term in no live document.
+        Returns:
+            set: The matching slots.
+        '''
+        if any(posting is None for posting in postings.values()):
+            return set()
+        slots = None
+        for posting in sorted(postings.values(), key=lambda posting: posting.documents):
+            if slots is None:
+                doc_ids = self.__doc_ids[field]
+                slots = {entry[0] for entry in posting.scan() if doc_ids[entry[0]] >= 0}
+            else:
+                slots = {entry[0] for entry in posting.select(slots)}
+            if not slots:
+                break
+        return slots
+
+    @staticmethod
+    def __positions_by_slot(posting: _Posting, slots) -> dict[int, list[int]]:
+        '''
+        Decode the positions of a term in the given slots.
+
+        Args:
+            posting (_Posting): The posting of the term.
+            slots (Collection[int]): The slots of interest.
+        Returns:
+            dict: The positions of the term keyed by slot.
+        '''
+        return {slot: _decode_positions(posting.block, start, end)
+                for slot, _, start, end in posting.select(slots)}
+
+    def __phrase_matches(self, field: str, phrase: tuple[str, ...]) -> set[int]:
+        '''
+        Find the documents containing the words of a phrase next to each other in a field.
+        Only the positions of the words in the documents containing all of them are decoded.
+
+        Args:
+            field (str): The name of the field.
+            phrase (tuple): The words of the phrase.
+        Returns:
+            set: The ids of the matching documents.
+        '''
+        postings = {term: self.__postings[field].get(term) for term in set(phrase)}
+        slots = self.__common_slots(field, postings)
+        starts = None
+        for offset, term in enumerate(phrase):
+            if not slots:
+                break
+            by_slot = self.__positions_by_slot(postings[term], slots)
+            matched = {}
+            for slot, positions in by_slot.items():
+                term_starts = {position - offset for position in positions}
+                if starts is not None:
+                    term_starts &= starts[slot]
+                if term_starts:
+                    matched[slot] = term_starts
+            starts = matched
+            slots = starts.keys()
+        doc_ids = self.__doc_ids[field]
+        return {doc_ids[slot] for slot in slots}
+
+    def __near_matches(self, field: str, first: str, second: str, distance: int) -> set[int]:
+        '''
+        Find the documents containing two words at most distance words apart, in any order, in a field.
+        Only the positions of the words in the documents containing both of them are decoded.
+
+        Args:
+            field (str): The name of the field.
+            first (str): The first word.
+            second (str): The second word.
+            distance (int): The largest distance between the positions of the words.
+        Returns:
+            set: The ids of the matching documents.
+        '''
+        postings = {term: self.__postings[field].get(term) for term in (first, second)}
+        slots = self.__common_slots(field, postings)
+        if not slots:
+            return set()
+        first_positions = self.__positions_by_slot(postings[first], slots)
+        second_positions = self.__positions_by_slot(postings[second], slots)
+        doc_ids = self.__doc_ids[field]
+        return {doc_ids[slot] for slot, positions in first_positions.items()
+                if _within(positions, second_positions[slot], distance)}
+
+    def memory_usage(self) -> dict[str, int]:
+        '''
+        Get the size of the index compared with the size of the indexed texts.
+        The encoded block bytes count only the compressed postings; the index bytes are the memory
+        of the whole index measured with sys.getsizeof: the packed terms and blocks with their offset
+        tables and arrays, the pending postings, and the slot and document arrays.
+
+        Returns:
+            dict: The number of documents and distinct terms, the bytes of the encoded posting blocks,
+                the bytes of the whole index and the bytes of the indexed texts.
+        '''
+        return {"documents": len(self),
+                "terms": sum(len(postings) for postings in self.__postings.values()),
+                "encoded block bytes": sum(postings.encoded_bytes() for postings in self.__postings.values()),
+                "index bytes": sum(self.__field_bytes(field) for field in self.__weights),
+                "text bytes": sum(self.__text_bytes.values())}
+
+    def __field_bytes(self, field: str) -> int:
+        '''
+        Get the memory taken by the postings, the slots and the documents of a field.
+        '''
+        size = sys.getsizeof
+        return (self.__postings[field].memory() + size(self.__slots[field]) + size(self.__doc_ids[field])
+                + size(self.__lengths[field]))
+
+    def __len__(self):
+        return max(self.__live.values(), default=0)
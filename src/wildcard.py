@@ -0,0 +1,162 @@
+from functools import lru_cache
+import re
+
+# Maximum number of compiled patterns kept in the cache
+PATTERN_CACHE_SIZE = 1024
+
+
+def has_wildcards(pattern: str) -> bool:
+    '''
+    Check if a pattern contains LIKE-style wildcards.
+
+    Args:
+        pattern (str): The pattern to check.
+    Returns:
+        bool: True if the pattern contains '%' or '_', False otherwise.
+    '''
+    return '%' in pattern or '_' in pattern
+
+
+def literal_prefix(pattern: str) -> str:
+    '''
+    Get the literal part of a pattern before its first wildcard.
+
+    Args:
+        pattern (str): The pattern, may contain '%' and '_' wildcards.
+    Returns:
+        str: The prefix every matching text starts with.
+    '''
+    for position, char in enumerate(pattern):
+        if char in '%_':
+            return pattern[:position]
+    return pattern
+
+
+def _compile_segment(segment: str):
+    '''
+    Compile a pattern segment that contains no '%' wildcards.
+    A segment without '_' wildcards is kept as a plain string; otherwise it is compiled
+    to a fixed-width regular expression, which has no quantifiers and can not backtrack.
+
+    Args:
+        segment (str): The segment to compile.
+    Returns:
+        str | re.Pattern: The literal segment or the compiled expression.
+    '''
+    if '_' not in segment:
+        return segment
+    return re.compile(re.escape(segment).replace('_', '.'), re.DOTALL)
+
+
+def _match_at(segment, text: str, pos: int) -> bool:
+    '''
+    Check if a compiled segment matches the text at the given position.
+    '''
+    if isinstance(segment, str):
+        return text.startswith(segment, pos)
+    return segment.match(text, pos) is not None
+
+
+def _find(segment, text: str, pos: int, end: int) -> int:
+    '''
+    Find the leftmost occurrence of a compiled segment in text[pos:end].
+
+    Returns:
+        int: The position of the occurrence, -1 if the segment is not found.
+    '''
+    if isinstance(segment, str):
+        return text.find(segment, pos, end)
+    found = segment.search(text, pos, end)
+    return found.start() if found else -1
+
+
+class GlobMatcher:
+    '''
+    Matcher for LIKE-style patterns that never backtracks over '%' wildcards.
+    The pattern is split by '%' into segments. The first and the last segments are anchored
+    to the edges of the text, the middle segments are searched greedily from left to right:
+    taking the leftmost occurrence of each segment always leaves the most room for the rest.
+    Every character of the text is therefore visited by at most one segment search, and the
+    worst case is O(len(text) * len(pattern)), linear in the text for any pattern.
+    '''
+    def __init__(self, pattern: str):
+        parts = pattern.split('%')
+        self.__is_fixed = len(parts) == 1
+        self.__first = _compile_segment(parts[0])
+        self.__first_len = len(parts[0])
+        self.__last = _compile_segment(parts[-1])
+        self.__last_len = len(parts[-1])
+        self.__middle = [(_compile_segment(part), len(part)) for part in parts[1:-1] if part]
+        self.__min_len = len(pattern) - pattern.count('%')
+
+    def __call__(self, text: str) -> bool:
+        '''
+        Check if the text matches the pattern.
+
+        Args:
+            text (str): The text to check.
+        Returns:
+            bool: True if the text matches the pattern, False otherwise.
+        '''
+        if self.__is_fixed:
+            return len(text) == self.__min_len and _match_at(self.__first, text, 0)
+        if len(text) < self.__min_len:
+            return False
+        if not _match_at(self.__first, text, 0):
+            return False
+        end = len(text) - self.__last_len
+        if not _match_at(self.__last, text, end):
+            return False
+        pos = self.__first_len
+        for segment, length in self.__middle:
+            found = _find(segment, text, pos, end)
+            if found < 0:
+                return False
+            pos = found + length
+        return True
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str):
+    '''
+    Compile a LIKE-style pattern into a matcher function.
+    The pattern can contain wildcards:
+    - '%' matches any sequence of characters
+    - '_' matches any single character
+    Patterns without wildcards, or with '%' only at the edges, are matched with plain string
+    operations; other patterns are matched by a GlobMatcher, which runs in linear time
+    for any pattern. Compiled matchers are cached.
+
+    Args:
+        pattern (str): The pattern to compile.
+    Returns:
+        callable: A function that takes a string and returns True if it matches the pattern.
+    '''
+    if not has_wildcards(pattern):
+        return lambda text: text == pattern
+
+    literal = pattern.strip('%')
+    if not literal:
+        # The pattern consists of '%' only and matches everything
+        return lambda text: True
+    if not has_wildcards(literal):
+        starts_with_any = pattern.startswith('%')
+        ends_with_any = pattern.endswith('%')
+        if starts_with_any and ends_with_any:
+            return lambda text: literal in text
+        if ends_with_any:
+            return lambda text: text.startswith(literal)
+        return lambda text: text.endswith(literal)
+
+    return GlobMatcher(pattern)
+
+
+def cache_info() -> dict[str, int]:
+    '''
+    Get statistics of the compiled pattern cache.
+
+    Returns:
+        dict: Cache hits, misses, current size and maximum size.
+    '''
+    info = compile_pattern.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max size": info.maxsize}